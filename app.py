@@ -1,10 +1,26 @@
 from __future__ import annotations
 
+import io
 import os
-from datetime import time as dtime
+from collections import deque
+from datetime import date, datetime, time as dtime
 
 import streamlit as st
 
+import db_metrics
+import profiling
+from booking_io import (
+    export_bookings_csv,
+    export_bookings_parquet,
+    import_bookings_csv,
+    read_services_csv,
+)
+from catalog import find_service, get_catalog
+from logo_images import process_logo, read_logo_bytes
+from qr_codes import get_company_qr
+from search import SEARCH_PAGE_SIZE, search
+from slot_engine import to_hhmm
+from waitlist import WAITLIST_CHANNELS, add_to_waitlist, list_waitlist, remove_from_waitlist
 from database import (
     init_db,
     # companies
@@ -16,19 +32,30 @@ from database import (
     get_company_slug,
     activate_company,
     is_company_paid,
+    get_company_subscription,
     update_company_profile,
     set_company_logo,
     get_company_logo,
     # categories & services
     get_categories,
     get_services,
+    list_services,
     add_service,
+    add_services_bulk,
     # availability & bookings
     add_availability,
     get_availability,
+    add_resource,
+    list_resources,
+    get_resources,
+    set_resource_active,
+    add_availability_exception,
+    list_availability_exceptions,
+    delete_availability_exception,
+    get_company_min_lead,
+    set_company_min_lead,
     get_bookings_overview,
     get_bookings,
-    get_public_services,
     # reminders
     get_reminder_settings,
     upsert_reminder_settings,
@@ -39,6 +66,12 @@ from database import (
     add_email_limit,
     # stats
     get_customer_stats,
+    # klanten
+    backfill_customers,
+    get_customer_history,
+    list_customers,
+    update_customer,
+    set_booking_notes,
     get_status_overview,
     # AI / AI Telefoniste
     get_company_ai_settings,
@@ -52,6 +85,24 @@ from database import (
 )
 
 APP_LOGO_URL = os.getenv("APP_LOGO_URL", "")
+# ?profile=... en ?debug=1 werken alleen als de beheerder dit aanzet
+# (niet in productie: profielen en trage queries gaan over alle bedrijven)
+DEBUG_TOOLS = os.getenv("APP_DEBUG_TOOLS") == "1"
+
+
+def _get_query_params():
+    """Compat wrapper voor nieuwe & oude Streamlit API."""
+    try:
+        return dict(st.query_params)
+    except Exception:
+        return st.experimental_get_query_params()
+
+
+def _query_value(name: str):
+    value = _get_query_params().get(name)
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return value
 
 
 st.set_page_config(
@@ -59,6 +110,14 @@ st.set_page_config(
     page_icon="💫",
     layout="wide",
 )
+db_metrics.start_rerun()
+
+# Profielmodus: APP_PROFILE=cprofile|sample voor alle sessies, of met
+# APP_DEBUG_TOOLS=1 per sessie via ?profile=1 / ?profile=sample
+if DEBUG_TOOLS and _query_value("profile") is not None:
+    st.session_state["profile_mode"] = profiling.mode_from(_query_value("profile"))
+PROFILE_MODE = st.session_state.get("profile_mode") or profiling.mode_from(os.getenv("APP_PROFILE"))
+profiling.start_rerun(PROFILE_MODE, label=f"bedrijf {st.session_state.get('company_id', '-')}")
 
 # AI Telefoniste configuratie
 PREMIUM_AI_0900_RATE_EUR = 0.10   # tarief dat bellers betalen via 0900
@@ -197,14 +256,6 @@ def _error(msg: str):
     st.error(msg)
 
 
-def _get_query_params():
-    """Compat wrapper voor nieuwe & oude Streamlit API."""
-    try:
-        return dict(st.query_params)
-    except Exception:
-        return st.experimental_get_query_params()
-
-
 def _set_query_params(**kwargs):
     try:
         st.query_params = {k: str(v) for k, v in kwargs.items() if v is not None}
@@ -213,6 +264,64 @@ def _set_query_params(**kwargs):
             **{k: v for k, v in kwargs.items() if v is not None}
         )
 
+
+def _db_debug_enabled() -> bool:
+    """
+    Debugpaneel via DB_DEBUG_PANEL=1, of met APP_DEBUG_TOOLS=1 via ?debug=1
+    (blijft dan aan in de sessie).
+    """
+    if os.getenv("DB_DEBUG_PANEL") == "1":
+        return True
+    if not DEBUG_TOOLS:
+        return False
+    debug = _query_value("debug")
+    if debug is not None:
+        st.session_state["db_debug"] = debug in ("1", "true")
+    return st.session_state.get("db_debug", False)
+
+
+def render_db_debug_panel():
+    """Aantal queries en databasetijd van deze rerun, per functie en statement."""
+    stats = db_metrics.rerun_stats(top=10)
+    if stats is None:
+        return
+    with st.sidebar.expander("🛠️ Database (deze rerun)", expanded=False):
+        st.metric("Queries", stats["queries"])
+        st.metric("Tijd in SQLite", f"{stats['total_ms']:.1f} ms")
+        st.caption("Per functie")
+        st.dataframe(stats["functions"], hide_index=True, use_container_width=True)
+        st.caption("Per statement")
+        st.dataframe(stats["statements"], hide_index=True, use_container_width=True)
+        slow = db_metrics.recent_slow_queries(10)
+        if slow:
+            st.caption(f"Trage queries (≥ {db_metrics.SLOW_QUERY_MS:.0f} ms)")
+            st.dataframe(slow, hide_index=True, use_container_width=True)
+
+
+def render_profile_panel():
+    """Tijd per render_*-functie en downloads van de laatste profielen van deze sessie."""
+    profiles = list(st.session_state.get("profiles", []))
+    with st.sidebar.expander("⏱️ Profielen", expanded=False):
+        if not profiles:
+            st.caption("Nog geen profielen.")
+            return
+        latest = profiles[0]
+        st.metric("Laatste rerun", f"{latest['wall_ms']:.0f} ms")
+        if latest["render_ms"]:
+            st.dataframe(
+                [{"functie": k, "ms": v} for k, v in latest["render_ms"].items()],
+                hide_index=True,
+                use_container_width=True,
+            )
+        for p in profiles:
+            st.download_button(
+                f"#{p['id']} · {p['mode']} · {p['wall_ms']:.0f} ms",
+                data=p["data"],
+                file_name=p["filename"],
+                mime="application/octet-stream",
+                key=f"profile_download_{p['id']}",
+            )
+
 # =============================
 # Login / registratie
 # =============================
@@ -331,6 +440,7 @@ if not company_id:
 
 company_name = get_company_name_by_id(company_id)
 company_logo = get_company_logo(company_id)
+company_logo_bytes = read_logo_bytes(company_logo, "header")
 company_slug = get_company_slug(company_id)
 BASE_DOMAIN = os.getenv("BASE_DOMAIN", "dor-booking.com")
 
@@ -339,11 +449,11 @@ BASE_DOMAIN = os.getenv("BASE_DOMAIN", "dor-booking.com")
 # =============================
 st.caption("Powered by D’or Booking System")
 
-if company_logo:
-    # Logo mooi centreren als het pad geldig is
+if company_logo_bytes:
+    # Logo mooi centreren (verkleinde variant uit de geheugencache)
     left, center, right = st.columns([1, 2, 1])
     with center:
-        st.image(company_logo, use_column_width=False)
+        st.image(company_logo_bytes, use_column_width=False)
 else:
     # Fallback icoon als er nog geen logo is
     st.markdown(
@@ -363,6 +473,23 @@ if company_slug:
         "Jouw publieke boekingslink: "
         f"`https://{company_slug}.{BASE_DOMAIN}`"
     )
+    with st.expander("QR-code voor je boekingslink"):
+        qr_col, dl_col = st.columns([1, 2])
+        qr_col.image(get_company_qr(company_slug, "png", 300), width=160)
+        dl_col.download_button(
+            "Download PNG (print)",
+            data=get_company_qr(company_slug, "png", 1200),
+            file_name=f"qr_{company_slug}.png",
+            mime="image/png",
+            key="qr_download_png",
+        )
+        dl_col.download_button(
+            "Download SVG",
+            data=get_company_qr(company_slug, "svg"),
+            file_name=f"qr_{company_slug}.svg",
+            mime="image/svg+xml",
+            key="qr_download_svg",
+        )
 
 # =============================
 # Sidebar navigatie
@@ -392,29 +519,31 @@ if not view_mode:
 # Views
 # =============================
 
-def render_public_catalog(cid: int):
+def render_public_catalog(cid: int, service_id=None):
     st.markdown("### Diensten & tarieven")
-    df = get_public_services(cid)
-    if df.empty:
+    snapshot = get_catalog(cid)
+    if snapshot is None or not snapshot.data["categories"]:
         _info("Er zijn nog geen gepubliceerde diensten.")
         return
 
-    if "category" in df.columns:
-        for cat, grp in df.groupby("category"):
-            label = str(cat) if str(cat).strip() else "Overige diensten"
-            with st.expander(label, expanded=True):
-                for _, r in grp.iterrows():
-                    st.markdown(
-                        f"**{r['name']}** — {_format_money(r['price'])} • {int(r['duration'])} min"
-                    )
-                    if r.get("description"):
-                        st.caption(str(r["description"]))
-                    st.divider()
-    else:
-        tmp = df.copy()
-        if "price" in tmp.columns:
-            tmp["price"] = tmp["price"].map(_format_money)
-        st.table(tmp)
+    # deep link van een dienst-QR-code: die dienst bovenaan, alleen zijn
+    # categorie opengeklapt
+    chosen = find_service(snapshot.data, service_id)
+    if chosen:
+        s = chosen[1]
+        st.success(f"**{s['name']}** — {s['price_label']} • {s['duration']} min")
+        if s["description"]:
+            st.caption(s["description"])
+
+    for cat in snapshot.data["categories"]:
+        with st.expander(cat["name"], expanded=chosen is None or cat is chosen[0]):
+            for s in cat["services"]:
+                st.markdown(
+                    f"**{s['name']}** — {s['price_label']} • {s['duration']} min"
+                )
+                if s["description"]:
+                    st.caption(s["description"])
+                st.divider()
 
 
 def render_services(cid: int):
@@ -432,6 +561,13 @@ def render_services(cid: int):
             "Categorie",
             ["(geen)"] + (list(cats["name"]) if not cats.empty else []),
         )
+        col1, col2, col3 = st.columns(3)
+        buffer_before = col1.number_input("Voorbereiding (min)", min_value=0, step=5)
+        buffer_after = col2.number_input("Opruimen (min)", min_value=0, step=5)
+        slot_step = col3.number_input(
+            "Starttijden elke (min)", min_value=0, step=5,
+            help="0 = automatisch, afgestemd op de duur",
+        )
         description = st.text_area("Beschrijving (optioneel)")
         publish = st.checkbox("Tonen in publieke catalogus", value=True)
 
@@ -448,10 +584,32 @@ def render_services(cid: int):
                     cat_val,
                     description,
                     is_active=publish,
+                    buffer_before=buffer_before,
+                    buffer_after=buffer_after,
+                    slot_step=slot_step or None,
                 )
                 _success("Dienst toegevoegd.")
                 st.rerun()
 
+    with st.expander("Diensten importeren (CSV)"):
+        st.caption(
+            "Kolommen: name, price, duration, category, description, is_active "
+            "(optioneel buffer_before, buffer_after, slot_step). "
+            "Alle regels worden in één keer opgeslagen."
+        )
+        uploaded = st.file_uploader(
+            "Diensten-CSV", type=["csv"], key="services_import"
+        )
+        if uploaded is not None and st.button(
+            "Importeren", type="primary", key="services_import_btn"
+        ):
+            rows, errors = read_services_csv(uploaded)
+            for line_no, msg in errors:
+                _error(f"Regel {line_no}: {msg}")
+            if rows:
+                ids = add_services_bulk(cid, rows)
+                _success(f"{len(ids)} diensten toegevoegd.")
+
     st.divider()
     st.markdown("#### Huidige diensten")
     if services.empty:
@@ -468,9 +626,62 @@ def render_services(cid: int):
         st.dataframe(df, use_container_width=True)
 
 
+RESOURCE_KIND_LABELS = {"staff": "Medewerker", "chair": "Stoel", "room": "Ruimte"}
+
+
+def render_resources(cid: int):
+    st.markdown("### Medewerkers & plaatsen")
+    st.caption(
+        "Elke medewerker, stoel of ruimte heeft een eigen agenda. Zonder "
+        "eigen tijdvakken gelden de openingsuren van de zaak."
+    )
+    cols = st.columns([2, 1, 1])
+    name = cols[0].text_input("Naam", key="resource_name")
+    kind = cols[1].selectbox(
+        "Soort",
+        list(RESOURCE_KIND_LABELS),
+        format_func=RESOURCE_KIND_LABELS.get,
+        key="resource_kind",
+    )
+    cols[2].write("")
+    if cols[2].button("Toevoegen", key="resource_add"):
+        if not name.strip():
+            _error("Geef een naam op.")
+        elif add_resource(cid, name, kind) > 0:
+            _success("Toegevoegd.")
+            st.rerun()
+        else:
+            _error("Deze naam bestaat al.")
+
+    df = get_resources(cid)
+    if df.empty:
+        _info("Nog geen medewerkers of plaatsen: er is één gezamenlijke agenda.")
+        return
+    for r in df.itertuples():
+        c1, c2 = st.columns([3, 1])
+        c1.markdown(f"**{r.name}** · {RESOURCE_KIND_LABELS.get(r.kind, r.kind)}")
+        active = c2.toggle("Actief", value=bool(r.is_active), key=f"resource_active_{r.id}")
+        if active != bool(r.is_active):
+            set_resource_active(r.id, active)
+            st.rerun()
+
+
 def render_availability(cid: int):
     st.markdown("## Beschikbaarheid")
 
+    render_resources(cid)
+    st.divider()
+
+    resources = list_resources(cid)
+    resource_names = {r.id: r.name for r in resources}
+    resource_id = None
+    if resources:
+        resource_id = st.selectbox(
+            "Geldt voor",
+            [None] + list(resource_names),
+            format_func=lambda rid: "Hele zaak" if rid is None else resource_names[rid],
+        )
+
     cols = st.columns(3)
     day = cols[0].selectbox(
         "Dag",
@@ -488,7 +699,7 @@ def render_availability(cid: int):
     end = cols[2].time_input("Eindtijd")
 
     if st.button("Tijdvak toevoegen", type="primary"):
-        add_availability(cid, day, start, end)
+        add_availability(cid, day, start, end, resource_id=resource_id)
         _success("Tijdvak toegevoegd.")
         st.rerun()
 
@@ -497,8 +708,84 @@ def render_availability(cid: int):
     if df.empty:
         _info("Nog geen beschikbaarheid ingesteld.")
     else:
+        names = {r.id: r.name for r in list_resources(cid, active_only=False)}
+        df["voor"] = df.pop("resource_id").map(names).fillna("Hele zaak")
         st.dataframe(df, use_container_width=True)
 
+    current_lead = get_company_min_lead(cid)
+    lead = st.number_input(
+        "Minimale voorlooptijd voor online boeken (minuten)",
+        min_value=0,
+        step=15,
+        value=current_lead,
+        help="Starttijden die vroeger vallen dan nu plus deze tijd worden niet aangeboden.",
+        key="min_lead",
+    )
+    if lead != current_lead:
+        set_company_min_lead(cid, int(lead))
+        _success("Voorlooptijd opgeslagen.")
+
+    st.divider()
+    render_availability_exceptions(cid, resource_names)
+
+
+def render_availability_exceptions(cid: int, resource_names: dict):
+    st.markdown("### Uitzonderingen & feestdagen")
+    st.caption(
+        "Sluitingsdagen, verlof of extra openingsuren op bepaalde data. "
+        "Ze gaan voor op het weekrooster hierboven."
+    )
+    cols = st.columns(2)
+    start_date = cols[0].date_input("Van", value=date.today(), key="exc_from")
+    end_date = cols[1].date_input("Tot en met", value=start_date, key="exc_to")
+
+    cols = st.columns(3)
+    kind = cols[0].radio(
+        "Soort",
+        ["closed", "open"],
+        format_func=lambda k: "Gesloten" if k == "closed" else "Extra open",
+        key="exc_kind",
+    )
+    whole_day = kind == "closed" and cols[0].checkbox("Hele dag", value=True, key="exc_whole_day")
+    start = end = None
+    if not whole_day:
+        start = cols[1].time_input("Van (uur)", value=dtime(9, 0), key="exc_start")
+        end = cols[2].time_input("Tot (uur)", value=dtime(17, 0), key="exc_end")
+
+    resource_id = None
+    if resource_names:
+        resource_id = st.selectbox(
+            "Geldt voor",
+            [None] + list(resource_names),
+            format_func=lambda rid: "Hele zaak" if rid is None else resource_names[rid],
+            key="exc_resource",
+        )
+    note = st.text_input("Notitie (bv. Kerstmis, verlof)", key="exc_note")
+
+    if st.button("Uitzondering toevoegen", type="primary", key="exc_add"):
+        if add_availability_exception(
+            cid, start_date, end_date, kind, start, end, resource_id=resource_id, note=note
+        ) > 0:
+            _success("Uitzondering toegevoegd.")
+            st.rerun()
+        else:
+            _error("Controleer de data en uren (einde moet na het begin liggen).")
+
+    upcoming = list_availability_exceptions(cid, from_date=date.today())
+    if not upcoming:
+        _info("Geen komende uitzonderingen.")
+        return
+    for e in upcoming:
+        period = e.start_date if e.start_date == e.end_date else f"{e.start_date} t/m {e.end_date}"
+        hours = f" {e.start_time}-{e.end_time}" if e.start_time else " (hele dag)"
+        who = resource_names.get(e.resource_id, "Hele zaak") if e.resource_id else "Hele zaak"
+        label = "Gesloten" if e.kind == "closed" else "Extra open"
+        c1, c2 = st.columns([4, 1])
+        c1.markdown(f"**{period}**{hours} · {label} · {who}" + (f" · {e.note}" if e.note else ""))
+        if c2.button("Verwijderen", key=f"exc_del_{e.id}"):
+            delete_availability_exception(cid, e.id)
+            st.rerun()
+
 
 def render_bookings(cid: int):
     st.markdown("## Boekingen")
@@ -513,12 +800,76 @@ def render_bookings(cid: int):
         st.markdown("### Status overzicht")
         st.dataframe(status_df, use_container_width=False)
 
+    st.markdown("### Zoeken")
+    render_search(cid)
+
     st.markdown("### Alle boekingen")
     df = get_bookings(cid)
     if df.empty:
         _info("Nog geen boekingen.")
     else:
         st.dataframe(df, use_container_width=True)
+        with st.expander("Notitie bij een boeking"):
+            cols = st.columns([1, 3])
+            booking_id = cols[0].number_input("Boeking (id)", min_value=1, step=1, key="notes_booking")
+            notes = cols[1].text_input("Notitie", key="notes_text")
+            if st.button("Notitie opslaan", key="notes_save"):
+                if set_booking_notes(cid, int(booking_id), notes):
+                    _success("Notitie opgeslagen; ze is nu doorzoekbaar.")
+                else:
+                    _error("Onbekende boeking.")
+
+    with st.expander("Importeren & exporteren"):
+        st.caption(
+            "CSV met kolommen booking_ref, customer, date (JJJJ-MM-DD), "
+            "start_time, end_time, status, service, price, duration. "
+            "Regels met dezelfde booking_ref vormen één afspraak."
+        )
+        uploaded = st.file_uploader(
+            "Boekingen importeren (CSV)", type=["csv"], key="bookings_import"
+        )
+        if uploaded is not None and st.button(
+            "Importeren", type="primary", key="bookings_import_btn"
+        ):
+            result = import_bookings_csv(cid, uploaded)
+            _success(
+                f"{result.bookings} boekingen en {result.items} diensten geïmporteerd."
+            )
+            for line_no, msg in result.errors:
+                _error(f"Regel {line_no}: {msg}")
+
+        # de export pas opbouwen als erom gevraagd wordt, niet bij elke rerun
+        exp_col1, exp_col2 = st.columns(2)
+        export_format = exp_col1.radio(
+            "Formaat", ["CSV", "Parquet"], horizontal=True, key="bookings_export_format"
+        )
+        if exp_col2.button("Export maken", key="bookings_export_btn"):
+            buf = io.BytesIO()
+            try:
+                if export_format == "CSV":
+                    text = io.TextIOWrapper(buf, encoding="utf-8", newline="")
+                    export_bookings_csv(cid, text)
+                    text.detach()  # flusht naar buf zonder buf te sluiten
+                else:
+                    export_bookings_parquet(cid, buf)
+                st.session_state["bookings_export"] = (cid, export_format, buf.getvalue())
+            except RuntimeError as e:
+                st.session_state.pop("bookings_export", None)
+                _error(str(e))
+
+        export = st.session_state.get("bookings_export")
+        if export and export[0] == cid:
+            _, fmt, data = export
+            st.download_button(
+                f"Download {fmt}",
+                data=data,
+                file_name=f"boekingen_{cid}.{fmt.lower()}",
+                mime="text/csv" if fmt == "CSV" else "application/octet-stream",
+                key="bookings_export_download",
+            )
+
+    with st.expander("Wachtlijst"):
+        render_waitlist(cid)
 
     # Extra: klantenanalyse
     cust = get_customer_stats(cid)
@@ -527,6 +878,132 @@ def render_bookings(cid: int):
             _info("Nog geen klantenstatistieken beschikbaar.")
         else:
             st.dataframe(cust, use_container_width=True)
+        render_customers(cid)
+
+
+_SEARCH_LABELS = {"customer": "Klant", "service": "Dienst", "booking": "Boeking"}
+
+
+def render_search(cid: int):
+    query = st.text_input(
+        "Zoek klant, dienst of notitie",
+        key="search_q",
+        placeholder="naam, telefoon, e-mail, dienst of notitie",
+    )
+    if st.session_state.get("search_last") != query:
+        st.session_state["search_last"] = query
+        st.session_state["search_pages"] = 1
+    if not query.strip():
+        return
+
+    result = search(cid, query, limit=SEARCH_PAGE_SIZE * st.session_state["search_pages"])
+    if not result.hits:
+        _info("Niets gevonden.")
+    for hit in result.hits:
+        detail = f" · {hit.detail} (#{hit.ref_id})" if hit.detail else ""
+        line = f"{_SEARCH_LABELS[hit.kind]}: {hit.title}{detail}"
+        st.markdown(f"{line}  \n{hit.snippet}" if hit.snippet else line)
+    if result.has_more and st.button("Meer resultaten", key="search_more"):
+        st.session_state["search_pages"] += 1
+        st.rerun()
+
+
+def render_customers(cid: int):
+    if st.button("Dubbele klantnamen samenvoegen", key="cust_backfill"):
+        linked = backfill_customers(cid)
+        _success(f"{linked} boekingen aan een klant gekoppeld.")
+        st.rerun()
+
+    customers = {cu.id: cu for cu in list_customers(cid)}
+    if not customers:
+        return
+    picked = st.selectbox(
+        "Klant",
+        list(customers),
+        format_func=lambda i: f"{customers[i].name} ({customers[i].bookings} boekingen)",
+        key="cust_pick",
+    )
+    cu = customers[picked]
+    cols = st.columns(2)
+    phone = cols[0].text_input("Telefoon", value=cu.phone or "", key=f"cust_phone_{cu.id}")
+    email = cols[1].text_input("E-mail", value=cu.email or "", key=f"cust_email_{cu.id}")
+    st.caption("Met een telefoonnummer herkent de AI-telefoniste de klant als die belt.")
+    if st.button("Klant opslaan", key="cust_save"):
+        if update_customer(cid, cu.id, phone=phone, email=email):
+            _success("Klant bijgewerkt.")
+            st.rerun()
+        else:
+            _error("Ongeldig nummer of e-mailadres, of het hoort al bij een andere klant.")
+
+    history = get_customer_history(cid, cu.id)
+    if history:
+        st.dataframe(
+            [{"datum": b.date, "van": b.start_time, "tot": b.end_time,
+              "prijs": b.total_price, "status": b.status} for b in history],
+            use_container_width=True,
+        )
+
+
+def render_waitlist(cid: int):
+    st.caption(
+        "Klanten die op een volle periode wachten. Wordt een afspraak "
+        "geannuleerd, dan krijgen de eerste wachtenden automatisch een "
+        "aanbod; wie eerst bevestigt, krijgt het tijdvak."
+    )
+    services = {s.id: s for s in list_services(cid, active_only=True)}
+    cols = st.columns(3)
+    customer = cols[0].text_input("Klant", key="wl_customer")
+    contact = cols[1].text_input("Telefoon of e-mail", key="wl_contact")
+    channel = cols[2].selectbox(
+        "Kanaal",
+        WAITLIST_CHANNELS,
+        format_func={"sms": "SMS", "whatsapp": "WhatsApp", "email": "E-mail"}.get,
+        key="wl_channel",
+    )
+    chosen = st.multiselect(
+        "Diensten",
+        list(services),
+        format_func=lambda sid: f"{services[sid].name} ({services[sid].duration} min)",
+        key="wl_services",
+    )
+    cols = st.columns(4)
+    from_date = cols[0].date_input("Van", value=date.today(), key="wl_from")
+    to_date = cols[1].date_input("Tot en met", value=from_date, key="wl_to")
+    earliest = cols[2].time_input("Niet voor", value=None, key="wl_earliest")
+    latest = cols[3].time_input("Klaar voor", value=None, key="wl_latest")
+
+    if st.button("Op wachtlijst zetten", type="primary", key="wl_add"):
+        items = [
+            {"service_id": sid, "name": services[sid].name,
+             "price": services[sid].price, "duration": services[sid].duration}
+            for sid in chosen
+        ]
+        if add_to_waitlist(
+            cid, customer, contact, channel, items, from_date, to_date,
+            earliest.strftime("%H:%M") if earliest else None,
+            latest.strftime("%H:%M") if latest else None,
+        ) > 0:
+            _success("Klant staat op de wachtlijst.")
+            st.rerun()
+        else:
+            _error("Vul klant, contact en diensten in; de periode mag hoogstens twee maanden zijn.")
+
+    entries = list_waitlist(cid)
+    if not entries:
+        _info("Niemand op de wachtlijst.")
+        return
+    for e in entries:
+        period = e.from_date if e.from_date == e.to_date else f"{e.from_date} t/m {e.to_date}"
+        hours = ""
+        if e.earliest_min is not None or e.latest_min is not None:
+            hours = f" · {to_hhmm(e.earliest_min or 0)}-{to_hhmm(e.latest_min or 1440)}"
+        state = " · aanbod verstuurd" if e.status == "offered" else ""
+        c1, c2 = st.columns([4, 1])
+        c1.markdown(f"**{e.customer}** ({e.contact}) · {period}{hours} · {e.duration} min{state}")
+        if c2.button("Verwijderen", key=f"wl_del_{e.id}"):
+            remove_from_waitlist(cid, e.id)
+            st.rerun()
+
 
 def render_reminders(cid: int):
     st.markdown("## Herinneringen & meldingen")
@@ -1113,6 +1590,14 @@ def render_account(cid: int):
     st.markdown(
         f"Status abonnement: {'✅ Actief' if paid else '⏸️ Nog niet geactiveerd (D’or Basic)'}"
     )
+    subscription = get_company_subscription(cid)
+    if subscription and subscription["current_period_end"]:
+        period_end = datetime.fromtimestamp(subscription["current_period_end"])
+        st.caption(
+            f"Stripe-abonnement: {subscription['status']} · "
+            f"{'loopt af' if subscription['cancel_at_period_end'] else 'verlengt'} "
+            f"op {period_end:%d-%m-%Y}"
+        )
     if not paid and st.button("Markeer als actief (admin)", key="activate_account_btn"):
         activate_company(cid)
         _success("Account gemarkeerd als actief.")
@@ -1139,18 +1624,22 @@ def render_account(cid: int):
         "Upload logo (PNG/JPG)", type=["png", "jpg", "jpeg"], key="logo_uploader"
     )
     if uploaded_logo is not None:
-        os.makedirs("data/logos", exist_ok=True)
-        ext = os.path.splitext(uploaded_logo.name)[1].lower() or ".png"
-        logo_path = f"data/logos/company_{cid}{ext}"
-        with open(logo_path, "wb") as f:
-            f.write(uploaded_logo.getbuffer())
-        if set_company_logo(cid, logo_path):
-            _success("Logo opgeslagen.")
-            st.rerun()
+        try:
+            variants = process_logo(uploaded_logo.getvalue())
+        except ValueError as e:
+            _error(str(e))
         else:
-            _error("Kon logo niet opslaan.")
+            if variants["header"] == company_logo:
+                _info("Dit logo is al ingesteld.")
+            elif set_company_logo(cid, variants["header"]):
+                _success("Logo opgeslagen.")
+                st.rerun()
+            else:
+                _error("Kon logo niet opslaan.")
     elif company_logo:
-        st.image(company_logo, caption="Huidig logo", width=160)
+        preview = read_logo_bytes(company_logo, "catalog")
+        if preview:
+            st.image(preview, caption="Huidig logo", width=160)
 
     st.divider()
     if st.button("Uitloggen", key="logout_btn_bottom"):
@@ -1164,7 +1653,7 @@ def render_account(cid: int):
 
 if view_mode == "public":
     # Publieke boekingspagina voor klanten
-    render_public_catalog(company_id)
+    render_public_catalog(company_id, _query_value("service"))
 else:
     # Beheeromgeving tabs
     tabs = st.tabs(
@@ -1209,3 +1698,12 @@ else:
 
     with tab_account:
         render_account(company_id)
+
+profile = profiling.finish_rerun()
+if profile:
+    # per sessie bewaren: andere bezoekers zien deze profielen niet
+    st.session_state.setdefault("profiles", deque(maxlen=profiling.PROFILE_HISTORY)).appendleft(profile)
+if PROFILE_MODE:
+    render_profile_panel()
+if _db_debug_enabled():
+    render_db_debug_panel()
@@ -0,0 +1,9 @@
+"""
+Benchmarks voor database.py.
+
+    python -m benchmarks.run --companies 200 --bookings 500 --out bench.json
+
+datagen.py vult een kras-database met synthetische salons; run.py meet
+daarop elke publieke databasefunctie en schrijft de resultaten als JSON,
+zodat runs tussen commits te vergelijken zijn (zie benchmarks.compare).
+"""
@@ -0,0 +1,107 @@
+"""
+Dubbele boekingen bewaken: veel klanten boeken tegelijk hetzelfde slot.
+
+    python -m benchmarks.booking_race [--threads 16] [--rounds 5] [--db pad]
+
+Maakt een kleine kras-database (één bedrijf, zie datagen), laat per
+ronde `threads` threads tegelijk (achter een barrier) hetzelfde slot
+boeken via add_booking_with_items en telt de geslaagde boekingen.
+Eindigt met exitcode 1 als er in een ronde niet precies één boeking
+doorkomt, zodat het ook in CI kan draaien.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+
+import db_core
+from benchmarks.datagen import Scale, generate
+
+SLOT_START = "10:00"  # binnen de ochtenduren van datagen.WEEK_TEMPLATE
+
+
+def _race_days(rounds: int) -> List[str]:
+    """Eén open dag per ronde (zondag is gesloten), ver genoeg vooruit."""
+    days = []
+    day = date.today() + timedelta(days=30)
+    while len(days) < rounds:
+        if day.weekday() != 6:
+            days.append(day.isoformat())
+        day += timedelta(days=1)
+    return days
+
+
+def race(company_id: int, service_id: int, day: str, threads: int) -> dict:
+    results = []
+    barrier = threading.Barrier(threads)
+    items = [{"service_id": service_id, "name": "Race", "price": 25.0, "duration": 30}]
+
+    def worker(i: int):
+        barrier.wait()
+        try:
+            results.append(db_core.add_booking_with_items(company_id, f"Race {i}", day, SLOT_START, items))
+        except Exception as e:  # een fout telt als verloren, niet als gewonnen
+            results.append(e)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "day": day,
+        "total_ms": round(elapsed * 1000, 1),
+        "booked": sum(1 for r in results if isinstance(r, int) and r > 0),
+        "conflicts": sum(1 for r in results if isinstance(r, db_core.BookingConflict)),
+        "errors": [str(r) for r in results if isinstance(r, Exception)],
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Controleer dat één slot maar één keer geboekt wordt.")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--db", help="kras-database (standaard: tijdelijke map)")
+    args = parser.parse_args(argv)
+
+    tmp_dir: Optional[str] = None
+    db_path = args.db
+    if not db_path:
+        tmp_dir = tempfile.mkdtemp(prefix="booking_race_")
+        db_path = os.path.join(tmp_dir, "race.db")
+    try:
+        generate(db_path, Scale(companies=1, services_per_company=1, bookings_per_company=0))
+        conn = db_core.get_connection()
+        try:
+            service_id = int(conn.execute("SELECT id FROM services WHERE company_id=1").fetchone()["id"])
+        finally:
+            conn.close()
+
+        failed = False
+        for day in _race_days(args.rounds):
+            result = race(1, service_id, day, args.threads)
+            ok = result["booked"] == 1
+            failed |= not ok
+            extra = f" fouten: {result['errors'][0]}" if result["errors"] else ""
+            print(
+                f"{'✅' if ok else '❌'} {day}: {result['booked']} geboekt, "
+                f"{result['conflicts']} conflicten van {args.threads} ({result['total_ms']:.1f} ms){extra}"
+            )
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
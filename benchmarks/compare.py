@@ -0,0 +1,51 @@
+"""
+Vergelijk twee benchmarkruns (JSON van benchmarks.run).
+
+    python -m benchmarks.compare oud.json nieuw.json [--threshold 10]
+
+Toont per functie de mediaan van beide runs en de relatieve wijziging;
+wijzigingen boven de drempel (in %) worden gemarkeerd.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from typing import List, Tuple
+
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(old: dict, new: dict, threshold: float = 10.0) -> List[Tuple[str, float, float, float, str]]:
+    """Retourneert (naam, oud_ms, nieuw_ms, wijziging_%, markering) per gedeelde functie."""
+    rows = []
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        before = old["results"][name]["median_ms"]
+        after = new["results"][name]["median_ms"]
+        change = (after - before) / before * 100 if before else 0.0
+        mark = ""
+        if change <= -threshold:
+            mark = "sneller"
+        elif change >= threshold:
+            mark = "TRAGER"
+        rows.append((name, before, after, change, mark))
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Vergelijk twee benchmarkruns.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="markeer vanaf deze %% wijziging")
+    args = parser.parse_args(argv)
+
+    old, new = _load(args.old), _load(args.new)
+    print(f"{old.get('commit') or '?'} -> {new.get('commit') or '?'} (mediaan, ms)")
+    for name, before, after, change, mark in compare(old, new, args.threshold):
+        print(f"{name:<36} {before:>10.3f} {after:>10.3f} {change:>+8.1f}%  {mark}")
+
+
+if __name__ == "__main__":
+    main()
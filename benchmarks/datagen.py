@@ -0,0 +1,267 @@
+"""
+Synthetische multi-tenant data voor benchmarks.
+
+Vult een (kras-)SQLite-bestand met bedrijven, diensten, wekelijkse
+beschikbaarheid, boekingen met items, herinneringsinstellingen en
+berichtbundels. Alles gaat via executemany in grote transacties, zodat
+ook miljoenen boekingen binnen redelijke tijd staan.
+"""
+from __future__ import annotations
+
+import os
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Tuple
+
+import db_core
+
+CATEGORIES = ["Knippen", "Kleuren", "Styling", "Nagels", "Gezicht", ""]
+SERVICE_NAMES = [
+    "Knippen dames", "Knippen heren", "Kinderknipbeurt", "Wassen & föhnen",
+    "Uitgroei kleuren", "Highlights", "Balayage", "Permanent", "Opsteken",
+    "Baard trimmen", "Manicure", "Pedicure", "Gellak", "Gezichtsbehandeling",
+    "Wenkbrauwen", "Wimperlifting", "Massage 30 min", "Massage 60 min",
+]
+FIRST_NAMES = [
+    "Anna", "Bram", "Chloé", "Daan", "Emma", "Finn", "Gitte", "Hugo", "Ines",
+    "Jens", "Kim", "Lotte", "Milan", "Noor", "Olivier", "Pien", "Ruben", "Sara",
+]
+LAST_NAMES = [
+    "Peeters", "Janssens", "de Vries", "Maes", "Jacobs", "Bakker", "Mertens",
+    "Visser", "Willems", "Smit", "Claes", "Meijer", "Goossens", "de Boer",
+]
+# (dag, start, eind) – typische salon met middagpauze, zondag gesloten
+WEEK_TEMPLATE = [
+    (day, start, end)
+    for day in ["Maandag", "Dinsdag", "Woensdag", "Donderdag", "Vrijdag", "Zaterdag"]
+    for start, end in [("09:00", "12:30"), ("13:30", "18:00")]
+]
+STATUSES = ["completed"] * 6 + ["scheduled"] * 2 + ["cancelled", "no_show"]
+BATCH_SIZE = 20_000
+
+
+@dataclass
+class Scale:
+    companies: int = 100
+    services_per_company: int = 15
+    bookings_per_company: int = 500
+    resources_per_company: int = 0
+    closures_per_company: int = 0  # sluitingsdagen rond vandaag
+    days: int = 365
+    seed: int = 42
+
+
+def _minutes(hhmm: str) -> int:
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _bookings_for_company(
+    rng: random.Random,
+    company_id: int,
+    services: List[Tuple[int, str, float, int]],
+    scale: Scale,
+    first_day: date,
+) -> Iterator[Tuple[tuple, List[tuple]]]:
+    customers = [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        for _ in range(max(5, scale.bookings_per_company // 5))
+    ]
+    created_at = datetime.utcnow().isoformat()
+    for _ in range(scale.bookings_per_company):
+        day = first_day + timedelta(days=rng.randrange(scale.days))
+        if day.weekday() == 6:
+            day -= timedelta(days=1)
+        picked = rng.sample(services, k=1 if rng.random() < 0.7 else 2)
+        total = sum(s[3] for s in picked)
+        _, start, end = rng.choice(WEEK_TEMPLATE[:2])
+        latest = _minutes(end) - total
+        start_m = _minutes(start) + 15 * rng.randrange(
+            max(1, (latest - _minutes(start)) // 15 + 1)
+        )
+        booking = (
+            company_id,
+            rng.choice(customers),
+            day.isoformat(),
+            _hhmm(start_m),
+            _hhmm(start_m + total),
+            round(sum(s[2] for s in picked), 2),
+            rng.choice(STATUSES),
+            created_at,
+            (day - date(1970, 1, 1)).days,
+            start_m,
+            start_m + total,
+        )
+        items = [(s[0], s[1], s[2], s[3]) for s in picked]
+        yield booking, items
+
+
+def generate(db_path: str, scale: Scale) -> dict:
+    """
+    Maak een nieuwe database op `db_path` met data volgens `scale`.
+    Retourneert een samenvatting (aantallen + gebruikte schaal).
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    db_core.DB_NAME = db_path
+    db_core.init_db()
+
+    rng = random.Random(scale.seed)
+    first_day = date.today() - timedelta(days=scale.days - 30)
+    created_at = datetime.utcnow().isoformat()
+
+    conn = db_core.get_connection()
+    c = conn.cursor()
+    c.execute("PRAGMA synchronous = OFF;")
+    c.execute("BEGIN")
+
+    c.executemany(
+        """
+        INSERT INTO companies (id, name, email, password, paid, created_at, slug, ai_phone_number)
+        VALUES (?,?,?,?,?,?,?,?)
+        """,
+        [
+            (
+                cid,
+                f"Salon {cid}",
+                f"salon{cid}@example.com",
+                "bench",
+                cid % 2,
+                created_at,
+                f"salon-{cid}",
+                f"+32 2 {cid:07d}",
+            )
+            for cid in range(1, scale.companies + 1)
+        ],
+    )
+    c.executemany(
+        "INSERT INTO message_balances (company_id, whatsapp_credits, sms_credits) VALUES (?,?,?)",
+        [(cid, 10**9, 10**9) for cid in range(1, scale.companies + 1)],
+    )
+    c.executemany(
+        "INSERT INTO reminder_settings (company_id, active, rem1_email) VALUES (?,?,?)",
+        [(cid, 1, 1) for cid in range(1, scale.companies + 1, 2)],
+    )
+    c.executemany(
+        """
+        INSERT INTO availability (company_id, day, start_time, end_time, weekday, start_min, end_min)
+        VALUES (?,?,?,?,?,?,?)
+        """,
+        [
+            (cid, day, start, end, i // 2, _minutes(start), _minutes(end))
+            for cid in range(1, scale.companies + 1)
+            for i, (day, start, end) in enumerate(WEEK_TEMPLATE)
+        ],
+    )
+
+    c.executemany(
+        "INSERT INTO resources (company_id, name, kind, sort_order) VALUES (?,?,?,?)",
+        [
+            (cid, f"Medewerker {i}", "staff", i)
+            for cid in range(1, scale.companies + 1)
+            for i in range(1, scale.resources_per_company + 1)
+        ],
+    )
+
+    service_id = 0
+    services_by_company = {}
+    service_rows = []
+    category_rows = set()
+    for cid in range(1, scale.companies + 1):
+        services = []
+        for name in rng.sample(SERVICE_NAMES, k=min(scale.services_per_company, len(SERVICE_NAMES))):
+            service_id += 1
+            price = float(rng.choice([15, 20, 25, 35, 45, 60, 85]))
+            duration = rng.choice([15, 30, 45, 60, 90])
+            category = rng.choice(CATEGORIES)
+            service_rows.append(
+                (service_id, cid, name, price, duration, category or None, "", 1 if rng.random() < 0.9 else 0)
+            )
+            if category:
+                category_rows.add((cid, category))
+            services.append((service_id, name, price, duration))
+        services_by_company[cid] = services
+    c.executemany(
+        """
+        INSERT INTO services (id, company_id, name, price, duration, category, description, is_active)
+        VALUES (?,?,?,?,?,?,?,?)
+        """,
+        service_rows,
+    )
+    c.executemany(
+        "INSERT INTO categories (company_id, name) VALUES (?,?)", sorted(category_rows)
+    )
+
+    booking_id = 0
+    n_items = 0
+    bookings: List[tuple] = []
+    items: List[tuple] = []
+
+    def flush():
+        c.executemany(
+            """
+            INSERT INTO bookings (
+                id, company_id, customer, date, start_time, end_time,
+                total_price, status, created_at, day_num, start_min, end_min
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            bookings,
+        )
+        c.executemany(
+            """
+            INSERT INTO booking_items (booking_id, service_id, name, price, duration)
+            VALUES (?,?,?,?,?)
+            """,
+            items,
+        )
+        bookings.clear()
+        items.clear()
+
+    for cid in range(1, scale.companies + 1):
+        for booking, booking_items in _bookings_for_company(
+            rng, cid, services_by_company[cid], scale, first_day
+        ):
+            booking_id += 1
+            bookings.append((booking_id,) + booking)
+            items.extend((booking_id,) + it for it in booking_items)
+            n_items += len(booking_items)
+            if len(bookings) >= BATCH_SIZE:
+                flush()
+    flush()
+
+    # na de boekingen, zodat dezelfde seed dezelfde boekingen blijft geven
+    c.executemany(
+        """
+        INSERT INTO availability_exceptions (company_id, start_date, end_date, kind, note)
+        VALUES (?,?,?,'closed',?)
+        """,
+        [
+            (cid, day.isoformat(), day.isoformat(), "Bench")
+            for cid in range(1, scale.companies + 1)
+            for day in (
+                date.today() + timedelta(days=rng.randint(-30, 30))
+                for _ in range(scale.closures_per_company)
+            )
+        ],
+    )
+
+    conn.commit()
+    c.execute("ANALYZE")
+    conn.close()
+
+    return {
+        "scale": asdict(scale),
+        "companies": scale.companies,
+        "services": service_id,
+        "bookings": booking_id,
+        "booking_items": n_items,
+    }
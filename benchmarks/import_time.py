@@ -0,0 +1,73 @@
+"""
+Importtijd van de entrypoints zonder UI bewaken.
+
+    python -m benchmarks.import_time [--budget-ms 150] [--repeat 5]
+
+Importeert elk module uit IMPORT_BUDGETS in een vers Python-proces, meet
+de mediane importtijd en controleert dat pandas en streamlit niet
+meekomen. Eindigt met exitcode 1 als een budget of verbod wordt
+overschreden, zodat het ook in CI kan draaien.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# module -> budget in ms (bovenop de opstart van de interpreter zelf)
+IMPORT_BUDGETS: Dict[str, float] = {
+    "db_core": 60.0,
+    "catalog": 80.0,
+    "voice_backend.voice_engine": 80.0,
+}
+FORBIDDEN_MODULES = ("pandas", "numpy", "streamlit")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({{"ms": ms, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int = 5) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    samples: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        out = subprocess.check_output(
+            [sys.executable, "-c", _PROBE.format(module=module, forbidden=FORBIDDEN_MODULES)],
+            env=env,
+            text=True,
+        )
+        result = json.loads(out.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        loaded = result["loaded"]
+    return {"median_ms": round(statistics.median(samples), 1), "forbidden_loaded": loaded}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Controleer importtijden van de kernmodules.")
+    parser.add_argument("--budget-ms", type=float, help="één budget voor alle modules")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module, budget in IMPORT_BUDGETS.items():
+        budget = args.budget_ms or budget
+        result = measure(module, args.repeat)
+        ok = result["median_ms"] <= budget and not result["forbidden_loaded"]
+        failed |= not ok
+        extra = f" laadt {', '.join(result['forbidden_loaded'])}" if result["forbidden_loaded"] else ""
+        print(f"{'✅' if ok else '❌'} {module:<28} {result['median_ms']:>7.1f} ms (budget {budget:.0f}){extra}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
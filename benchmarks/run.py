@@ -0,0 +1,566 @@
+"""
+Tijdmetingen voor de publieke functies van database.py.
+
+    python -m benchmarks.run --companies 200 --bookings 500 --out bench.json
+
+Genereert (of hergebruikt met --reuse) een kras-database, roept elke
+functie uit REGISTRY `--repeat` keer aan met willekeurige, maar
+reproduceerbare argumenten en schrijft min/mediaan/gemiddelde/p95 in
+milliseconden weg als JSON. Publieke functies die niet in REGISTRY staan
+komen onder "uncovered", zodat nieuwe functies niet ongemerkt ongemeten
+blijven.
+"""
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import database
+import db_core
+import search
+import slot_engine
+from benchmarks.datagen import FIRST_NAMES, LAST_NAMES, Scale, generate
+
+DEFAULT_DB = os.path.join("build", "bench.db")
+
+Args = Tuple[tuple, dict]
+
+
+class Context:
+    """Willekeurige maar reproduceerbare argumenten voor de benchmarks."""
+
+    def __init__(self, scale: Scale, seed: int):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.today = date.today()
+        self._counter = 0
+
+    def company(self) -> int:
+        return self.rng.randint(1, self.scale.companies)
+
+    def day(self) -> date:
+        return self.today + timedelta(days=self.rng.randint(-30, 30))
+
+    def unique(self) -> int:
+        self._counter += 1
+        return self._counter
+
+    def service(self, company_id: int) -> int:
+        # datagen nummert diensten per bedrijf aaneengesloten
+        n = min(self.scale.services_per_company, 18)
+        return (company_id - 1) * n + self.rng.randint(1, n)
+
+    def booking(self, company_id: int) -> int:
+        return (company_id - 1) * self.scale.bookings_per_company + self.rng.randint(
+            1, max(1, self.scale.bookings_per_company)
+        )
+
+
+def _cid(ctx: Context) -> Args:
+    return (ctx.company(),), {}
+
+
+def _slots(ctx: Context) -> Args:
+    return (ctx.company(), ctx.day(), ctx.rng.choice([15, 30, 60, 90])), {}
+
+
+def _service_slots(ctx: Context) -> Args:
+    cid = ctx.company()
+    return (cid, ctx.day(), [ctx.service(cid) for _ in range(ctx.rng.randint(1, 2))]), {}
+
+
+def _new_booking(ctx: Context) -> Args:
+    cid = ctx.company()
+    sid = ctx.service(cid)
+    start = f"{ctx.rng.randint(9, 17):02d}:{ctx.rng.choice(['00', '15', '30', '45'])}"
+    items = [{"service_id": sid, "name": "Bench", "price": 25.0, "duration": 30}]
+    return (cid, f"Bench {ctx.unique()}", ctx.day().isoformat(), start, items), {}
+
+
+def _new_service(ctx: Context) -> Args:
+    return (ctx.company(), f"Bench dienst {ctx.unique()}", 30.0, 45), {"category": "Bench"}
+
+
+def _bulk_services(ctx: Context) -> Args:
+    n = ctx.unique()
+    services = [
+        {"name": f"Bulk {n}-{i}", "price": 20.0, "duration": 30, "category": "Bench"}
+        for i in range(50)
+    ]
+    return (ctx.company(), services), {}
+
+
+def _reminders(ctx: Context) -> Args:
+    return (
+        ctx.company(), True, 1, "09:00", False, True, True, "sms", "wa", "mail",
+        60, False, True, False, "sms", "wa", "mail",
+    ), {}
+
+
+def _subscription(ctx: Context) -> Args:
+    cid = ctx.company()
+    sub = {
+        "id": f"sub_bench_{cid}",
+        "customer": f"cus_bench_{cid}",
+        "status": ctx.rng.choice(["active", "past_due", "canceled"]),
+        "current_period_end": int(time.time()) + 30 * 86400,
+        "metadata": {"company_id": cid},
+    }
+    return ([sub],), {}
+
+
+# naam -> bouwer van (args, kwargs)
+REGISTRY: Dict[str, Callable[[Context], Args]] = {
+    # bedrijven
+    "add_company": lambda ctx: (
+        (f"Bench {ctx.unique()}", f"bench{ctx.unique()}-{time.time_ns()}@example.com", "pw"), {}
+    ),
+    "get_company": _cid,
+    "get_company_by_ai_number": lambda ctx: ((f"+32 2 {ctx.company():07d}",), {}),
+    "get_company_by_email": lambda ctx: ((f"salon{ctx.company()}@example.com",), {}),
+    "get_company_by_slug": lambda ctx: ((f"salon-{ctx.company()}",), {}),
+    "get_company_slug": _cid,
+    "get_company_name_by_id": _cid,
+    "get_company_logo": _cid,
+    "set_company_logo": lambda ctx: ((ctx.company(), "data/logos/bench.png"), {}),
+    "get_company_min_lead": _cid,
+    "set_company_min_lead": lambda ctx: ((ctx.company(), 0), {}),
+    "update_company_profile": lambda ctx: (
+        (ctx.company(), f"Salon {ctx.unique()}", f"bench-{time.time_ns()}@example.com"), {}
+    ),
+    "get_company_ai_settings": _cid,
+    "update_company_ai_instructions": lambda ctx: ((ctx.company(), "Wees vriendelijk."), {}),
+    "set_company_ai_enabled": lambda ctx: ((ctx.company(), ctx.rng.random() < 0.5), {}),
+    "set_company_ai_phone_number": lambda ctx: ((ctx.company(), f"+32 3 {ctx.unique():07d}"), {}),
+    "update_company_ai_line": lambda ctx: ((ctx.company(), "local"), {}),
+    "update_company_ai_safeguards": lambda ctx: ((ctx.company(), 15, 20, True, False), {}),
+    "get_ai_local_minutes_balance": _cid,
+    "add_ai_local_minutes": lambda ctx: ((ctx.company(), 10), {}),
+    "is_company_paid": _cid,
+    "set_company_paid_override": lambda ctx: ((ctx.company(), ctx.rng.random() < 0.5), {}),
+    "get_company_id_by_stripe_customer": lambda ctx: ((f"cus_bench_{ctx.company()}",), {}),
+    "set_company_stripe_customer": lambda ctx: ((ctx.company(), f"cus_bench_{ctx.unique()}"), {}),
+    "upsert_subscriptions": _subscription,
+    "get_company_subscription": _cid,
+    "record_stripe_event": lambda ctx: ((f"evt_bench_{time.time_ns()}", "invoice.paid"), {}),
+    # catalogus
+    "get_categories": _cid,
+    "add_category": lambda ctx: ((ctx.company(), f"Bench {ctx.unique()}"), {}),
+    "upsert_category": lambda ctx: ((ctx.company(), "Knippen"), {}),
+    "get_services": _cid,
+    "list_services": _cid,
+    "get_public_services": _cid,
+    "add_service": _new_service,
+    "add_services_bulk": _bulk_services,
+    "update_service": lambda ctx: ((ctx.service(ctx.company()),), {"price": 30.0}),
+    "set_service_active": lambda ctx: ((ctx.service(ctx.company()), True), {}),
+    "get_catalog_version": _cid,
+    "list_catalog_versions": lambda ctx: ((), {}),
+    # agenda en boekingen
+    # altijd bedrijf 1, zodat de andere bedrijven hun agendamodel houden
+    "add_resource": lambda ctx: ((1, f"Bench {ctx.unique()}"), {}),
+    "get_resources": _cid,
+    "list_resources": _cid,
+    "set_resource_active": lambda ctx: ((ctx.rng.randint(1, max(1, ctx.scale.resources_per_company)), True), {}),
+    "get_availability": _cid,
+    "list_availability": _cid,
+    "add_availability": lambda ctx: ((ctx.company(), "Zondag", dtime(10, 0), dtime(12, 0)), {}),
+    "get_available_slots_for_duration": _slots,
+    "get_available_slots_for_services": _service_slots,
+    "add_availability_exception": lambda ctx: ((ctx.company(), ctx.day() + timedelta(days=400)), {}),
+    "list_availability_exceptions": _cid,
+    "delete_availability_exception": lambda ctx: ((ctx.company(), ctx.rng.randint(1, 1000)), {}),
+    "get_effective_schedule": lambda ctx: ((ctx.company(), ctx.day()), {}),
+    "search_free_slots": lambda ctx: ((ctx.day(), 45), {"from_time": dtime(12), "to_time": dtime(18)}),
+    "add_booking_with_items": _new_booking,
+    "add_booking_items": lambda ctx: (
+        (ctx.booking(ctx.company()), [{"name": "Extra", "price": 5.0, "duration": 15}]), {}
+    ),
+    "add_recurring_booking": lambda ctx: (
+        (ctx.company(), f"Vast {ctx.unique()}", ctx.day() + timedelta(days=60), "08:00",
+         [{"name": "Bench", "price": 25.0, "duration": 30}]),
+        {"interval_weeks": 4, "occurrences": 6},
+    ),
+    "list_recurring_bookings": _cid,
+    "stop_recurring_booking": lambda ctx: ((ctx.company(), ctx.rng.randint(1, 50)), {}),
+    "materialize_recurring_bookings": lambda ctx: ((), {}),
+    "get_bookings": _cid,
+    "list_bookings": _cid,
+    "get_bookings_overview": _cid,
+    "set_booking_notes": lambda ctx: (
+        (ctx.company(), ctx.booking(ctx.company()), f"Notitie {ctx.unique()}"), {}
+    ),
+    "update_booking_status": lambda ctx: (
+        (ctx.company(), ctx.booking(ctx.company()), "completed"), {}
+    ),
+    "get_status_overview": _cid,
+    "get_customer_stats": _cid,
+    # klanten
+    "backfill_customers": _cid,
+    "list_customers": _cid,
+    "find_customer_by_phone": lambda ctx: ((ctx.company(), f"0470 {ctx.rng.randint(0, 999999):06d}"), {}),
+    "get_customer_history": lambda ctx: ((ctx.company(), ctx.rng.randint(1, 1000)), {}),
+    "update_customer": lambda ctx: (
+        (ctx.company(), ctx.rng.randint(1, 1000)), {"email": f"bench{ctx.unique()}@example.com"}
+    ),
+    "merge_customers": lambda ctx: (
+        (ctx.company(), ctx.rng.randint(1, 1000), [ctx.rng.randint(1, 1000)]), {}
+    ),
+    # herinneringen en berichten
+    "get_reminder_settings": _cid,
+    "upsert_reminder_settings": _reminders,
+    "ensure_message_balance": _cid,
+    "get_message_balances": _cid,
+    "add_whatsapp_credits": lambda ctx: ((ctx.company(), 100), {}),
+    "add_sms_credits": lambda ctx: ((ctx.company(), 100), {}),
+    "add_email_limit": lambda ctx: ((ctx.company(), 100), {}),
+    "register_message_usage": lambda ctx: (
+        (ctx.company(), ctx.rng.choice(["sms", "whatsapp", "email"])), {}
+    ),
+    "get_message_usage_summary": _cid,
+    "list_queued_messages": lambda ctx: ((), {}),
+    "mark_message_sent": lambda ctx: ((ctx.rng.randint(1, 1000),), {}),
+}
+
+# bewust niet gemeten: schema, callbacks en verbindingen
+SKIPPED = {"init_db", "get_connection", "on_catalog_change", "activate_company",
+           "delete_service", "mark_stripe_event_processed"}
+
+
+def public_functions() -> List[str]:
+    return sorted(
+        name
+        for name, obj in vars(database).items()
+        if inspect.isfunction(obj)
+        and obj.__module__ in (database.__name__, db_core.__name__)
+        and not name.startswith("_")
+    )
+
+
+def _summary(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "n": len(samples),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p95_ms": round(p95 * 1000, 4),
+    }
+
+
+def time_function(name: str, builder: Callable[[Context], Args], ctx: Context, repeat: int) -> dict:
+    func = getattr(database, name)
+    samples = []
+    for _ in range(repeat):
+        args, kwargs = builder(ctx)
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+def concurrent_same_slot(ctx: Context, threads: int = 16) -> dict:
+    """
+    `threads` klanten boeken tegelijk hetzelfde slot. Meet de totale duur
+    en controleert dat er precies één boeking doorkomt.
+    """
+    cid = ctx.company()
+    day = (ctx.today + timedelta(days=400 + ctx.unique())).isoformat()
+    items = [{"service_id": ctx.service(cid), "name": "Race", "price": 25.0, "duration": 30}]
+    results = []
+    barrier = threading.Barrier(threads)
+
+    def worker(i: int):
+        barrier.wait()
+        results.append(database.add_booking_with_items(cid, f"Race {i}", day, "10:00", items))
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    booked = sum(1 for r in results if isinstance(r, int) and r > 0)
+    return {
+        "threads": threads,
+        "total_ms": round(elapsed * 1000, 4),
+        "booked": booked,
+        "conflicts": sum(1 for r in results if isinstance(r, database.BookingConflict)),
+        "ok": booked == 1,
+    }
+
+
+def waitlist_match(ctx: Context, entries: int = 5000, candidates: int = 3) -> dict:
+    """
+    Annulering met een lange wachtlijst: `entries` inschrijvingen op andere
+    data en `candidates` voor de geannuleerde dag. Meet de annulering
+    inclusief matchen en controleert dat precies de kandidaten een aanbod krijgen.
+    """
+    import waitlist
+
+    # aanbiedingen gaan alleen uit met een absolute link
+    os.environ.setdefault("APP_URL", "https://bench.invalid")
+    cid = ctx.company()
+    items = [{"name": "Wacht", "price": 25.0, "duration": 30}]
+    # eerste open dag ver vooruit, zodat het vrijgekomen tijdvak binnen de openingsuren valt
+    day = ctx.today + timedelta(days=400 + ctx.unique())
+    slots = database.get_available_slots_for_duration(cid, day, 30)
+    for _ in range(14):
+        if slots:
+            break
+        day += timedelta(days=1)
+        slots = database.get_available_slots_for_duration(cid, day, 30)
+    if not slots:
+        return {"ok": False}
+    booking = database.add_booking_with_items(cid, "Annuleert", day.isoformat(), slots[0], items)
+    if not isinstance(booking, int) or booking < 0:
+        return {"ok": False}
+    database.add_sms_credits(cid, candidates)
+
+    conn = db_core.get_connection()
+    rows = []
+    for i in range(entries):
+        start = day + timedelta(days=1 + i % 300)
+        rows.append((cid, f"Ander {i}", "+32470000000", "sms", "[]", 30, start.isoformat(), start.isoformat(),
+                     slot_engine.to_epoch_day(start), slot_engine.to_epoch_day(start)))
+    conn.executemany(
+        """
+        INSERT INTO waitlist (company_id, customer, contact, channel, items, duration,
+                              from_date, to_date, from_day, to_day)
+        VALUES (?,?,?,?,?,?,?,?,?,?)
+        """,
+        rows,
+    )
+    conn.commit()
+    conn.close()
+    for i in range(candidates):
+        waitlist.add_to_waitlist(cid, f"Kandidaat {i}", f"+3247000001{i}", "sms", items, day, day)
+
+    start = time.perf_counter()
+    database.update_booking_status(cid, booking, "cancelled")
+    elapsed = time.perf_counter() - start
+
+    conn = db_core.get_connection()
+    offers = conn.execute(
+        "SELECT COUNT(*) FROM waitlist_offers WHERE company_id=? AND day_num=?",
+        (cid, slot_engine.to_epoch_day(day)),
+    ).fetchone()[0]
+    conn.close()
+    return {
+        "entries": entries,
+        "total_ms": round(elapsed * 1000, 4),
+        "offers": offers,
+        "ok": offers == candidates,
+    }
+
+
+def customer_backfill(ctx: Context, per_variant: int = 5) -> dict:
+    """
+    Klantkoppeling na een migratie: elke naamcombinatie uit datagen in vier
+    schrijfwijzen (zoals ingegeven, kleine letters met spaties, "Achternaam,
+    Voornaam" en een tikfout), `per_variant` boekingen per schrijfwijze.
+    Meet backfill_customers en controleert dat er precies één klant per
+    combinatie ontstaat.
+    """
+    cid = database.add_company(f"Klanten {ctx.unique()}", f"klanten{ctx.unique()}@bench.local", "x")
+    rows = []
+    for first in FIRST_NAMES:
+        for last in LAST_NAMES:
+            mid = len(last) // 2
+            for name in (
+                f"{first} {last}",
+                f"  {first.lower()} {last.lower()} ",
+                f"{last}, {first}",
+                f"{first} {last[:mid]}{last[mid]}{last[mid:]}",
+            ):
+                for i in range(per_variant):
+                    rows.append((cid, name, f"2020-01-{1 + i:02d}", "10:00", "10:30", 25.0,
+                                 "completed", 18262 + i, 600, 630))
+    conn = db_core.get_connection()
+    conn.executemany(
+        """
+        INSERT INTO bookings (company_id, customer, date, start_time, end_time, total_price,
+                              status, day_num, start_min, end_min)
+        VALUES (?,?,?,?,?,?,?,?,?,?)
+        """,
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+    start = time.perf_counter()
+    linked = database.backfill_customers(cid)
+    elapsed = time.perf_counter() - start
+    customers = database.list_customers(cid)
+    return {
+        "bookings": len(rows),
+        "total_ms": round(elapsed * 1000, 4),
+        "customers": len(customers),
+        "ok": linked == len(rows) and len(customers) == len(FIRST_NAMES) * len(LAST_NAMES),
+    }
+
+
+def search_as_you_type(ctx: Context, bookings: int = 100_000, customers: int = 20_000) -> dict:
+    """
+    Zoeken bij een grote zaak: `bookings` boekingen van `customers` klanten,
+    een op tien met een notitie. Typt een klantnaam letter per letter en
+    een naam met een tikfout; meet elke zoekvraag (eerste pagina).
+    """
+    rng = random.Random(ctx.scale.seed)
+    syllables = ["an", "be", "ce", "de", "el", "fa", "go", "hi", "jo", "ka", "li", "ma",
+                 "no", "pe", "ro", "sa", "ti", "va", "wi", "ze"]
+
+    def word() -> str:
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+
+    cid = database.add_company(f"Groot {ctx.unique()}", f"groot{ctx.unique()}@bench.local", "x")
+    conn = db_core.get_connection()
+    conn.executemany(
+        "INSERT INTO customers (company_id, name, phone) VALUES (?,?,?)",
+        [(cid, f"{word()} {word()}", f"+32470{i:06d}") for i in range(customers)],
+    )
+    first_customer = conn.execute(
+        "SELECT MIN(id) FROM customers WHERE company_id=?", (cid,)
+    ).fetchone()[0]
+    rows = []
+    for i in range(bookings):
+        customer_id = first_customer + rng.randrange(customers)
+        day = 18262 + i // 20
+        rows.append((cid, customer_id, slot_engine.from_epoch_day(day).isoformat(), "10:00", "10:30",
+                     25.0, "completed", day, 600, 630,
+                     f"Notitie {word()} {word()}" if i % 10 == 0 else None))
+    conn.executemany(
+        """
+        INSERT INTO bookings (company_id, customer_id, date, start_time, end_time, total_price,
+                              status, day_num, start_min, end_min, notes)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?)
+        """,
+        rows,
+    )
+    conn.commit()
+    target = conn.execute("SELECT name FROM customers WHERE id=?", (first_customer,)).fetchone()[0]
+    conn.close()
+
+    queries = [target[:n] for n in range(1, len(target) + 1)]
+    queries.append(target[:-2] + target[-1] + target[-2])  # laatste twee letters omgewisseld
+    samples = []
+    found = False
+    for q in queries:
+        start = time.perf_counter()
+        result = search.search(cid, q)
+        samples.append(time.perf_counter() - start)
+        found = any(h.kind == "customer" and h.ref_id == first_customer for h in result.hits)
+    summary = _summary(samples)
+    return {
+        "bookings": bookings,
+        "queries": len(queries),
+        "median_ms": summary["median_ms"],
+        "max_ms": round(max(samples) * 1000, 4),
+        "ok": found,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(scale: Scale, db_path: str, repeat: int, reuse: bool, only: List[str] = None) -> dict:
+    if reuse and os.path.exists(db_path):
+        db_core.DB_NAME = db_path
+        db_core.init_db()
+        dataset = {"scale": scale.__dict__, "reused": True}
+    else:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        start = time.perf_counter()
+        dataset = generate(db_path, scale)
+        dataset["generate_s"] = round(time.perf_counter() - start, 2)
+
+    ctx = Context(scale, seed=scale.seed + 1)
+    results: Dict[str, dict] = {}
+    for name in sorted(REGISTRY):
+        if only and name not in only:
+            continue
+        results[name] = time_function(name, REGISTRY[name], ctx, repeat)
+        print(f"{name:<36} median {results[name]['median_ms']:>10.3f} ms")
+
+    scenarios = {}
+    if not only:
+        scenarios["concurrent_same_slot"] = concurrent_same_slot(ctx)
+        scenarios["waitlist_match"] = waitlist_match(ctx)
+        scenarios["customer_backfill"] = customer_backfill(ctx)
+        scenarios["search_as_you_type"] = search_as_you_type(ctx)
+
+    uncovered = [n for n in public_functions() if n not in REGISTRY and n not in SKIPPED]
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeat": repeat,
+        "dataset": dataset,
+        "results": results,
+        "scenarios": scenarios,
+        "uncovered": uncovered,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de functies van database.py.")
+    parser.add_argument("--companies", type=int, default=Scale.companies)
+    parser.add_argument("--services", type=int, default=Scale.services_per_company,
+                        help="diensten per bedrijf")
+    parser.add_argument("--bookings", type=int, default=Scale.bookings_per_company,
+                        help="boekingen per bedrijf")
+    parser.add_argument("--resources", type=int, default=Scale.resources_per_company,
+                        help="medewerkers per bedrijf (0 = één agenda)")
+    parser.add_argument("--closures", type=int, default=Scale.closures_per_company,
+                        help="sluitingsdagen per bedrijf")
+    parser.add_argument("--days", type=int, default=Scale.days)
+    parser.add_argument("--seed", type=int, default=Scale.seed)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--db", default=DEFAULT_DB, help="kras-database (standaard: %(default)s)")
+    parser.add_argument("--reuse", action="store_true", help="bestaande kras-database hergebruiken")
+    parser.add_argument("--only", action="append", help="alleen deze functie(s) meten")
+    parser.add_argument("--out", help="JSON-resultaat hierheen schrijven")
+    args = parser.parse_args(argv)
+
+    scale = Scale(
+        companies=args.companies,
+        services_per_company=args.services,
+        bookings_per_company=args.bookings,
+        resources_per_company=args.resources,
+        closures_per_company=args.closures,
+        days=args.days,
+        seed=args.seed,
+    )
+    report = run(scale, args.db, args.repeat, args.reuse, args.only)
+
+    if report["uncovered"]:
+        print("⚠️ Niet gemeten: " + ", ".join(report["uncovered"]))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"✅ Resultaten geschreven naar {args.out}.")
+
+
+if __name__ == "__main__":
+    main()
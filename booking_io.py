@@ -0,0 +1,423 @@
+"""
+Bulk import & export van boekingen.
+
+Bedoeld voor het overzetten van een salon uit een ander systeem: duizenden
+historische boekingen worden in blokken ingelezen, gevalideerd en per blok
+met executemany in één transactie weggeschreven. Export streamt per bedrijf
+naar CSV of Parquet zonder eerst een volledig DataFrame op te bouwen.
+
+CSV-formaat (één regel per dienst, kolomnamen in de eerste regel):
+
+    booking_ref, customer, date, start_time, end_time, status,
+    service_id, service, price, duration
+
+- Opeenvolgende regels met dezelfde `booking_ref` vormen één boeking.
+  Zonder `booking_ref` is elke regel een eigen boeking.
+- `date` als YYYY-MM-DD, tijden als HH:MM. Zonder `end_time` wordt de
+  eindtijd berekend uit de som van de duur.
+- Scheidingsteken `,` of `;` (Excel NL) wordt automatisch herkend;
+  prijzen mogen een decimale komma hebben.
+
+Diensten-CSV (catalogus-upload): name, price, duration, category,
+description, is_active en optioneel buffer_before, buffer_after en
+slot_step (minuten).
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+from datetime import datetime
+from itertools import groupby
+from typing import IO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import slot_engine
+from db_core import (
+    BOOKING_STATUSES,
+    HOLD_STATUSES,
+    _bump_slot_days,
+    _insert_booking_items,
+    _next_free_id,
+    backfill_customers,
+    get_connection,
+)
+
+IMPORT_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+
+EXPORT_COLUMNS = [
+    "booking_ref",
+    "customer",
+    "date",
+    "start_time",
+    "end_time",
+    "status",
+    "total_price",
+    "created_at",
+    "service_id",
+    "service",
+    "price",
+    "duration",
+]
+
+
+class ImportResult(NamedTuple):
+    bookings: int
+    items: int
+    errors: List[Tuple[int, str]]  # (regelnummer, melding)
+
+
+class _ParsedBooking(NamedTuple):
+    line_no: int
+    customer: str
+    date: str
+    start_time: str
+    end_time: str
+    start_min: int
+    end_min: int  # niet teruggerold: na middernacht > 1440
+    status: str
+    total_price: float
+    items: List[tuple]  # (service_id, name, price, duration)
+
+
+# =============================
+# IMPORT
+# =============================
+def _open_text(source: Union[str, os.PathLike, IO]) -> IO[str]:
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "r", encoding="utf-8-sig", newline="")
+    if isinstance(source, io.TextIOBase):
+        return source
+    # binaire stream (bv. Streamlit UploadedFile)
+    return io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+
+
+def _sniff_delimiter(stream: IO[str]) -> str:
+    header = stream.readline()
+    stream.seek(0)
+    return ";" if header.count(";") > header.count(",") else ","
+
+
+def _parse_float(value: Optional[str]) -> float:
+    value = (value or "").strip().replace("€", "").replace(",", ".")
+    return float(value) if value else 0.0
+
+
+def _parse_int(value: Optional[str]) -> int:
+    value = (value or "").strip()
+    return int(float(value.replace(",", "."))) if value else 0
+
+
+def _parse_hhmm(value: Optional[str]) -> str:
+    h, m = (value or "").strip().split(":")[:2]
+    h, m = int(h), int(m)
+    if not (0 <= h < 24 and 0 <= m < 60):
+        raise ValueError(f"ongeldige tijd '{value}'")
+    return f"{h:02d}:{m:02d}"
+
+
+def _group_rows(reader: csv.DictReader) -> Iterator[List[Tuple[int, dict]]]:
+    """Groepeer opeenvolgende regels met dezelfde booking_ref."""
+    numbered = ((reader.line_num, row) for row in reader)
+    for ref, grp in groupby(
+        numbered, key=lambda x: (x[1].get("booking_ref") or "").strip() or None
+    ):
+        grp = list(grp)
+        if ref is None:
+            # geen referentie -> elke regel is een losse boeking
+            for entry in grp:
+                yield [entry]
+        else:
+            yield grp
+
+
+def _parse_booking(rows: List[Tuple[int, dict]]) -> _ParsedBooking:
+    line_no, first = rows[0]
+
+    date_str = (first.get("date") or "").strip()
+    date_str = datetime.strptime(date_str, "%Y-%m-%d").date().isoformat()
+    start_time = _parse_hhmm(first.get("start_time"))
+
+    status = (first.get("status") or "scheduled").strip().lower()
+    if status not in BOOKING_STATUSES:
+        raise ValueError(f"onbekende status '{status}'")
+
+    items = []
+    for _, row in rows:
+        name = (row.get("service") or "").strip()
+        price = _parse_float(row.get("price"))
+        duration = _parse_int(row.get("duration"))
+        sid = (row.get("service_id") or "").strip()
+        if name or price or duration:
+            items.append((int(sid) if sid else None, name or None, price, duration))
+
+    start_min = slot_engine.to_minutes(start_time)
+    if (first.get("end_time") or "").strip():
+        end_time = _parse_hhmm(first.get("end_time"))
+        end_min = slot_engine.to_minutes(end_time)
+        if end_min < start_min:
+            end_min += 1440  # loopt over middernacht
+    else:
+        total_minutes = sum(it[3] for it in items)
+        if total_minutes <= 0:
+            raise ValueError("geen end_time en geen duur opgegeven")
+        end_min = start_min + total_minutes
+        end_time = slot_engine.to_hhmm(end_min % 1440)
+
+    return _ParsedBooking(
+        line_no=line_no,
+        customer=(first.get("customer") or "").strip(),
+        date=date_str,
+        start_time=start_time,
+        end_time=end_time,
+        start_min=start_min,
+        end_min=end_min,
+        status=status,
+        total_price=sum(it[2] for it in items),
+        items=items,
+    )
+
+
+def _insert_chunk(company_id: int, chunk: List[_ParsedBooking]) -> int:
+    """Schrijf één blok boekingen + items weg in één transactie."""
+    created_at = datetime.utcnow().isoformat()
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        first_id = _next_free_id(c, "bookings")
+
+        booking_rows = []
+        item_rows = []
+        for offset, b in enumerate(chunk):
+            bid = first_id + offset
+            booking_rows.append(
+                (
+                    bid,
+                    company_id,
+                    b.customer,
+                    b.date,
+                    b.start_time,
+                    b.end_time,
+                    b.total_price,
+                    b.status,
+                    created_at,
+                    slot_engine.to_epoch_day(b.date),
+                    b.start_min,
+                    b.end_min,
+                )
+            )
+            item_rows.extend((bid,) + it for it in b.items)
+
+        c.executemany(
+            """
+            INSERT INTO bookings (
+                id, company_id, customer, date, start_time, end_time,
+                total_price, status, created_at, day_num, start_min, end_min
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            booking_rows,
+        )
+        _insert_booking_items(c, item_rows)
+        _bump_slot_days(c, company_id, [row[9] for row in booking_rows])
+        conn.commit()
+        return len(item_rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def import_bookings_csv(
+    company_id: int,
+    source: Union[str, os.PathLike, IO],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportResult:
+    """
+    Importeer boekingen uit een CSV-bestand (pad of file-object).
+
+    Ongeldige boekingen worden overgeslagen en gemeld; geldige boekingen
+    worden per `chunk_size` in één transactie ingevoegd. Er wordt bewust
+    niet op overlap gecontroleerd: historische data wordt overgenomen zoals
+    het bronsysteem hem aanlevert. Daarna worden de klantnamen in één
+    keer aan klanten gekoppeld (backfill_customers).
+    """
+    stream = _open_text(source)
+    try:
+        reader = csv.DictReader(stream, delimiter=_sniff_delimiter(stream))
+        n_bookings = 0
+        n_items = 0
+        errors: List[Tuple[int, str]] = []
+        chunk: List[_ParsedBooking] = []
+
+        for rows in _group_rows(reader):
+            try:
+                chunk.append(_parse_booking(rows))
+            except (ValueError, TypeError) as e:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append((rows[0][0], str(e)))
+                continue
+
+            if len(chunk) >= chunk_size:
+                n_items += _insert_chunk(company_id, chunk)
+                n_bookings += len(chunk)
+                chunk = []
+
+        if chunk:
+            n_items += _insert_chunk(company_id, chunk)
+            n_bookings += len(chunk)
+
+        if n_bookings:
+            backfill_customers(company_id)
+        return ImportResult(n_bookings, n_items, errors)
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            stream.close()
+        elif stream is not source:
+            stream.detach()
+
+
+# =============================
+# SERVICES (catalogus-upload)
+# =============================
+_FALSE_VALUES = {"0", "nee", "no", "false", "onwaar"}
+
+
+def read_services_csv(
+    source: Union[str, os.PathLike, IO],
+) -> Tuple[List[dict], List[Tuple[int, str]]]:
+    """
+    Lees een diensten-CSV in als dicts voor add_services_bulk.
+    Retourneert (diensten, fouten) met fouten als (regelnummer, melding).
+    """
+    stream = _open_text(source)
+    try:
+        reader = csv.DictReader(stream, delimiter=_sniff_delimiter(stream))
+        services: List[dict] = []
+        errors: List[Tuple[int, str]] = []
+        for row in reader:
+            try:
+                name = (row.get("name") or "").strip()
+                if not name:
+                    raise ValueError("naam ontbreekt")
+                services.append(
+                    dict(
+                        name=name,
+                        price=_parse_float(row.get("price")),
+                        duration=_parse_int(row.get("duration")),
+                        category=(row.get("category") or "").strip() or None,
+                        description=(row.get("description") or "").strip(),
+                        is_active=(row.get("is_active") or "1").strip().lower()
+                        not in _FALSE_VALUES,
+                        buffer_before=_parse_int(row.get("buffer_before")),
+                        buffer_after=_parse_int(row.get("buffer_after")),
+                        slot_step=_parse_int(row.get("slot_step")) or None,
+                    )
+                )
+            except (ValueError, TypeError) as e:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append((reader.line_num, str(e)))
+        return services, errors
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            stream.close()
+        elif stream is not source:
+            stream.detach()
+
+
+# =============================
+# EXPORT
+# =============================
+def iter_booking_rows(
+    company_id: int, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[List[tuple]]:
+    """Lever de boekingen van een bedrijf in blokken van tuples (EXPORT_COLUMNS)."""
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            SELECT
+                b.id, b.customer, b.date, b.start_time, b.end_time, b.status,
+                b.total_price, b.created_at,
+                i.service_id, i.name, i.price, i.duration
+            FROM bookings b
+            LEFT JOIN booking_items i ON i.booking_id = b.id
+            WHERE b.company_id=? AND b.status NOT IN (?, ?)
+            ORDER BY b.date, b.start_time, b.id, i.id
+            """,
+            (company_id, *HOLD_STATUSES),
+        )
+        while True:
+            rows = c.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [tuple(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def export_bookings_csv(
+    company_id: int, out: Union[str, os.PathLike, IO[str]], delimiter: str = ","
+) -> int:
+    """Schrijf alle boekingen van een bedrijf als CSV. Retourneert aantal regels."""
+    own = isinstance(out, (str, os.PathLike))
+    stream = open(out, "w", encoding="utf-8", newline="") if own else out
+    try:
+        writer = csv.writer(stream, delimiter=delimiter)
+        writer.writerow(EXPORT_COLUMNS)
+        n = 0
+        for rows in iter_booking_rows(company_id):
+            writer.writerows(rows)
+            n += len(rows)
+        return n
+    finally:
+        if own:
+            stream.close()
+
+
+def export_bookings_parquet(
+    company_id: int, out: Union[str, os.PathLike, IO[bytes]]
+) -> int:
+    """
+    Schrijf alle boekingen van een bedrijf als Parquet (vereist pyarrow).
+    Elk blok wordt een eigen row group, dus het geheugen blijft vlak.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet-export vereist het pakket 'pyarrow'.") from e
+
+    schema = pa.schema(
+        [
+            ("booking_ref", pa.int64()),
+            ("customer", pa.string()),
+            ("date", pa.string()),
+            ("start_time", pa.string()),
+            ("end_time", pa.string()),
+            ("status", pa.string()),
+            ("total_price", pa.float64()),
+            ("created_at", pa.string()),
+            ("service_id", pa.int64()),
+            ("service", pa.string()),
+            ("price", pa.float64()),
+            ("duration", pa.int64()),
+        ]
+    )
+
+    n = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in iter_booking_rows(company_id):
+            columns = list(zip(*rows))
+            writer.write_table(
+                pa.Table.from_arrays(
+                    [pa.array(col, type=f.type) for col, f in zip(columns, schema)],
+                    schema=schema,
+                )
+            )
+            n += len(rows)
+    return n
@@ -0,0 +1,244 @@
+"""
+Publieke catalogus als geversioneerde snapshot.
+
+Per bedrijf wordt de publieke catalogus (gepubliceerde diensten per
+categorie) één keer opgebouwd als JSON en HTML en in het geheugen bewaard.
+Bij add_service/update_service/delete_service (en profiel- of logo-
+wijzigingen) verhoogt db_core companies.catalog_version en roept het
+on_catalog_change aan, waarna de snapshot direct opnieuw wordt opgebouwd.
+Leesverkeer raakt SQLite dus niet.
+
+Wijzigingen vanuit een ander proces (bv. de beheer-app naast de API)
+worden opgepikt via een goedkope versiecheck zodra een snapshot ouder is
+dan CATALOG_MAX_AGE_SECONDS.
+
+Het logo staat in de JSON en HTML als URL van de API (logo_url); het pad
+op de server (companies.logo_path) blijft intern in snapshot.logo_path.
+"""
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+from db_core import get_catalog_version, get_connection, on_catalog_change
+
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", "60"))
+UNCATEGORIZED_LABEL = "Overige diensten"
+
+
+class CatalogSnapshot(NamedTuple):
+    company_id: int
+    slug: str
+    version: int
+    etag: str
+    data: dict
+    json: str
+    html: str
+    checked_at: float
+    logo_path: Optional[str]  # intern pad, niet publiceren
+
+
+_lock = threading.Lock()
+_snapshots: Dict[int, CatalogSnapshot] = {}
+_slug_index: Dict[str, int] = {}
+
+
+def format_money(x) -> str:
+    try:
+        return f"€{float(x):.2f}".replace(".", ",")
+    except Exception:
+        return "€0,00"
+
+
+def logo_url(slug: str, version: int) -> str:
+    """Publieke URL van het logo (zie voice_backend/public_catalog.py)."""
+    return f"/catalog/{quote(slug, safe='')}/logo?v={version}"
+
+
+# =============================
+# Opbouwen
+# =============================
+def _load_catalog_data(company_id: int) -> Optional[Tuple[dict, Optional[str]]]:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            "SELECT id, name, slug, logo_path, catalog_version FROM companies WHERE id=?",
+            (company_id,),
+        )
+        company = c.fetchone()
+        if not company:
+            return None
+        c.execute(
+            """
+            SELECT id, name, price, duration, category, description
+            FROM services
+            WHERE company_id=? AND is_active=1
+            ORDER BY COALESCE(category, ''), name
+            """,
+            (company_id,),
+        )
+        services = c.fetchall()
+    finally:
+        conn.close()
+
+    categories: List[dict] = []
+    current_label = None
+    for s in services:
+        label = str(s["category"]).strip() if s["category"] else ""
+        label = label or UNCATEGORIZED_LABEL
+        if label != current_label:
+            categories.append({"name": label, "services": []})
+            current_label = label
+        categories[-1]["services"].append(
+            {
+                "id": int(s["id"]),
+                "name": s["name"],
+                "price": float(s["price"] or 0),
+                "price_label": format_money(s["price"]),
+                "duration": int(s["duration"] or 0),
+                "description": s["description"] or "",
+            }
+        )
+
+    slug = company["slug"] or str(company["id"])
+    version = int(company["catalog_version"] or 0)
+    logo_path = company["logo_path"] or None
+    data = {
+        "company": {
+            "id": int(company["id"]),
+            "name": company["name"],
+            "slug": slug,
+            "logo": logo_url(slug, version) if logo_path else None,
+        },
+        "version": version,
+        "categories": categories,
+    }
+    return data, logo_path
+
+
+def render_catalog_html(data: dict, logo_src: Optional[str] = None) -> str:
+    """Zelfstandig HTML-fragment van de catalogus (ook bruikbaar als statische pagina)."""
+    esc = html.escape
+    parts = [f'<section class="dor-catalog" data-version="{data["version"]}">']
+    if logo_src:
+        parts.append(
+            f'<img class="dor-logo" src="{esc(logo_src)}" '
+            f'alt="{esc(data["company"]["name"])}">'
+        )
+    parts.append(f'<h1>{esc(data["company"]["name"])}</h1>')
+    parts.append("<h2>Diensten &amp; tarieven</h2>")
+    if not data["categories"]:
+        parts.append("<p>Er zijn nog geen gepubliceerde diensten.</p>")
+    for cat in data["categories"]:
+        parts.append(f'<h3>{esc(cat["name"])}</h3><ul>')
+        for s in cat["services"]:
+            parts.append(
+                f'<li><strong>{esc(s["name"])}</strong> — '
+                f'{esc(s["price_label"])} • {s["duration"]} min'
+            )
+            if s["description"]:
+                parts.append(f'<br><small>{esc(s["description"])}</small>')
+            parts.append("</li>")
+        parts.append("</ul>")
+    parts.append("</section>")
+    return "\n".join(parts)
+
+
+def build_catalog_snapshot(company_id: int) -> Optional[CatalogSnapshot]:
+    loaded = _load_catalog_data(company_id)
+    if loaded is None:
+        return None
+    data, logo_path = loaded
+    doc = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha1(doc.encode("utf-8")).hexdigest()[:16]
+    return CatalogSnapshot(
+        company_id=company_id,
+        slug=data["company"]["slug"],
+        version=data["version"],
+        etag=f'"{company_id}-{data["version"]}-{digest}"',
+        data=data,
+        json=doc,
+        html=render_catalog_html(data, data["company"]["logo"]),
+        checked_at=time.monotonic(),
+        logo_path=logo_path,
+    )
+
+
+# =============================
+# Cache
+# =============================
+def refresh_catalog(company_id: int) -> Optional[CatalogSnapshot]:
+    """Bouw de snapshot opnieuw op (aangeroepen na elke catalogus-wijziging)."""
+    snap = build_catalog_snapshot(company_id)
+    with _lock:
+        old = _snapshots.pop(company_id, None)
+        if old is not None:
+            _slug_index.pop(old.slug, None)
+        if snap is not None:
+            _snapshots[company_id] = snap
+            _slug_index[snap.slug] = company_id
+    return snap
+
+
+def get_catalog(company_id: int) -> Optional[CatalogSnapshot]:
+    snap = _snapshots.get(company_id)
+    if snap is None:
+        return refresh_catalog(company_id)
+
+    if time.monotonic() - snap.checked_at > CATALOG_MAX_AGE_SECONDS:
+        if get_catalog_version(company_id) != snap.version:
+            return refresh_catalog(company_id)
+        snap = snap._replace(checked_at=time.monotonic())
+        with _lock:
+            _snapshots[company_id] = snap
+    return snap
+
+
+def get_catalog_by_slug(slug_or_id: str) -> Optional[CatalogSnapshot]:
+    """Zoek op slug, of op bedrijfs-id als de waarde numeriek is."""
+    value = str(slug_or_id).strip()
+    cid = _slug_index.get(value)
+    if cid is None:
+        conn = get_connection()
+        try:
+            row = conn.execute("SELECT id FROM companies WHERE slug=?", (value,)).fetchone()
+        finally:
+            conn.close()
+        if row:
+            cid = int(row["id"])
+        elif value.isdigit():
+            cid = int(value)
+        else:
+            return None
+    return get_catalog(cid)
+
+
+def find_service(data: dict, service_id) -> Optional[Tuple[dict, dict]]:
+    """(categorie, dienst) voor een deep link ?service=<id> (zie qr_codes), of None."""
+    try:
+        sid = int(service_id)
+    except (TypeError, ValueError):
+        return None
+    for cat in data["categories"]:
+        for s in cat["services"]:
+            if s["id"] == sid:
+                return cat, s
+    return None
+
+
+def etag_matches(snapshot: CatalogSnapshot, if_none_match: Optional[str]) -> bool:
+    """True als de client deze versie al heeft (HTTP 304)."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or snapshot.etag in tags or f"W/{snapshot.etag}" in tags
+
+
+on_catalog_change(refresh_catalog)
@@ -0,0 +1,153 @@
+"""
+Klantgegevens normaliseren en gelijkende klantnamen groeperen.
+
+Zuivere functies zonder database. db_core gebruikt de normalisatie om een
+boeking aan een klant te koppelen (telefoon en e-mail zijn unieke sleutels
+per bedrijf), backfill_customers gebruikt cluster_names om de vrije tekst
+uit bookings.customer in batch samen te voegen.
+
+Naamvergelijking in twee stappen:
+
+1. name_key: kleine letters, zonder accenten en leestekens, woorden
+   gesorteerd. "Piet  Jansen", "jansen, piet" en "Piët Jansen" vallen zo
+   al samen zonder fuzzy vergelijking.
+2. Sorted neighbourhood binnen een blok met dezelfde initialen: elke sleutel
+   wordt alleen vergeleken met zijn NAME_WINDOW buren in gesorteerde
+   volgorde (en nog eens gesorteerd op de omgekeerde sleutel, zodat ook
+   tikfouten vooraan gevonden worden). Dat houdt het werk lineair in het
+   aantal namen; "An Peeters" en "Jan Peeters" blijven apart omdat hun
+   initialen verschillen.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+# Landcode voor nationale nummers (0470 12 34 56 -> +32470123456) als het
+# land van het bedrijf niet bekend is
+DEFAULT_COUNTRY_CODE = "32"
+# Landen waarin de app bedrijven bedient (BE, NL)
+COUNTRY_CODES = ("32", "31")
+# Minimale gelijkenis (difflib-ratio) om twee sleutels samen te voegen
+NAME_MATCH_RATIO = 0.88
+# Aantal buren waarmee elke sleutel vergeleken wordt
+NAME_WINDOW = 6
+# Kortere sleutels worden alleen exact samengevoegd
+MIN_FUZZY_LENGTH = 6
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_phone(raw: Optional[str], country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """
+    Telefoonnummer als +<landcode><nummer>, of None als het geen nummer is.
+
+    Spaties, punten, streepjes en haakjes vallen weg; 00 wordt +, een
+    nationaal nummer (met 0) krijgt `country_code`. Nummers zonder + en
+    zonder 0 (zoals caller-id's van Zadarma) hebben de landcode al.
+    """
+    if not raw:
+        return None
+    raw = str(raw).strip()
+    if raw.lower().startswith("whatsapp:"):
+        raw = raw[9:]
+    raw = raw.replace("(0)", "")  # +32 (0)470 ...
+    digits = re.sub(r"\D", "", raw)
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = country_code + digits[1:]
+    if not 8 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
+
+def country_code_of(number: Optional[str]) -> str:
+    """
+    Landcode van een internationaal nummer (bv. het AI-nummer van een
+    bedrijf), of DEFAULT_COUNTRY_CODE als het geen bekend land is.
+    """
+    number = (number or "").strip()
+    for code in COUNTRY_CODES:
+        if number.startswith("+" + code):
+            return code
+    return DEFAULT_COUNTRY_CODE
+
+
+def normalize_email(raw: Optional[str]) -> Optional[str]:
+    """E-mailadres in kleine letters, of None als het geen adres is."""
+    if not raw:
+        return None
+    email = str(raw).strip().lower()
+    return email if _EMAIL_RE.match(email) else None
+
+
+def name_key(name: Optional[str]) -> str:
+    """Vergelijkingssleutel voor een klantnaam ('' als er niets overblijft)."""
+    if not name:
+        return ""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(sorted(_NON_ALNUM_RE.sub(" ", text).split()))
+
+
+def _initials(key: str) -> str:
+    return "".join(word[0] for word in key.split())
+
+
+def _similar(a: str, b: str, ratio: float) -> bool:
+    # difflib pas hier: db_core importeert dit module bij elke start
+    from difflib import SequenceMatcher
+
+    if min(len(a), len(b)) < MIN_FUZZY_LENGTH:
+        return False
+    m = SequenceMatcher(None, a, b, autojunk=False)
+    return m.real_quick_ratio() >= ratio and m.quick_ratio() >= ratio and m.ratio() >= ratio
+
+
+def cluster_names(
+    names: Iterable[str],
+    ratio: float = NAME_MATCH_RATIO,
+    window: int = NAME_WINDOW,
+) -> List[List[str]]:
+    """
+    Groepeer namen die waarschijnlijk dezelfde klant zijn.
+
+    Retourneert een lijst clusters (elke naam komt in precies één cluster);
+    namen met een lege sleutel worden overgeslagen.
+    """
+    by_key: Dict[str, List[str]] = {}
+    for name in names:
+        key = name_key(name)
+        if key:
+            by_key.setdefault(key, []).append(name)
+
+    parent = {key: key for key in by_key}
+
+    def find(key: str) -> str:
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    blocks: Dict[str, List[str]] = {}
+    for key in by_key:
+        blocks.setdefault(_initials(key), []).append(key)
+    for keys in blocks.values():
+        if len(keys) < 2:
+            continue
+        for ordered in (sorted(keys), sorted(keys, key=lambda k: k[::-1])):
+            for i, key in enumerate(ordered):
+                for other in ordered[i + 1 : i + 1 + window]:
+                    a, b = find(key), find(other)
+                    if a != b and _similar(key, other, ratio):
+                        parent[b] = a
+
+    clusters: Dict[str, List[str]] = {}
+    for key, originals in by_key.items():
+        clusters.setdefault(find(key), []).extend(originals)
+    return list(clusters.values())
@@ -0,0 +1,35 @@
+"""
+Boekingen zonder klant koppelen aan klanten.
+
+    python customers_job.py [--company ID] [--every 86400]
+
+Clustert de vrije-tekstnamen uit bookings.customer per bedrijf (ook
+schrijfwijzen als "piet jansen" / "Jansen, Piet" / "Piet Janssen") en
+koppelt elke boeking aan één klant in de tabel customers. Eenmalig
+draaien na de migratie; nieuwe boekingen worden al bij het boeken
+gekoppeld, dus daarna is dit alleen nodig na een import of als vangnet.
+"""
+import argparse
+import time
+from datetime import datetime
+
+from db_core import backfill_customers, init_db
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Koppel boekingen aan klanten.")
+    parser.add_argument("--company", type=int, help="alleen dit bedrijf")
+    parser.add_argument("--every", type=int, help="blijf draaien, elke N seconden")
+    args = parser.parse_args(argv)
+
+    init_db()
+    while True:
+        linked = backfill_customers(args.company)
+        print(f"⏰ {datetime.now():%Y-%m-%d %H:%M}: {linked} boekingen aan klanten gekoppeld")
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
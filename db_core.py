@@ -0,0 +1,3959 @@
+"""
+Kern van de datalaag: alleen sqlite3, geen pandas of streamlit.
+
+voice_backend, de scheduler en andere scripts importeren rechtstreeks
+uit db_core en starten daardoor snel. database.py herexporteert alles
+hieruit en voegt de DataFrame-functies voor de Streamlit-app toe.
+Een andere database kiezen kan met db_core.DB_NAME = "...".
+"""
+import bisect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, date as ddate, time as dtime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import customer_match
+import db_metrics
+import slot_engine
+from models import (
+    AvailabilityException,
+    AvailabilityWindow,
+    Booking,
+    Customer,
+    RecurringBooking,
+    Resource,
+    Service,
+)
+
+DB_NAME = "data/bookings.db"
+_ready_dirs = set()
+
+
+# =============================
+# DB helpers
+# =============================
+def get_connection() -> sqlite3.Connection:
+    # Zorg dat de map van de database bestaat (één keer per pad)
+    folder = os.path.dirname(DB_NAME)
+    if folder and folder not in _ready_dirs:
+        os.makedirs(folder, exist_ok=True)
+        _ready_dirs.add(folder)
+    if db_metrics.ENABLED:
+        conn = sqlite3.connect(
+            DB_NAME, check_same_thread=False, factory=db_metrics.InstrumentedConnection
+        )
+        conn.owner = db_metrics.caller_name()
+    else:
+        conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA busy_timeout = 5000;")
+    return conn
+
+
+# Callbacks die na een wijziging van de publieke catalogus worden aangeroepen
+# (zie on_catalog_change). Zo kan catalog.py zijn snapshot bijwerken zonder
+# dat database.py van catalog.py afhankelijk is.
+_catalog_listeners: List[Callable[[int], None]] = []
+
+
+def on_catalog_change(callback: Callable[[int], None]) -> None:
+    """Registreer callback(company_id) voor wijzigingen in diensten/profiel/logo."""
+    if callback not in _catalog_listeners:
+        _catalog_listeners.append(callback)
+
+
+def _bump_catalog_version(c: sqlite3.Cursor, company_id: int) -> None:
+    c.execute(
+        "UPDATE companies SET catalog_version = catalog_version + 1 WHERE id=?",
+        (company_id,),
+    )
+
+
+def _bump_schedule_version(c: sqlite3.Cursor, company_id: int) -> None:
+    """Rooster gewijzigd (vensters, uitzonderingen, resources): cache ongeldig."""
+    c.execute(
+        "UPDATE companies SET schedule_version = schedule_version + 1 WHERE id=?",
+        (company_id,),
+    )
+
+
+def _bump_slot_days(c: sqlite3.Cursor, company_id: int, day_nums: Iterable[int]) -> None:
+    """Boekingen op deze dagen gewijzigd: gecachete vrije tijden ongeldig."""
+    c.executemany(
+        """
+        INSERT INTO slot_day_versions (company_id, day_num, version) VALUES (?,?,1)
+        ON CONFLICT(company_id, day_num) DO UPDATE SET version = version + 1
+        """,
+        [(company_id, d) for d in set(day_nums)],
+    )
+
+
+def _notify_catalog_change(company_id: Optional[int]) -> None:
+    if company_id is None:
+        return
+    for cb in list(_catalog_listeners):
+        try:
+            cb(company_id)
+        except Exception as e:
+            print("catalog listener error:", e)
+
+
+def _slugify(name: str) -> str:
+    if not name:
+        return "bedrijf"
+    value = name.strip().lower()
+    value = re.sub(r"[^a-z0-9]+", "-", value)
+    value = re.sub(r"-+", "-", value).strip("-")
+    return value or "bedrijf"
+
+
+# Zoekindexen (FTS5) en hun tokenizer
+_SEARCH_TABLES = {
+    "search_words": "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'",
+    "search_trigrams": "tokenize = 'trigram'",
+}
+# Rangschikking (ORDER BY rank): bm25 met gewichten per kolom
+# (tenant, kind, ref_id, title, body); de titel weegt het zwaarst
+_SEARCH_RANK = "bm25(0.0, 0.0, 0.0, 10.0, 1.0)"
+# soort -> (code in rowid, tabel, titel, tekst, voorwaarde, kolommen die de index raken)
+_SEARCH_DOCS = {
+    "customer": (
+        1, "customers", "{r}.name",
+        "TRIM(COALESCE({r}.phone, '') || ' ' || COALESCE({r}.email, ''))",
+        None, "name, phone, email",
+    ),
+    "service": (
+        2, "services", "{r}.name",
+        "TRIM(COALESCE({r}.category, '') || ' ' || COALESCE({r}.description, ''))",
+        None, "name, category, description",
+    ),
+    # alleen boekingen met een notitie; zonder notitie vind je ze via de klant
+    "booking": (
+        3, "bookings", "COALESCE({r}.customer, '')", "{r}.notes",
+        "COALESCE({r}.notes, '') <> ''", "customer, notes",
+    ),
+}
+
+# 'HH:MM' -> minuten sinds middernacht, alleen voor het eenmalig vullen van oude rijen
+_HHMM_MINUTES_SQL = "CAST(substr({col}, 1, 2) AS INTEGER) * 60 + CAST(substr({col}, 4, 2) AS INTEGER)"
+
+
+# =============================
+# INIT / MIGRATIES
+# =============================
+def init_db():
+    conn = get_connection()
+    c = conn.cursor()
+
+        # ---------------- Companies ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS companies (
+            id                           INTEGER PRIMARY KEY AUTOINCREMENT,
+            name                         TEXT    NOT NULL,
+            email                        TEXT    UNIQUE,
+            password                     TEXT,
+            paid                         INTEGER DEFAULT 0,
+            created_at                   TEXT,
+            slug                         TEXT    UNIQUE,
+            logo_path                    TEXT,
+            ai_assistant_enabled         INTEGER NOT NULL DEFAULT 0,
+            ai_phone_number              TEXT,
+            ai_line_type                 TEXT NOT NULL DEFAULT 'standard',
+            ai_premium_rate_cents        INTEGER,
+            ai_guard_max_minutes         INTEGER,
+            ai_guard_idle_seconds        INTEGER,
+            ai_guard_hangup_after_booking INTEGER,
+            ai_tariff_announce           INTEGER,
+            ai_local_minutes_balance     INTEGER NOT NULL DEFAULT 0,
+            ai_instructions              TEXT,
+            catalog_version              INTEGER NOT NULL DEFAULT 0,
+            schedule_version             INTEGER NOT NULL DEFAULT 0,
+            stripe_customer_id           TEXT,
+            min_lead_minutes             INTEGER NOT NULL DEFAULT 0,
+            paid_override                INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+
+    # migreer kolommen indien ontbreken (voor bestaande databases)
+    for ddl in [
+        "ALTER TABLE companies ADD COLUMN slug TEXT UNIQUE",
+        "ALTER TABLE companies ADD COLUMN logo_path TEXT",
+        "ALTER TABLE companies ADD COLUMN ai_assistant_enabled INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE companies ADD COLUMN ai_phone_number TEXT",
+        "ALTER TABLE companies ADD COLUMN ai_line_type TEXT NOT NULL DEFAULT 'standard'",
+        "ALTER TABLE companies ADD COLUMN ai_premium_rate_cents INTEGER",
+        "ALTER TABLE companies ADD COLUMN ai_guard_max_minutes INTEGER",
+        "ALTER TABLE companies ADD COLUMN ai_guard_idle_seconds INTEGER",
+        "ALTER TABLE companies ADD COLUMN ai_guard_hangup_after_booking INTEGER",
+        "ALTER TABLE companies ADD COLUMN ai_tariff_announce INTEGER",
+        "ALTER TABLE companies ADD COLUMN ai_local_minutes_balance INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE companies ADD COLUMN ai_instructions TEXT",
+        "ALTER TABLE companies ADD COLUMN catalog_version INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE companies ADD COLUMN schedule_version INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE companies ADD COLUMN stripe_customer_id TEXT",
+        "ALTER TABLE companies ADD COLUMN min_lead_minutes INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE companies ADD COLUMN paid_override INTEGER NOT NULL DEFAULT 0",
+    ]:
+        try:
+            c.execute(ddl)
+        except Exception:
+            # kolom bestaat al -> negeren
+            pass
+
+
+
+    # Slugs invullen voor bestaande bedrijven
+    try:
+        c.execute("SELECT id, name FROM companies WHERE slug IS NULL OR slug = ''")
+        for row in c.fetchall():
+            cid, nm = int(row["id"]), str(row["name"])
+            base = _slugify(nm)
+            slug = base
+            i = 1
+            while True:
+                c.execute("SELECT 1 FROM companies WHERE slug=?", (slug,))
+                if not c.fetchone():
+                    break
+                i += 1
+                slug = f"{base}-{i}"
+            c.execute("UPDATE companies SET slug=? WHERE id=?", (slug, cid))
+    except Exception:
+        pass
+
+    # ---------------- Categories ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS categories (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id  INTEGER NOT NULL,
+            name        TEXT NOT NULL,
+            description TEXT,
+            UNIQUE(company_id, name),
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+    # ---------------- Services ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS services (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id  INTEGER NOT NULL,
+            name        TEXT NOT NULL,
+            price       REAL NOT NULL DEFAULT 0,
+            duration    INTEGER NOT NULL DEFAULT 0,
+            category    TEXT,
+            description TEXT,
+            is_active   INTEGER NOT NULL DEFAULT 1,
+            buffer_before INTEGER NOT NULL DEFAULT 0,
+            buffer_after  INTEGER NOT NULL DEFAULT 0,
+            slot_step     INTEGER,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    # voorbereidings-/opruimtijd en raster per dienst (NULL = automatisch)
+    for ddl in [
+        "ALTER TABLE services ADD COLUMN buffer_before INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE services ADD COLUMN buffer_after INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE services ADD COLUMN slot_step INTEGER",
+    ]:
+        try:
+            c.execute(ddl)
+        except Exception:
+            pass
+
+    # ---------------- Resources (medewerkers, stoelen, ruimtes) ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS resources (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id  INTEGER NOT NULL,
+            name        TEXT NOT NULL,
+            kind        TEXT NOT NULL DEFAULT 'staff',
+            is_active   INTEGER NOT NULL DEFAULT 1,
+            sort_order  INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(company_id, name),
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+    # ---------------- Availability ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS availability (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id  INTEGER NOT NULL,
+            day         TEXT NOT NULL,
+            start_time  TEXT NOT NULL,
+            end_time    TEXT NOT NULL,
+            resource_id INTEGER REFERENCES resources(id) ON DELETE CASCADE,
+            weekday     INTEGER,
+            start_min   INTEGER,
+            end_min     INTEGER,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+    # ---------------- Bookings ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bookings (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id  INTEGER NOT NULL,
+            customer    TEXT,
+            date        TEXT NOT NULL,
+            start_time  TEXT NOT NULL,
+            end_time    TEXT NOT NULL,
+            total_price REAL NOT NULL DEFAULT 0,
+            status      TEXT NOT NULL DEFAULT 'scheduled',
+            created_at  TEXT,
+            resource_id INTEGER REFERENCES resources(id) ON DELETE SET NULL,
+            day_num     INTEGER,
+            start_min   INTEGER,
+            end_min     INTEGER,
+            recurring_id INTEGER REFERENCES recurring_bookings(id) ON DELETE SET NULL,
+            buffer_before INTEGER NOT NULL DEFAULT 0,
+            buffer_after  INTEGER NOT NULL DEFAULT 0,
+            customer_id INTEGER REFERENCES customers(id) ON DELETE SET NULL,
+            notes       TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    # status toevoegen bij oudere db
+    try:
+        cols = {row["name"] for row in c.execute("PRAGMA table_info(bookings)")}
+        if "status" not in cols:
+            c.execute(
+                "ALTER TABLE bookings ADD COLUMN status TEXT NOT NULL DEFAULT 'scheduled'"
+            )
+    except Exception:
+        pass
+
+    # resource_id (NULL = geen vaste medewerker/plaats) bij oudere db
+    for ddl in [
+        "ALTER TABLE availability ADD COLUMN resource_id INTEGER REFERENCES resources(id) ON DELETE CASCADE",
+        "ALTER TABLE bookings ADD COLUMN resource_id INTEGER REFERENCES resources(id) ON DELETE SET NULL",
+    ]:
+        try:
+            c.execute(ddl)
+        except Exception:
+            pass
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_resources_company ON resources(company_id, is_active)"
+    )
+
+    # tijden ook als gehele getallen (zie slot_engine); oudere rijen eenmalig
+    # vullen, alleen als de kolom nu pas is toegevoegd (init_db draait bij
+    # elke rerun van de app en de UPDATE scant de hele tabel)
+    added = set()
+    for table, ddl in [
+        ("availability", "ALTER TABLE availability ADD COLUMN weekday INTEGER"),
+        ("availability", "ALTER TABLE availability ADD COLUMN start_min INTEGER"),
+        ("availability", "ALTER TABLE availability ADD COLUMN end_min INTEGER"),
+        ("bookings", "ALTER TABLE bookings ADD COLUMN day_num INTEGER"),
+        ("bookings", "ALTER TABLE bookings ADD COLUMN start_min INTEGER"),
+        ("bookings", "ALTER TABLE bookings ADD COLUMN end_min INTEGER"),
+        # bezet vóór start_min en na end_min (buffers van de diensten)
+        (None, "ALTER TABLE bookings ADD COLUMN buffer_before INTEGER NOT NULL DEFAULT 0"),
+        (None, "ALTER TABLE bookings ADD COLUMN buffer_after INTEGER NOT NULL DEFAULT 0"),
+    ]:
+        try:
+            c.execute(ddl)
+            added.add(table)
+        except Exception:
+            pass
+    if "availability" in added:
+        weekday_case = " ".join(f"WHEN '{d}' THEN {i}" for i, d in enumerate(_DUTCH_DAYS))
+        c.execute(
+            f"""
+            UPDATE availability SET
+                weekday   = CASE day {weekday_case} END,
+                start_min = {_HHMM_MINUTES_SQL.format(col="start_time")},
+                end_min   = {_HHMM_MINUTES_SQL.format(col="end_time")}
+            WHERE start_min IS NULL
+            """
+        )
+    if "bookings" in added:
+        # een boeking over middernacht eindigt ná 1440 (zoals bij het boeken)
+        start_sql = _HHMM_MINUTES_SQL.format(col="start_time")
+        end_sql = _HHMM_MINUTES_SQL.format(col="end_time")
+        c.execute(
+            f"""
+            UPDATE bookings SET
+                day_num   = CAST(julianday(date) - 2440587.5 AS INTEGER),
+                start_min = {start_sql},
+                end_min   = {end_sql} + CASE WHEN {end_sql} < {start_sql} THEN 1440 ELSE 0 END
+            WHERE start_min IS NULL
+            """
+        )
+
+    # ---------------- Availability exceptions (sluitingen, extra uren) ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS availability_exceptions (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id  INTEGER NOT NULL,
+            resource_id INTEGER REFERENCES resources(id) ON DELETE CASCADE,
+            start_date  TEXT NOT NULL,
+            end_date    TEXT NOT NULL,
+            kind        TEXT NOT NULL DEFAULT 'closed',
+            start_time  TEXT,
+            end_time    TEXT,
+            note        TEXT,
+            created_at  TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    c.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_availability_exceptions_company
+        ON availability_exceptions(company_id, start_date)
+        """
+    )
+
+    # overlap-check & slot-berekening zoeken altijd per bedrijf + dag
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bookings_company_date ON bookings(company_id, date)"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bookings_company_day ON bookings(company_id, day_num, start_min)"
+    )
+    # zoeken over alle bedrijven op één datum (search_free_slots)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_bookings_day ON bookings(day_num)")
+
+    # versie per bedrijf + dag; elke boekingswijziging op die dag verhoogt hem
+    # (slot-cache, zie get_available_slots_for_duration)
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS slot_day_versions (
+            company_id INTEGER NOT NULL,
+            day_num    INTEGER NOT NULL,
+            version    INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (company_id, day_num)
+        ) WITHOUT ROWID
+        """
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_slot_day_versions_day ON slot_day_versions(day_num)"
+    )
+
+    # ---------------- Vaste (terugkerende) afspraken ----------------
+    # Alleen de komende RECURRING_HORIZON_DAYS worden echte boekingen
+    # (materialize_recurring_bookings); latere keren telt de slot-berekening
+    # rechtstreeks uit de regel.
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS recurring_bookings (
+            id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id         INTEGER NOT NULL,
+            customer           TEXT,
+            resource_id        INTEGER REFERENCES resources(id) ON DELETE SET NULL,
+            start_date         TEXT NOT NULL,
+            start_time         TEXT NOT NULL,
+            end_time           TEXT NOT NULL,
+            start_day          INTEGER NOT NULL,
+            start_min          INTEGER NOT NULL,
+            end_min            INTEGER NOT NULL,
+            buffer_before      INTEGER NOT NULL DEFAULT 0,
+            buffer_after       INTEGER NOT NULL DEFAULT 0,
+            interval_days      INTEGER NOT NULL,
+            occurrences        INTEGER,
+            until_date         TEXT,
+            until_day          INTEGER,
+            items              TEXT NOT NULL,
+            total_price        REAL NOT NULL DEFAULT 0,
+            materialized_until INTEGER NOT NULL,
+            active             INTEGER NOT NULL DEFAULT 1,
+            created_at         TEXT,
+            customer_id        INTEGER REFERENCES customers(id) ON DELETE SET NULL,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    for ddl in [
+        "ALTER TABLE recurring_bookings ADD COLUMN buffer_before INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE recurring_bookings ADD COLUMN buffer_after INTEGER NOT NULL DEFAULT 0",
+    ]:
+        try:
+            c.execute(ddl)
+        except Exception:
+            pass
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_recurring_company ON recurring_bookings(company_id, active)"
+    )
+    try:
+        c.execute(
+            "ALTER TABLE bookings ADD COLUMN recurring_id INTEGER "
+            "REFERENCES recurring_bookings(id) ON DELETE SET NULL"
+        )
+    except Exception:
+        pass
+    c.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_recurring
+        ON bookings(recurring_id, day_num) WHERE recurring_id IS NOT NULL
+        """
+    )
+
+    # ---------------- Klanten ----------------
+    # Telefoon (+landcode) en e-mail (kleine letters) zijn genormaliseerd en
+    # uniek per bedrijf. bookings.customer blijft de naam zoals ingegeven.
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS customers (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id  INTEGER NOT NULL,
+            name        TEXT NOT NULL,
+            phone       TEXT,
+            email       TEXT,
+            created_at  TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    c.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_phone
+        ON customers(company_id, phone) WHERE phone IS NOT NULL
+        """
+    )
+    c.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_email
+        ON customers(company_id, email) WHERE email IS NOT NULL
+        """
+    )
+    # Alle bekende schrijfwijzen per klant als name_key (customer_match),
+    # zodat een nieuwe boeking onder een oude variant ook de klant vindt.
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS customer_names (
+            company_id  INTEGER NOT NULL,
+            name_key    TEXT NOT NULL,
+            customer_id INTEGER NOT NULL REFERENCES customers(id) ON DELETE CASCADE,
+            PRIMARY KEY (company_id, name_key, customer_id)
+        ) WITHOUT ROWID
+        """
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_customer_names_customer ON customer_names(customer_id)"
+    )
+    for ddl in [
+        "ALTER TABLE bookings ADD COLUMN customer_id INTEGER REFERENCES customers(id) ON DELETE SET NULL",
+        "ALTER TABLE recurring_bookings ADD COLUMN customer_id INTEGER REFERENCES customers(id) ON DELETE SET NULL",
+    ]:
+        try:
+            c.execute(ddl)
+        except Exception:
+            pass
+    # historie per klant (al gesorteerd); get_customer_stats groepeert per
+    # bedrijf op customer_id
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bookings_customer ON bookings(customer_id, day_num, start_min)"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bookings_company_customer ON bookings(company_id, customer_id)"
+    )
+
+    # ---------------- Booking items ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS booking_items (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            booking_id  INTEGER NOT NULL,
+            service_id  INTEGER,
+            name        TEXT,
+            price       REAL,
+            duration    INTEGER,
+            FOREIGN KEY (booking_id) REFERENCES bookings(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+    # ---------------- Reminder settings ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reminder_settings (
+            id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id         INTEGER NOT NULL UNIQUE,
+            active             INTEGER NOT NULL DEFAULT 0,
+
+            rem1_days_before   INTEGER NOT NULL DEFAULT 1,
+            rem1_time          TEXT    NOT NULL DEFAULT '09:00',
+            rem1_sms           INTEGER NOT NULL DEFAULT 0,
+            rem1_whatsapp      INTEGER NOT NULL DEFAULT 0,
+            rem1_email         INTEGER NOT NULL DEFAULT 0,
+            rem1_message_sms        TEXT,
+            rem1_message_whatsapp   TEXT,
+            rem1_message_email      TEXT,
+
+            rem2_minutes_before INTEGER NOT NULL DEFAULT 60,
+            rem2_sms            INTEGER NOT NULL DEFAULT 0,
+            rem2_whatsapp       INTEGER NOT NULL DEFAULT 0,
+            rem2_email          INTEGER NOT NULL DEFAULT 0,
+            rem2_message_sms        TEXT,
+            rem2_message_whatsapp   TEXT,
+            rem2_message_email      TEXT,
+
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+    # kolommen toevoegen indien oude versie
+    try:
+        rcols = {row["name"] for row in c.execute("PRAGMA table_info(reminder_settings)")}
+    except sqlite3.OperationalError:
+        rcols = set()
+
+    def add_rem_col(name: str, ddl: str):
+        if name not in rcols:
+            try:
+                c.execute(ddl)
+            except Exception:
+                pass
+
+    add_rem_col("rem1_days_before",
+                "ALTER TABLE reminder_settings ADD COLUMN rem1_days_before INTEGER NOT NULL DEFAULT 1")
+    add_rem_col("rem1_time",
+                "ALTER TABLE reminder_settings ADD COLUMN rem1_time TEXT NOT NULL DEFAULT '09:00'")
+    add_rem_col("rem1_sms",
+                "ALTER TABLE reminder_settings ADD COLUMN rem1_sms INTEGER NOT NULL DEFAULT 0")
+    add_rem_col("rem1_whatsapp",
+                "ALTER TABLE reminder_settings ADD COLUMN rem1_whatsapp INTEGER NOT NULL DEFAULT 0")
+    add_rem_col("rem1_email",
+                "ALTER TABLE reminder_settings ADD COLUMN rem1_email INTEGER NOT NULL DEFAULT 0")
+    add_rem_col("rem1_message_sms",
+                "ALTER TABLE reminder_settings ADD COLUMN rem1_message_sms TEXT")
+    add_rem_col("rem1_message_whatsapp",
+                "ALTER TABLE reminder_settings ADD COLUMN rem1_message_whatsapp TEXT")
+    add_rem_col("rem1_message_email",
+                "ALTER TABLE reminder_settings ADD COLUMN rem1_message_email TEXT")
+    add_rem_col("rem2_minutes_before",
+                "ALTER TABLE reminder_settings ADD COLUMN rem2_minutes_before INTEGER NOT NULL DEFAULT 60")
+    add_rem_col("rem2_sms",
+                "ALTER TABLE reminder_settings ADD COLUMN rem2_sms INTEGER NOT NULL DEFAULT 0")
+    add_rem_col("rem2_whatsapp",
+                "ALTER TABLE reminder_settings ADD COLUMN rem2_whatsapp INTEGER NOT NULL DEFAULT 0")
+    add_rem_col("rem2_email",
+                "ALTER TABLE reminder_settings ADD COLUMN rem2_email INTEGER NOT NULL DEFAULT 0")
+    add_rem_col("rem2_message_sms",
+                "ALTER TABLE reminder_settings ADD COLUMN rem2_message_sms TEXT")
+    add_rem_col("rem2_message_whatsapp",
+                "ALTER TABLE reminder_settings ADD COLUMN rem2_message_whatsapp TEXT")
+    add_rem_col("rem2_message_email",
+                "ALTER TABLE reminder_settings ADD COLUMN rem2_message_email TEXT")
+
+    # ---------------- Message balances (bundels & verbruik) ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS message_balances (
+            company_id      INTEGER PRIMARY KEY,
+            whatsapp_credits INTEGER NOT NULL DEFAULT 0,
+            sms_credits      INTEGER NOT NULL DEFAULT 0,
+            email_limit      INTEGER NOT NULL DEFAULT 1000,
+            email_used       INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    try:
+        mcols = {row["name"] for row in c.execute("PRAGMA table_info(message_balances)")}
+    except sqlite3.OperationalError:
+        mcols = set()
+
+    def add_mb_col(name: str, ddl: str):
+        if name not in mcols:
+            try:
+                c.execute(ddl)
+            except Exception:
+                pass
+
+    add_mb_col(
+        "whatsapp_credits",
+        "ALTER TABLE message_balances ADD COLUMN whatsapp_credits INTEGER NOT NULL DEFAULT 0",
+    )
+    add_mb_col(
+        "sms_credits",
+        "ALTER TABLE message_balances ADD COLUMN sms_credits INTEGER NOT NULL DEFAULT 0",
+    )
+    add_mb_col(
+        "email_limit",
+        "ALTER TABLE message_balances ADD COLUMN email_limit INTEGER NOT NULL DEFAULT 1000",
+    )
+    add_mb_col(
+        "email_used",
+        "ALTER TABLE message_balances ADD COLUMN email_used INTEGER NOT NULL DEFAULT 0",
+    )
+
+    # ---------------- Uitgaande berichten (wachtrij) ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS outbound_messages (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id  INTEGER NOT NULL,
+            channel     TEXT NOT NULL,
+            recipient   TEXT NOT NULL,
+            body        TEXT NOT NULL,
+            status      TEXT NOT NULL DEFAULT 'queued',
+            created_at  TEXT,
+            sent_at     TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_outbound_messages_status ON outbound_messages(status, id)"
+    )
+
+    # ---------------- Wachtlijst ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS waitlist (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id   INTEGER NOT NULL,
+            customer     TEXT NOT NULL,
+            contact      TEXT NOT NULL,
+            channel      TEXT NOT NULL,
+            items        TEXT NOT NULL,
+            duration     INTEGER NOT NULL,
+            buffer_before INTEGER NOT NULL DEFAULT 0,
+            buffer_after  INTEGER NOT NULL DEFAULT 0,
+            from_date    TEXT NOT NULL,
+            to_date      TEXT NOT NULL,
+            from_day     INTEGER NOT NULL,
+            to_day       INTEGER NOT NULL,
+            earliest_min INTEGER,
+            latest_min   INTEGER,
+            resource_id  INTEGER REFERENCES resources(id) ON DELETE SET NULL,
+            status       TEXT NOT NULL DEFAULT 'waiting',
+            created_at   TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    for ddl in [
+        "ALTER TABLE waitlist ADD COLUMN buffer_before INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE waitlist ADD COLUMN buffer_after INTEGER NOT NULL DEFAULT 0",
+    ]:
+        try:
+            c.execute(ddl)
+        except Exception:
+            pass
+    # Kandidaten voor één dag: bereik op from_day (venster is begrensd),
+    # to_day zit in de index zodat de tabel pas voor echte kandidaten nodig is.
+    c.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_waitlist_window
+        ON waitlist(company_id, status, from_day, to_day)
+        """
+    )
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS waitlist_offers (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            waitlist_id     INTEGER NOT NULL,
+            company_id      INTEGER NOT NULL,
+            hold_booking_id INTEGER NOT NULL,
+            day_num         INTEGER NOT NULL,
+            start_min       INTEGER NOT NULL,
+            token           TEXT NOT NULL UNIQUE,
+            status          TEXT NOT NULL DEFAULT 'pending',
+            expires_at      TEXT NOT NULL,
+            created_at      TEXT,
+            FOREIGN KEY (waitlist_id) REFERENCES waitlist(id) ON DELETE CASCADE,
+            FOREIGN KEY (hold_booking_id) REFERENCES bookings(id) ON DELETE CASCADE
+        )
+        """
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_waitlist_offers_entry ON waitlist_offers(waitlist_id, day_num)"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_waitlist_offers_hold ON waitlist_offers(hold_booking_id)"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_waitlist_offers_pending ON waitlist_offers(status, expires_at)"
+    )
+
+    # ---------------- Zoeken (FTS5, zie search.py) ----------------
+    # Twee indexen over dezelfde documenten: woorden met prefix-index en
+    # trigrammen. rowid = id * 4 + soort, zodat de triggers zonder opzoeken
+    # kunnen verwijderen.
+    try:
+        c.execute("ALTER TABLE bookings ADD COLUMN notes TEXT")
+    except Exception:
+        pass
+    existing = {
+        r["name"]
+        for r in c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'search_%'")
+    }
+    for fts, tokenize in _SEARCH_TABLES.items():
+        c.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                tenant, kind UNINDEXED, ref_id UNINDEXED, title, body, {tokenize}
+            )
+            """
+        )
+        c.execute(f"INSERT INTO {fts} ({fts}, rank) VALUES ('rank', ?)", (_SEARCH_RANK,))
+        for kind, (code, table, title, body, cond, cols) in _SEARCH_DOCS.items():
+            values = (
+                f"{{r}}.id * 4 + {code}, 'c' || {{r}}.company_id || 'x', '{kind}', {{r}}.id, "
+                f"{title}, {body}"
+            )
+            insert = f"INSERT INTO {fts} (rowid, tenant, kind, ref_id, title, body) SELECT {values}"
+            where = f" WHERE {cond}" if cond else ""
+            new = (insert + where).format(r="NEW")
+            c.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{fts}_{table}_ins AFTER INSERT ON {table}
+                BEGIN {new}; END
+                """
+            )
+            c.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{fts}_{table}_upd AFTER UPDATE OF {cols} ON {table}
+                BEGIN
+                    DELETE FROM {fts} WHERE rowid = OLD.id * 4 + {code};
+                    {new};
+                END
+                """
+            )
+            c.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{fts}_{table}_del AFTER DELETE ON {table}
+                BEGIN DELETE FROM {fts} WHERE rowid = OLD.id * 4 + {code}; END
+                """
+            )
+            if fts not in existing:
+                # eerste keer: bestaande rijen indexeren
+                c.execute((insert + f" FROM {table} t" + where).format(r="t"))
+
+    # ---------------- Stripe webhooks ----------------
+    # Verwerkte event-ids, zodat dubbel afgeleverde webhooks geen effect hebben
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stripe_events (
+            event_id     TEXT PRIMARY KEY,
+            type         TEXT NOT NULL,
+            received_at  TEXT NOT NULL,
+            processed_at TEXT
+        )
+        """
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_companies_stripe_customer ON companies(stripe_customer_id)"
+    )
+    # search_free_slots: alleen bedrijven met een voorlooptijd tot in de gezochte dag
+    c.execute("CREATE INDEX IF NOT EXISTS idx_companies_lead ON companies(min_lead_minutes)")
+
+    # ---------------- Subscriptions (lokale kopie van Stripe) ----------------
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            id                   TEXT PRIMARY KEY,
+            company_id           INTEGER NOT NULL,
+            customer_id          TEXT,
+            status               TEXT NOT NULL,
+            price_id             TEXT,
+            current_period_end   INTEGER,
+            cancel_at_period_end INTEGER NOT NULL DEFAULT 0,
+            updated_at           TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+        )
+        """
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_subscriptions_company ON subscriptions(company_id, current_period_end)"
+    )
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS subscription_status_history (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            subscription_id TEXT NOT NULL,
+            company_id      INTEGER NOT NULL,
+            status          TEXT NOT NULL,
+            changed_at      TEXT NOT NULL
+        )
+        """
+    )
+
+    # vrijgegeven wachtlijst-tijdvakken stonden vóór schemaversie 1 op
+    # 'cancelled' (en telden dan mee in overzichten en exports)
+    schema_version = c.execute("PRAGMA user_version").fetchone()[0]
+    if schema_version < 1:
+        c.execute(
+            """
+            UPDATE bookings SET status='released'
+            WHERE status='cancelled' AND customer IS NULL
+              AND id IN (SELECT hold_booking_id FROM waitlist_offers)
+            """
+        )
+
+    # vóór schemaversie 2 zette ook Stripe companies.paid; de toegang komt
+    # nu uit subscriptions. Alleen bedrijven zonder abonnement houden hun
+    # vlag, als handmatige vrijgave.
+    if schema_version < 2:
+        c.execute(
+            """
+            UPDATE companies SET paid_override=1
+            WHERE paid=1
+              AND NOT EXISTS (SELECT 1 FROM subscriptions s WHERE s.company_id = companies.id)
+            """
+        )
+        c.execute("PRAGMA user_version = 2")
+
+    # vóór schemaversie 3 rolde de backfill (en de CSV-import) end_min over
+    # middernacht terug, zodat zo'n boeking niets blokkeerde
+    if schema_version < 3:
+        wrapped = c.execute(
+            "SELECT DISTINCT company_id, day_num FROM bookings"
+            " WHERE end_min < start_min AND day_num IS NOT NULL"
+        ).fetchall()
+        c.execute("UPDATE bookings SET end_min = end_min + 1440 WHERE end_min < start_min")
+        for row in wrapped:
+            _bump_slot_days(c, row["company_id"], [row["day_num"]])
+        c.execute("PRAGMA user_version = 3")
+
+    conn.commit()
+    conn.close()
+
+
+# =============================
+# COMPANIES
+# =============================
+def add_company(name: str, email: str, password: str) -> int:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        created_at = datetime.utcnow().isoformat()
+
+        base = _slugify(name)
+        slug = base
+        i = 1
+        while True:
+            c.execute("SELECT 1 FROM companies WHERE slug=?", (slug,))
+            if not c.fetchone():
+                break
+            i += 1
+            slug = f"{base}-{i}"
+
+        c.execute(
+            """
+            INSERT INTO companies (name, email, password, paid, created_at, slug)
+            VALUES (?,?,?,?,?,?)
+            """,
+            (name, email, password, 0, created_at, slug),
+        )
+        cid = c.lastrowid
+
+        # message balance entry aanmaken
+        c.execute(
+            """
+            INSERT OR IGNORE INTO message_balances (company_id)
+            VALUES (?)
+            """,
+            (cid,),
+        )
+
+        conn.commit()
+        return cid
+    except Exception as e:
+        print("add_company error:", e)
+        return -1
+    finally:
+        conn.close()
+
+
+def get_company(company_id: int):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT * FROM companies WHERE id=?", (company_id,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+def get_company_by_ai_number(phone_number: str):
+    """
+    Zoek bedrijf op basis van het AI-telefoonnummer (spaties genegeerd).
+    """
+    if not phone_number:
+        return None
+
+    normalized = phone_number.replace(" ", "")
+
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """
+        SELECT *
+        FROM companies
+        WHERE REPLACE(ai_phone_number, ' ', '') = ?
+        """,
+        (normalized,),
+    )
+    row = c.fetchone()
+    conn.close()
+    return row
+
+def get_company_by_email(email: str):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT * FROM companies WHERE lower(email)=lower(?)", (email,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+
+def get_company_by_slug(slug: str):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT * FROM companies WHERE slug=?", (slug,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+
+def get_company_slug(company_id: int) -> Optional[str]:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT slug FROM companies WHERE id=?", (company_id,))
+    row = c.fetchone()
+    conn.close()
+    return row["slug"] if row and row["slug"] else None
+
+
+def get_company_name_by_id(company_id: int) -> Optional[str]:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT name FROM companies WHERE id=?", (company_id,))
+    row = c.fetchone()
+    conn.close()
+    return row["name"] if row else None
+
+
+def set_company_logo(company_id: int, logo_path: str) -> bool:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            "UPDATE companies SET logo_path=? WHERE id=?",
+            (logo_path, company_id),
+        )
+        _bump_catalog_version(c, company_id)
+        conn.commit()
+    except Exception:
+        return False
+    finally:
+        conn.close()
+    _notify_catalog_change(company_id)
+    return True
+
+
+def get_company_logo(company_id: int) -> Optional[str]:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT logo_path FROM companies WHERE id=?", (company_id,))
+    row = c.fetchone()
+    conn.close()
+    return row["logo_path"] if row and row["logo_path"] else None
+
+
+def get_company_min_lead(company_id: int) -> int:
+    """Minimale tijd (minuten) tussen nu en een online te boeken starttijd."""
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT min_lead_minutes FROM companies WHERE id=?", (company_id,)
+    ).fetchone()
+    conn.close()
+    return int(row["min_lead_minutes"]) if row else 0
+
+
+def set_company_min_lead(company_id: int, minutes: int) -> bool:
+    if minutes < 0:
+        return False
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            "UPDATE companies SET min_lead_minutes=? WHERE id=?", (int(minutes), company_id)
+        )
+        conn.commit()
+        return c.rowcount > 0
+    finally:
+        conn.close()
+
+
+# =============================
+# AI ASSISTANT SETTINGS
+# =============================
+
+def get_company_ai_settings(company_id: int) -> dict:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """
+        SELECT
+            ai_assistant_enabled,
+            ai_phone_number,
+            ai_line_type,
+            ai_premium_rate_cents,
+            ai_guard_max_minutes,
+            ai_guard_idle_seconds,
+            ai_guard_hangup_after_booking,
+            ai_tariff_announce,
+            ai_instructions
+        FROM companies
+        WHERE id = ?
+        """,
+        (company_id,),
+    )
+    row = c.fetchone()
+    conn.close()
+
+    # Default waarden
+    defaults = {
+        "enabled": False,
+        "phone_number": None,
+        "ai_line_type": "standard",
+        "ai_premium_rate_cents": 10,   # = €0,10
+        "ai_guard_max_minutes": 8,
+        "ai_guard_idle_seconds": 25,
+        "ai_guard_hangup_after_booking": 1,
+        "ai_tariff_announce": 1,
+        "ai_instructions": "",
+    }
+
+    if not row:
+        return defaults
+
+    d = defaults.copy()
+
+    # row is sqlite3.Row -> veilig key-checks
+    if "ai_assistant_enabled" in row.keys() and row["ai_assistant_enabled"] is not None:
+        d["enabled"] = bool(row["ai_assistant_enabled"])
+
+    if "ai_phone_number" in row.keys():
+        d["phone_number"] = row["ai_phone_number"]
+
+    if "ai_line_type" in row.keys() and row["ai_line_type"]:
+        d["ai_line_type"] = row["ai_line_type"]
+
+    if "ai_premium_rate_cents" in row.keys() and row["ai_premium_rate_cents"] is not None:
+        d["ai_premium_rate_cents"] = int(row["ai_premium_rate_cents"])
+
+    if "ai_guard_max_minutes" in row.keys() and row["ai_guard_max_minutes"] is not None:
+        d["ai_guard_max_minutes"] = int(row["ai_guard_max_minutes"])
+
+    if "ai_guard_idle_seconds" in row.keys() and row["ai_guard_idle_seconds"] is not None:
+        d["ai_guard_idle_seconds"] = int(row["ai_guard_idle_seconds"])
+
+    if "ai_guard_hangup_after_booking" in row.keys() and row["ai_guard_hangup_after_booking"] is not None:
+        d["ai_guard_hangup_after_booking"] = int(row["ai_guard_hangup_after_booking"])
+
+    if "ai_tariff_announce" in row.keys() and row["ai_tariff_announce"] is not None:
+        d["ai_tariff_announce"] = int(row["ai_tariff_announce"])
+
+    if "ai_instructions" in row.keys() and row["ai_instructions"] is not None:
+        d["ai_instructions"] = str(row["ai_instructions"])
+
+    return d
+
+
+def update_company_ai_instructions(company_id: int, instructions: str | None):
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            UPDATE companies
+            SET ai_instructions = ?
+            WHERE id = ?
+            """,
+            (instructions, company_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def set_company_ai_enabled(company_id: int, enabled: bool) -> None:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "UPDATE companies SET ai_assistant_enabled = ? WHERE id = ?",
+        (1 if enabled else 0, company_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def set_company_ai_phone_number(company_id: int, phone_number: str | None) -> None:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "UPDATE companies SET ai_phone_number = ? WHERE id = ?",
+        (phone_number, company_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def update_company_ai_line(
+    company_id: int,
+    line_type: str,
+    premium_rate_cents: int | None = None,
+) -> None:
+    """
+    line_type: 'standard' of 'premium'
+    premium_rate_cents: tarief in cent per minuut (alleen bij premium)
+    """
+    if line_type not in ("standard", "premium"):
+        line_type = "standard"
+
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """
+        UPDATE companies
+        SET ai_line_type = ?, ai_premium_rate_cents = ?
+        WHERE id = ?
+        """,
+        (line_type, premium_rate_cents, company_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def update_company_ai_safeguards(
+    company_id: int,
+    max_minutes: int | None,
+    idle_seconds: int | None,
+    hangup_after_booking: bool,
+    tariff_announce: bool,
+) -> None:
+    """
+    Slaat limieten op voor AI-gesprekken.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """
+        UPDATE companies
+        SET
+            ai_guard_max_minutes = ?,
+            ai_guard_idle_seconds = ?,
+            ai_guard_hangup_after_booking = ?,
+            ai_tariff_announce = ?
+        WHERE id = ?
+        """,
+        (
+            int(max_minutes) if max_minutes is not None else None,
+            int(idle_seconds) if idle_seconds is not None else None,
+            1 if hangup_after_booking else 0,
+            1 if tariff_announce else 0,
+            company_id,
+        ),
+    )
+    conn.commit()
+    conn.close()
+def get_ai_local_minutes_balance(company_id: int) -> int:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "SELECT ai_local_minutes_balance FROM companies WHERE id = ?",
+        (company_id,),
+    )
+    row = c.fetchone()
+    conn.close()
+    if not row or row["ai_local_minutes_balance"] is None:
+        return 0
+    return int(row["ai_local_minutes_balance"])
+
+
+def add_ai_local_minutes(company_id: int, minutes: int) -> None:
+    if minutes <= 0:
+        return
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """
+        UPDATE companies
+        SET ai_local_minutes_balance = COALESCE(ai_local_minutes_balance, 0) + ?
+        WHERE id = ?
+        """,
+        (int(minutes), company_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def is_company_paid(company_id: int) -> bool:
+    """
+    Betaalstatus zonder Stripe-aanroep.
+
+    Toegang als een beheerder het bedrijf handmatig vrijgaf (paid_override,
+    via activate_company) of als de lokale subscriptions-tabel een
+    abonnement heeft dat geldig is tot na nu. Stripe schrijft alleen
+    subscriptions, zodat de toegang vanzelf afloopt.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        f"""
+        SELECT
+            paid_override,
+            EXISTS (
+                SELECT 1 FROM subscriptions s
+                WHERE s.company_id = companies.id
+                  AND s.status IN ({", ".join("?" * len(SUBSCRIPTION_ACCESS_STATUSES))})
+                  AND s.current_period_end > ?
+            ) AS subscription_valid
+        FROM companies
+        WHERE id=?
+        """,
+        (*SUBSCRIPTION_ACCESS_STATUSES, int(time.time()), company_id),
+    )
+    row = c.fetchone()
+    conn.close()
+    if not row:
+        return False
+    return bool(row["paid_override"] or row["subscription_valid"])
+
+
+def set_company_paid_override(company_id: int, enabled: bool):
+    """Handmatige vrijgave door een beheerder (staat los van Stripe)."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "UPDATE companies SET paid_override=? WHERE id=?",
+        (1 if enabled else 0, company_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def activate_company(company_id: int):
+    set_company_paid_override(company_id, True)
+
+
+def set_company_stripe_customer(company_id: int, customer_id: str) -> None:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "UPDATE companies SET stripe_customer_id=? WHERE id=?",
+        (customer_id, company_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_company_id_by_stripe_customer(customer_id: str) -> Optional[int]:
+    if not customer_id:
+        return None
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT id FROM companies WHERE stripe_customer_id=?", (customer_id,))
+    row = c.fetchone()
+    conn.close()
+    return int(row["id"]) if row else None
+
+
+# =============================
+# SUBSCRIPTIONS
+# =============================
+# Statussen die toegang geven tot current_period_end (past_due = respijt)
+SUBSCRIPTION_ACCESS_STATUSES = ("active", "trialing", "past_due")
+
+
+def _subscription_row(sub: dict, company_id: int) -> tuple:
+    """Stripe subscription-object -> rij voor de subscriptions-tabel."""
+    items = ((sub.get("items") or {}).get("data") or [{}])
+    first_item = items[0] or {}
+    price = first_item.get("price") or {}
+    # nieuwere Stripe API-versies zetten de periode op het item
+    period_end = sub.get("current_period_end") or first_item.get("current_period_end")
+    return (
+        sub["id"],
+        company_id,
+        sub.get("customer"),
+        sub.get("status") or "incomplete",
+        price.get("id") if isinstance(price, dict) else price,
+        int(period_end) if period_end else None,
+        1 if sub.get("cancel_at_period_end") else 0,
+        datetime.utcnow().isoformat(),
+    )
+
+
+def upsert_subscriptions(subs: Iterable[dict]) -> int:
+    """
+    Sla Stripe-abonnementen lokaal op (één transactie, executemany).
+    Het bedrijf wordt bepaald via metadata.company_id of de Stripe customer.
+    Statuswijzigingen komen in subscription_status_history.
+    Retourneert het aantal opgeslagen abonnementen.
+    """
+    subs = list(subs)
+    if not subs:
+        return 0
+
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+
+        customers = {s.get("customer") for s in subs if s.get("customer")}
+        by_customer = {}
+        if customers:
+            marks = ",".join("?" * len(customers))
+            c.execute(
+                f"SELECT id, stripe_customer_id FROM companies WHERE stripe_customer_id IN ({marks})",
+                tuple(customers),
+            )
+            by_customer = {r["stripe_customer_id"]: int(r["id"]) for r in c.fetchall()}
+
+        ids = [s["id"] for s in subs]
+        marks = ",".join("?" * len(ids))
+        c.execute(f"SELECT id, status FROM subscriptions WHERE id IN ({marks})", ids)
+        old_status = {r["id"]: r["status"] for r in c.fetchall()}
+
+        wanted = {}
+        for sub in subs:
+            metadata = sub.get("metadata") or {}
+            company_id = by_customer.get(sub.get("customer"))
+            if metadata.get("company_id"):
+                try:
+                    company_id = int(metadata["company_id"])
+                except (TypeError, ValueError):
+                    pass
+            if company_id is not None:
+                wanted[sub["id"]] = company_id
+
+        # metadata kan naar een verwijderd bedrijf wijzen: die overslaan in
+        # plaats van de hele batch op de foreign key te laten vallen
+        existing = set()
+        if wanted:
+            c.execute(
+                "SELECT id FROM companies WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(set(wanted.values()))),),
+            )
+            existing = {int(r["id"]) for r in c.fetchall()}
+
+        rows = []
+        for sub in subs:
+            company_id = wanted.get(sub["id"])
+            if company_id is None:
+                continue
+            if company_id not in existing:
+                print(f"subscription {sub['id']}: onbekend bedrijf {company_id}, overgeslagen")
+                continue
+            rows.append(_subscription_row(sub, company_id))
+
+        c.executemany(
+            """
+            INSERT INTO subscriptions (
+                id, company_id, customer_id, status, price_id,
+                current_period_end, cancel_at_period_end, updated_at
+            )
+            VALUES (?,?,?,?,?,?,?,?)
+            ON CONFLICT(id) DO UPDATE SET
+                company_id           = excluded.company_id,
+                customer_id          = excluded.customer_id,
+                status               = excluded.status,
+                price_id             = excluded.price_id,
+                current_period_end   = excluded.current_period_end,
+                cancel_at_period_end = excluded.cancel_at_period_end,
+                updated_at           = excluded.updated_at
+            """,
+            rows,
+        )
+        c.executemany(
+            """
+            INSERT INTO subscription_status_history (subscription_id, company_id, status, changed_at)
+            VALUES (?,?,?,?)
+            """,
+            [
+                (r[0], r[1], r[3], r[7])
+                for r in rows
+                if old_status.get(r[0]) != r[3]
+            ],
+        )
+        conn.commit()
+        return len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def get_company_subscription(company_id: int) -> Optional[dict]:
+    """Meest recente abonnement van een bedrijf (of None)."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """
+        SELECT id, status, price_id, current_period_end, cancel_at_period_end, updated_at
+        FROM subscriptions
+        WHERE company_id=?
+        ORDER BY current_period_end DESC
+        LIMIT 1
+        """,
+        (company_id,),
+    )
+    row = c.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+# =============================
+# STRIPE EVENTS (idempotentie)
+# =============================
+def record_stripe_event(event_id: str, event_type: str) -> bool:
+    """
+    Registreer een binnengekomen Stripe-event.
+
+    Retourneert False als het event al eerder volledig is verwerkt
+    (dubbele aflevering), anders True.
+    """
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            INSERT OR IGNORE INTO stripe_events (event_id, type, received_at)
+            VALUES (?,?,?)
+            """,
+            (event_id, event_type, datetime.utcnow().isoformat()),
+        )
+        if c.rowcount == 0:
+            c.execute(
+                "SELECT processed_at FROM stripe_events WHERE event_id=?",
+                (event_id,),
+            )
+            row = c.fetchone()
+            if row and row["processed_at"]:
+                return False
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
+def mark_stripe_event_processed(event_id: str) -> None:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "UPDATE stripe_events SET processed_at=? WHERE event_id=?",
+        (datetime.utcnow().isoformat(), event_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def update_company_profile(
+    company_id: int, name: str, email: str, password: Optional[str] = None
+) -> bool:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        if password:
+            c.execute(
+                "UPDATE companies SET name=?, email=?, password=? WHERE id=?",
+                (name, email, password, company_id),
+            )
+        else:
+            c.execute(
+                "UPDATE companies SET name=?, email=? WHERE id=?",
+                (name, email, company_id),
+            )
+        _bump_catalog_version(c, company_id)
+        conn.commit()
+    except Exception:
+        return False
+    finally:
+        conn.close()
+    _notify_catalog_change(company_id)
+    return True
+
+
+# =============================
+# CATEGORIES
+# =============================
+def add_category(company_id: int, name: str, description: str = "") -> int:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            INSERT OR IGNORE INTO categories (company_id, name, description)
+            VALUES (?,?,?)
+            """,
+            (company_id, name, description),
+        )
+        conn.commit()
+        c.execute(
+            """
+            SELECT id FROM categories
+            WHERE company_id=? AND name=?
+            """,
+            (company_id, name),
+        )
+        row = c.fetchone()
+        return int(row["id"]) if row else -1
+    finally:
+        conn.close()
+
+
+def upsert_category(company_id: int, name: str, description: str = "") -> int:
+    return add_category(company_id, name, description)
+
+
+# =============================
+# SERVICES
+# =============================
+def list_services(company_id: int, active_only: bool = False) -> List[Service]:
+    """Diensten van een bedrijf als Service-objecten (gesorteerd op categorie, naam)."""
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT {Service.COLUMNS}
+        FROM services
+        WHERE company_id=? {"AND is_active=1" if active_only else ""}
+        ORDER BY COALESCE(category, ''), name
+        """,
+        (company_id,),
+    ).fetchall()
+    conn.close()
+    return [Service(*r) for r in rows]
+
+
+def add_service(
+    company_id: int,
+    name: str,
+    price: float,
+    duration: int,
+    category: Optional[str] = None,
+    description: str = "",
+    is_active: bool = True,
+    buffer_before: int = 0,
+    buffer_after: int = 0,
+    slot_step: Optional[int] = None,
+) -> int:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            INSERT INTO services (
+                company_id, name, price, duration, category, description, is_active,
+                buffer_before, buffer_after, slot_step
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                company_id,
+                name,
+                price,
+                duration,
+                category,
+                description,
+                1 if is_active else 0,
+                int(buffer_before),
+                int(buffer_after),
+                slot_step,
+            ),
+        )
+        sid = c.lastrowid
+        _bump_catalog_version(c, company_id)
+        conn.commit()
+    finally:
+        conn.close()
+    _notify_catalog_change(company_id)
+    return sid
+
+
+def add_services_bulk(company_id: int, services: Iterable[dict]) -> List[int]:
+    """
+    Voeg veel diensten tegelijk toe (bv. CSV-upload) in één transactie.
+
+    Elke dict heeft dezelfde velden als add_service: name, price, duration,
+    category, description, is_active, buffer_before, buffer_after, slot_step.
+    Retourneert de nieuwe ids in volgorde.
+    """
+    rows = [
+        (
+            company_id,
+            s["name"],
+            float(s.get("price") or 0),
+            int(s.get("duration") or 0),
+            s.get("category") or None,
+            s.get("description") or "",
+            0 if s.get("is_active") is False else 1,
+            int(s.get("buffer_before") or 0),
+            int(s.get("buffer_after") or 0),
+            int(s["slot_step"]) if s.get("slot_step") else None,
+        )
+        for s in services
+    ]
+    if not rows:
+        return []
+
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        first_id = _next_free_id(c, "services")
+        ids = list(range(first_id, first_id + len(rows)))
+        c.executemany(
+            """
+            INSERT INTO services (
+                id, company_id, name, price, duration, category, description, is_active,
+                buffer_before, buffer_after, slot_step
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            [(sid,) + row for sid, row in zip(ids, rows)],
+        )
+        _bump_catalog_version(c, company_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    _notify_catalog_change(company_id)
+    return ids
+
+
+def update_service(
+    service_id: int,
+    name: Optional[str] = None,
+    price: Optional[float] = None,
+    duration: Optional[int] = None,
+    category: Optional[str] = None,
+    description: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    buffer_before: Optional[int] = None,
+    buffer_after: Optional[int] = None,
+    slot_step: Optional[int] = None,
+) -> bool:
+    """Alleen opgegeven velden wijzigen; slot_step=0 zet het raster terug op automatisch."""
+    sets = []
+    params: List = []
+    if name is not None:
+        sets.append("name=?")
+        params.append(name)
+    if price is not None:
+        sets.append("price=?")
+        params.append(price)
+    if duration is not None:
+        sets.append("duration=?")
+        params.append(duration)
+    if category is not None:
+        sets.append("category=?")
+        params.append(category)
+    if description is not None:
+        sets.append("description=?")
+        params.append(description)
+    if is_active is not None:
+        sets.append("is_active=?")
+        params.append(1 if is_active else 0)
+    if buffer_before is not None:
+        sets.append("buffer_before=?")
+        params.append(int(buffer_before))
+    if buffer_after is not None:
+        sets.append("buffer_after=?")
+        params.append(int(buffer_after))
+    if slot_step is not None:
+        sets.append("slot_step=?")
+        params.append(int(slot_step) or None)
+
+    if not sets:
+        return True
+
+    params.append(service_id)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        company_id = _service_company_id(c, service_id)
+        c.execute(
+            f"UPDATE services SET {', '.join(sets)} WHERE id=?",
+            params,
+        )
+        if company_id is not None:
+            _bump_catalog_version(c, company_id)
+        conn.commit()
+    finally:
+        conn.close()
+    _notify_catalog_change(company_id)
+    return True
+
+
+def delete_service(service_id: int) -> bool:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        company_id = _service_company_id(c, service_id)
+        c.execute("DELETE FROM services WHERE id=?", (service_id,))
+        if company_id is not None:
+            _bump_catalog_version(c, company_id)
+        conn.commit()
+    finally:
+        conn.close()
+    _notify_catalog_change(company_id)
+    return True
+
+
+def _service_company_id(c: sqlite3.Cursor, service_id: int) -> Optional[int]:
+    c.execute("SELECT company_id FROM services WHERE id=?", (service_id,))
+    row = c.fetchone()
+    return int(row["company_id"]) if row else None
+
+
+def set_service_active(service_id: int, active: bool) -> bool:
+    return update_service(service_id, is_active=active)
+
+
+def get_catalog_version(company_id: int) -> Optional[int]:
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT catalog_version FROM companies WHERE id=?", (company_id,))
+    row = c.fetchone()
+    conn.close()
+    return int(row["catalog_version"]) if row else None
+
+
+def list_catalog_versions() -> List[Tuple[int, str, int]]:
+    """(company_id, slug, catalog_version) voor alle bedrijven."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT id, slug, catalog_version FROM companies ORDER BY id")
+    rows = [
+        (int(r["id"]), r["slug"] or str(r["id"]), int(r["catalog_version"] or 0))
+        for r in c.fetchall()
+    ]
+    conn.close()
+    return rows
+
+
+# =============================
+# RESOURCES
+# =============================
+RESOURCE_KINDS = ("staff", "chair", "room")
+
+
+def add_resource(company_id: int, name: str, kind: str = "staff") -> int:
+    """Voeg een medewerker, stoel of ruimte toe; -1 als de naam al bestaat."""
+    if kind not in RESOURCE_KINDS:
+        return -1
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            INSERT INTO resources (company_id, name, kind, sort_order)
+            VALUES (?, ?, ?, (SELECT COALESCE(MAX(sort_order), 0) + 1
+                              FROM resources WHERE company_id=?))
+            """,
+            (company_id, name.strip(), kind, company_id),
+        )
+        rid = c.lastrowid
+        _bump_schedule_version(c, company_id)
+        conn.commit()
+        return rid
+    except sqlite3.IntegrityError:
+        return -1
+    finally:
+        conn.close()
+
+
+def list_resources(company_id: int, active_only: bool = True) -> List[Resource]:
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT {Resource.COLUMNS}
+        FROM resources
+        WHERE company_id=? {"AND is_active=1" if active_only else ""}
+        ORDER BY sort_order, id
+        """,
+        (company_id,),
+    ).fetchall()
+    conn.close()
+    return [Resource(*r) for r in rows]
+
+
+def set_resource_active(resource_id: int, active: bool) -> bool:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            "UPDATE resources SET is_active=? WHERE id=?",
+            (1 if active else 0, resource_id),
+        )
+        changed = c.rowcount > 0
+        if changed:
+            c.execute(
+                """
+                UPDATE companies SET schedule_version = schedule_version + 1
+                WHERE id = (SELECT company_id FROM resources WHERE id=?)
+                """,
+                (resource_id,),
+            )
+        conn.commit()
+        return changed
+    finally:
+        conn.close()
+
+
+# =============================
+# AVAILABILITY
+# =============================
+_DUTCH_DAYS = [
+    "Maandag",
+    "Dinsdag",
+    "Woensdag",
+    "Donderdag",
+    "Vrijdag",
+    "Zaterdag",
+    "Zondag",
+]
+
+
+def add_availability(
+    company_id: int,
+    day: str,
+    start_time: dtime,
+    end_time: dtime,
+    resource_id: Optional[int] = None,
+) -> int:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            INSERT INTO availability (
+                company_id, day, start_time, end_time, resource_id,
+                weekday, start_min, end_min
+            )
+            VALUES (?,?,?,?,?,?,?,?)
+            """,
+            (
+                company_id,
+                day,
+                start_time.strftime("%H:%M"),
+                end_time.strftime("%H:%M"),
+                resource_id,
+                _DUTCH_DAYS.index(day),
+                start_time.hour * 60 + start_time.minute,
+                end_time.hour * 60 + end_time.minute,
+            ),
+        )
+        aid = c.lastrowid
+        _bump_schedule_version(c, company_id)
+        conn.commit()
+        return aid
+    finally:
+        conn.close()
+
+
+def _fetch_availability(
+    c: sqlite3.Cursor, company_id: int, day: Optional[str] = None
+) -> List[AvailabilityWindow]:
+    c.execute(
+        f"""
+        SELECT {AvailabilityWindow.COLUMNS}
+        FROM availability
+        WHERE company_id=? {"AND weekday=?" if day else ""}
+        ORDER BY weekday, start_min
+        """,
+        (company_id, _DUTCH_DAYS.index(day)) if day else (company_id,),
+    )
+    return [AvailabilityWindow(*r) for r in c.fetchall()]
+
+
+def list_availability(company_id: int, day: Optional[str] = None) -> List[AvailabilityWindow]:
+    """Openingsvensters (optioneel van één weekdag, bv. 'Maandag')."""
+    conn = get_connection()
+    try:
+        return _fetch_availability(conn.cursor(), company_id, day)
+    finally:
+        conn.close()
+
+
+# =============================
+# AVAILABILITY EXCEPTIONS (sluitingen, feestdagen, extra uren)
+# =============================
+EXCEPTION_KINDS = ("closed", "open")
+
+
+def add_availability_exception(
+    company_id: int,
+    start_date: ddate,
+    end_date: Optional[ddate] = None,
+    kind: str = "closed",
+    start_time: Optional[dtime] = None,
+    end_time: Optional[dtime] = None,
+    resource_id: Optional[int] = None,
+    note: str = "",
+) -> int:
+    """
+    Uitzondering op het weekrooster voor start_date t/m end_date.
+
+    kind='closed' zonder tijden: hele dag(en) dicht; met tijden: dicht in
+    dat tijdvak. kind='open' (tijden verplicht): extra openingsuren.
+    resource_id=None geldt voor de hele zaak. Retourneert -1 bij ongeldige
+    invoer.
+    """
+    end_date = end_date or start_date
+    if kind not in EXCEPTION_KINDS or end_date < start_date:
+        return -1
+    if (start_time is None) != (end_time is None):
+        return -1
+    if start_time is not None and start_time >= end_time:
+        return -1
+    if kind == "open" and start_time is None:
+        return -1
+
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            INSERT INTO availability_exceptions (
+                company_id, resource_id, start_date, end_date, kind,
+                start_time, end_time, note, created_at
+            )
+            VALUES (?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                company_id,
+                resource_id,
+                start_date.isoformat(),
+                end_date.isoformat(),
+                kind,
+                start_time.strftime("%H:%M") if start_time else None,
+                end_time.strftime("%H:%M") if end_time else None,
+                note.strip() or None,
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        eid = c.lastrowid
+        _bump_schedule_version(c, company_id)
+        conn.commit()
+        return eid
+    finally:
+        conn.close()
+
+
+def list_availability_exceptions(
+    company_id: int, from_date: Optional[ddate] = None
+) -> List[AvailabilityException]:
+    """Uitzonderingen (optioneel alleen die nog niet voorbij zijn), op datum."""
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT {AvailabilityException.COLUMNS}
+        FROM availability_exceptions
+        WHERE company_id=? {"AND end_date >= ?" if from_date else ""}
+        ORDER BY start_date, start_time
+        """,
+        (company_id, from_date.isoformat()) if from_date else (company_id,),
+    ).fetchall()
+    conn.close()
+    return [AvailabilityException(*r) for r in rows]
+
+
+def delete_availability_exception(company_id: int, exception_id: int) -> bool:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            "DELETE FROM availability_exceptions WHERE id=? AND company_id=?",
+            (exception_id, company_id),
+        )
+        deleted = c.rowcount > 0
+        if deleted:
+            _bump_schedule_version(c, company_id)
+        conn.commit()
+        return deleted
+    finally:
+        conn.close()
+
+
+# =============================
+# EFFECTIEF ROOSTER (weekrooster + uitzonderingen, gecachet)
+# =============================
+# Per (bedrijf, week) wordt het rooster van alle 7 dagen één keer berekend
+# en bewaard met companies.schedule_version. Elke wijziging aan vensters,
+# uitzonderingen of resources verhoogt die versie (ook vanuit een ander
+# proces), zodat een slot-opvraging alleen de versie hoeft te lezen.
+SCHEDULE_CACHE_SIZE = 512
+
+
+class DaySchedule(NamedTuple):
+    """Effectief rooster van één dag; minuten sinds middernacht."""
+
+    resources: List[Optional[int]]  # [None] = één gezamenlijke agenda
+    windows: Dict[Optional[int], List[Tuple[int, int]]]
+
+
+_schedule_cache: "OrderedDict[Tuple[int, str], Tuple[int, Dict[str, DaySchedule]]]" = OrderedDict()
+_schedule_lock = threading.Lock()
+
+
+def _active_resource_ids(c: sqlite3.Cursor, company_id: int) -> List[int]:
+    c.execute(
+        "SELECT id FROM resources WHERE company_id=? AND is_active=1 ORDER BY sort_order, id",
+        (company_id,),
+    )
+    return [int(r["id"]) for r in c.fetchall()]
+
+
+def _apply_exception_rows(
+    windows: List[Tuple[int, int]], rows: List[AvailabilityException]
+) -> List[Tuple[int, int]]:
+    opens = [
+        (slot_engine.to_minutes(e.start_time), slot_engine.to_minutes(e.end_time))
+        for e in rows
+        if e.kind == "open"
+    ]
+    closures = [
+        (slot_engine.to_minutes(e.start_time), slot_engine.to_minutes(e.end_time))
+        if e.start_time else None
+        for e in rows
+        if e.kind == "closed"
+    ]
+    return slot_engine.apply_exceptions(windows, opens, closures)
+
+
+def _compile_week(c: sqlite3.Cursor, company_id: int, monday: ddate) -> Dict[str, DaySchedule]:
+    """
+    Weekrooster + uitzonderingen -> DaySchedule per datum (drie queries).
+
+    Zonder resources is er één agenda (sleutel None). Met resources gebruikt
+    elke resource zijn eigen vensters, of anders die van de hele zaak
+    (resource_id NULL). Uitzonderingen zonder resource gelden voor iedereen.
+    """
+    resource_ids = _active_resource_ids(c, company_id)
+    template = _fetch_availability(c, company_id)
+    sunday = monday + timedelta(days=6)
+    c.execute(
+        f"""
+        SELECT {AvailabilityException.COLUMNS}
+        FROM availability_exceptions
+        WHERE company_id=? AND start_date <= ? AND end_date >= ?
+        """,
+        (company_id, sunday.isoformat(), monday.isoformat()),
+    )
+    exceptions = [AvailabilityException(*r) for r in c.fetchall()]
+
+    week: Dict[str, DaySchedule] = {}
+    for offset in range(7):
+        day = monday + timedelta(days=offset)
+        rows = [w for w in template if w.weekday == offset]
+        week[day.isoformat()] = _build_day(day.isoformat(), resource_ids, rows, exceptions)
+    return week
+
+
+def _build_day(
+    day_str: str,
+    resource_ids: List[int],
+    rows: List[AvailabilityWindow],
+    exceptions: List[AvailabilityException],
+) -> DaySchedule:
+    """
+    Vensters van één weekdag + de uitzonderingen van die datum -> DaySchedule.
+
+    Alleen vensters zonder resource gelden voor de hele zaak; vensters van
+    een inactieve resource vallen weg.
+    """
+    keys: List[Optional[int]] = list(resource_ids) or [None]
+    shared = [(w.start_min, w.end_min) for w in rows if w.resource_id is None]
+    windows: Dict[Optional[int], List[Tuple[int, int]]] = {}
+    for key in keys:
+        own = [(w.start_min, w.end_min) for w in rows if key is not None and w.resource_id == key]
+        windows[key] = own or list(shared)
+
+    todays = [e for e in exceptions if e.start_date <= day_str <= e.end_date]
+    for key in keys:
+        # eerst die van de zaak, dan die van de resource zelf (verlof
+        # gaat zo voor op extra openingsuren van de zaak)
+        for owner in (None, key) if key is not None else (None,):
+            relevant = [e for e in todays if e.resource_id == owner]
+            if relevant:
+                windows[key] = _apply_exception_rows(windows[key], relevant)
+    return DaySchedule(keys, windows)
+
+
+def _effective_day(c: sqlite3.Cursor, company_id: int, date_str: str) -> DaySchedule:
+    """DaySchedule uit de cache; alleen bij een nieuwe schedule_version herberekenen."""
+    c.execute("SELECT schedule_version FROM companies WHERE id=?", (company_id,))
+    row = c.fetchone()
+    version = int(row["schedule_version"]) if row else -1
+
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    monday = day - timedelta(days=day.weekday())
+    key = (company_id, monday.isoformat())
+    with _schedule_lock:
+        cached = _schedule_cache.get(key)
+        if cached and cached[0] == version:
+            _schedule_cache.move_to_end(key)
+            return cached[1][date_str]
+
+    week = _compile_week(c, company_id, monday)
+    with _schedule_lock:
+        _schedule_cache[key] = (version, week)
+        _schedule_cache.move_to_end(key)
+        while len(_schedule_cache) > SCHEDULE_CACHE_SIZE:
+            _schedule_cache.popitem(last=False)
+    return week[date_str]
+
+
+def get_effective_schedule(
+    company_id: int, target_date: ddate
+) -> Dict[Optional[int], List[Tuple[str, str]]]:
+    """Openingsvensters (HH:MM) per resource op een datum, na uitzonderingen."""
+    conn = get_connection()
+    try:
+        day = _effective_day(conn.cursor(), company_id, target_date.isoformat())
+    finally:
+        conn.close()
+    return {
+        r: [(slot_engine.to_hhmm(s), slot_engine.to_hhmm(e)) for s, e in wins]
+        for r, wins in day.windows.items()
+    }
+
+
+# =============================
+# TIME SLOTS (optioneel)
+# =============================
+def _day_schedule(
+    c: sqlite3.Cursor, company_id: int, date_str: str
+) -> Tuple[list, dict, dict]:
+    """
+    Effectief rooster plus bezetting per resource voor één dag, buffers
+    inbegrepen. Boekingen zonder (actieve) resource worden verdeeld over de
+    eerste vrije resource. Retourneert (resources, vensters, bezetting).
+    """
+    day = _effective_day(c, company_id, date_str)
+    c.execute(
+        f"""
+        SELECT start_min - buffer_before, end_min + buffer_after, id, resource_id
+        FROM bookings
+        WHERE company_id=:cid AND day_num=:day AND {_BLOCKING_STATUS_SQL}
+        UNION ALL
+        SELECT start_min - buffer_before, end_min + buffer_after, -id, resource_id
+        FROM recurring_bookings
+        WHERE company_id=:cid AND {_RECURRING_ON_DAY_SQL}
+        """,
+        {"cid": company_id, "day": slot_engine.to_epoch_day(date_str)},
+    )
+    return day.resources, day.windows, _busy_by_resource(day.resources, c.fetchall())
+
+
+def _busy_by_resource(resources: List[Optional[int]], bookings: Iterable) -> Dict[Optional[int], list]:
+    """(start_min, end_min, id, resource_id)-rijen -> bezetting per resource."""
+    busy: Dict[Optional[int], list] = {r: [] for r in resources}
+    unassigned = []
+    for start_min, end_min, bid, rid in bookings:
+        entry = (start_min, end_min, bid)
+        if resources == [None]:
+            busy[None].append(entry)
+        elif rid in busy:
+            busy[rid].append(entry)
+        else:
+            unassigned.append(entry)
+    slot_engine.assign_unassigned(resources, busy, unassigned)
+    return busy
+
+
+# Vrije starttijden per (bedrijf, datum, duur, stap, buffers), gestempeld
+# met (schedule_version, versie van die dag). Een boeking, annulering of
+# import verhoogt alleen de versie van de eigen datum; roosterwijzigingen
+# verhogen schedule_version. Omdat de stempel uit de database komt, zien ook
+# de voicebot en andere processen elkaars wijzigingen. De voorlooptijd hangt
+# af van het tijdstip en wordt pas na de cache toegepast.
+SLOT_CACHE_SIZE = 4096
+
+_slot_cache: "OrderedDict[tuple, Tuple[tuple, Tuple[int, ...], Tuple[str, ...]]]" = OrderedDict()
+_slot_lock = threading.Lock()
+
+
+def _slot_stamp(c: sqlite3.Cursor, company_id: int, day_num: int) -> Tuple[tuple, int]:
+    """(cache-stempel, minimale voorlooptijd van het bedrijf in minuten)."""
+    c.execute(
+        """
+        SELECT c.schedule_version, COALESCE(v.version, 0), c.min_lead_minutes
+        FROM companies c
+        LEFT JOIN slot_day_versions v ON v.company_id = c.id AND v.day_num = ?
+        WHERE c.id = ?
+        """,
+        (day_num, company_id),
+    )
+    row = c.fetchone()
+    return ((row[0], row[1]), row[2]) if row else ((-1, -1), 0)
+
+
+def _lead_cutoff(lead_minutes: int, day_num: int, now: Optional[datetime] = None) -> int:
+    """Vroegste starttijd (minuten) op dag day_num: nu plus de voorlooptijd, begrensd op 0-1440."""
+    now = now or datetime.now()
+    today = slot_engine.to_epoch_day(now.date())
+    cutoff = (today - day_num) * 1440 + now.hour * 60 + now.minute + lead_minutes
+    return min(max(cutoff, 0), 1440)
+
+
+def _free_start_times(
+    c: sqlite3.Cursor,
+    company_id: int,
+    target_date: ddate,
+    duration: int,
+    step: int,
+    before: int = 0,
+    after: int = 0,
+) -> List[str]:
+    date_str = target_date.strftime("%Y-%m-%d")
+    day_num = slot_engine.to_epoch_day(target_date)
+    key = (company_id, date_str, duration, step, before, after)
+    stamp, lead = _slot_stamp(c, company_id, day_num)
+    with _slot_lock:
+        cached = _slot_cache.get(key)
+        if cached and cached[0] == stamp:
+            _slot_cache.move_to_end(key)
+        else:
+            cached = None
+    if cached is None:
+        _, windows, busy = _day_schedule(c, company_id, date_str)
+        starts = tuple(slot_engine.available_starts(windows, busy, duration, step, before, after))
+        cached = (stamp, starts, tuple(slot_engine.to_hhmm(m) for m in starts))
+        with _slot_lock:
+            _slot_cache[key] = cached
+            _slot_cache.move_to_end(key)
+            while len(_slot_cache) > SLOT_CACHE_SIZE:
+                _slot_cache.popitem(last=False)
+    first = bisect.bisect_left(cached[1], _lead_cutoff(lead, day_num))
+    return list(cached[2][first:])
+
+
+def get_available_slots_for_duration(
+    company_id: int,
+    target_date: ddate,
+    duration_minutes: int,
+    step_minutes: int = 15,
+) -> List[str]:
+    """
+    Starttijden (HH:MM) waarop minstens één medewerker/plaats de hele duur
+    vrij is; gesloten dagen en extra uren tellen mee, starttijden vóór nu
+    plus de voorlooptijd van het bedrijf niet. Uit de cache kost dit één
+    query, anders twee extra (bij een gecachet weekrooster).
+    """
+    conn = get_connection()
+    try:
+        return _free_start_times(conn.cursor(), company_id, target_date, duration_minutes, step_minutes)
+    finally:
+        conn.close()
+
+
+def _service_rows(c: sqlite3.Cursor, company_id: int, service_ids: Iterable[int]) -> Dict[int, sqlite3.Row]:
+    ids = sorted({int(i) for i in service_ids})
+    if not ids:
+        return {}
+    c.execute(
+        """
+        SELECT id, duration, buffer_before, buffer_after, slot_step
+        FROM services
+        WHERE company_id=? AND id IN (SELECT value FROM json_each(?))
+        """,
+        (company_id, json.dumps(ids)),
+    )
+    return {r["id"]: r for r in c.fetchall()}
+
+
+def _items_block(c: sqlite3.Cursor, company_id: int, items: List[dict]) -> Tuple[int, int, int]:
+    """(buffer_voor, duur, buffer_na) van een afspraak met deze items na elkaar."""
+    services = _service_rows(c, company_id, [i["service_id"] for i in items if i.get("service_id")])
+    parts = []
+    for item in items:
+        svc = services.get(item.get("service_id"))
+        parts.append(
+            (
+                int(item.get("duration", 0)),
+                svc["buffer_before"] if svc else 0,
+                svc["buffer_after"] if svc else 0,
+            )
+        )
+    return slot_engine.sequence_items(parts)
+
+
+def get_available_slots_for_services(
+    company_id: int,
+    target_date: ddate,
+    service_ids: Sequence[int],
+    step_minutes: Optional[int] = None,
+) -> List[str]:
+    """
+    Starttijden (HH:MM) voor een afspraak met deze diensten na elkaar,
+    inclusief hun voorbereidings- en opruimtijd. Zonder step_minutes bepaalt
+    de eerste dienst het raster: zijn slot_step, of anders een raster dat
+    even lang is als de afspraak met buffers (hoogstens 30 minuten), zodat
+    korte diensten naadloos aansluiten en lange geen overbodige starttijden
+    krijgen. Onbekende diensten -> [].
+    """
+    service_ids = list(service_ids)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        services = _service_rows(c, company_id, service_ids)
+        if not service_ids or any(sid not in services for sid in service_ids):
+            return []
+        before, duration, after = slot_engine.sequence_items(
+            [
+                (services[sid]["duration"], services[sid]["buffer_before"], services[sid]["buffer_after"])
+                for sid in service_ids
+            ]
+        )
+        step = (
+            step_minutes
+            or services[service_ids[0]]["slot_step"]
+            or slot_engine.default_step(before + duration + after)
+        )
+        return _free_start_times(c, company_id, target_date, duration, step, before, after)
+    finally:
+        conn.close()
+
+
+def _company_filter(company_ids: Optional[Iterable[int]]) -> Tuple[str, dict]:
+    """SQL-filter (parameter :ids) op een lijst bedrijven; leeg = alle bedrijven."""
+    if company_ids is None:
+        return "", {}
+    return (
+        " AND company_id IN (SELECT value FROM json_each(:ids))",
+        {"ids": json.dumps(sorted(set(company_ids)))},
+    )
+
+
+def _day_agendas(
+    c: sqlite3.Cursor, date_str: str, company_ids: Optional[Iterable[int]] = None
+) -> list:
+    """
+    Vensters en bezetting van alle (gekozen) bedrijven op één datum, in
+    vier queries: [(bedrijf, vensters, bezetting)] met één rij per agenda.
+    Zelfde regels als _day_schedule, maar zonder per-bedrijf-cache.
+    """
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    where, params = _company_filter(company_ids)
+
+    c.execute(
+        f"""
+        SELECT company_id, id FROM resources
+        WHERE is_active=1 {where}
+        ORDER BY company_id, sort_order, id
+        """,
+        params,
+    )
+    resources: Dict[int, List[int]] = {}
+    for cid, rid in c.fetchall():
+        resources.setdefault(cid, []).append(rid)
+
+    c.execute(
+        f"""
+        SELECT company_id, {AvailabilityWindow.COLUMNS}
+        FROM availability
+        WHERE weekday=:weekday {where}
+        """,
+        {"weekday": day.weekday(), **params},
+    )
+    windows: Dict[int, List[AvailabilityWindow]] = {}
+    for row in c.fetchall():
+        windows.setdefault(row[0], []).append(AvailabilityWindow(*row[1:]))
+
+    c.execute(
+        f"""
+        SELECT company_id, {AvailabilityException.COLUMNS}
+        FROM availability_exceptions
+        WHERE start_date <= :date AND end_date >= :date {where}
+        """,
+        {"date": date_str, **params},
+    )
+    exceptions: Dict[int, List[AvailabilityException]] = {}
+    for row in c.fetchall():
+        exceptions.setdefault(row[0], []).append(AvailabilityException(*row[1:]))
+
+    c.execute(
+        f"""
+        SELECT company_id, start_min - buffer_before, end_min + buffer_after, id, resource_id
+        FROM bookings
+        WHERE day_num=:day AND {_BLOCKING_STATUS_SQL} {where}
+        UNION ALL
+        SELECT company_id, start_min - buffer_before, end_min + buffer_after, -id, resource_id
+        FROM recurring_bookings
+        WHERE {_RECURRING_ON_DAY_SQL} {where}
+        """,
+        {"day": slot_engine.to_epoch_day(day), **params},
+    )
+    bookings: Dict[int, list] = {}
+    for row in c.fetchall():
+        bookings.setdefault(row[0], []).append(tuple(row[1:]))
+
+    agendas = []
+    for cid in sorted(set(windows) | set(exceptions)):
+        schedule = _build_day(date_str, resources.get(cid, []), windows.get(cid, []), exceptions.get(cid, []))
+        busy = _busy_by_resource(schedule.resources, bookings.get(cid, []))
+        for r in schedule.resources:
+            if schedule.windows[r]:
+                agendas.append((cid, schedule.windows[r], busy[r]))
+    return agendas
+
+
+# Bitmaps per (datum, bedrijvenselectie). De stempel telt alle
+# schedule_versions en de dagversies van die datum op: elke wijziging die
+# een agenda op die dag raakt, verhoogt hem (tellers gaan alleen omhoog).
+BITMAP_CACHE_SIZE = 32
+
+_bitmap_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_bitmap_lock = threading.Lock()
+
+
+def _bitmap_stamp(c: sqlite3.Cursor, day_num: int) -> tuple:
+    c.execute(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM companies),
+            (SELECT COALESCE(SUM(schedule_version), 0) FROM companies),
+            (SELECT COALESCE(SUM(version), 0) FROM slot_day_versions WHERE day_num=?)
+        """,
+        (day_num,),
+    )
+    return tuple(c.fetchone())
+
+
+def _lead_cutoffs(
+    c: sqlite3.Cursor, day_num: int, company_ids: Optional[Iterable[int]]
+) -> Dict[int, int]:
+    """Bedrijven waarvoor nu + voorlooptijd nog in of na dag day_num valt -> vroegste starttijd."""
+    now = datetime.now()
+    gap = (day_num - slot_engine.to_epoch_day(now.date())) * 1440 - (now.hour * 60 + now.minute)
+    c.execute("SELECT id, min_lead_minutes FROM companies WHERE min_lead_minutes > ?", (gap,))
+    wanted = set(company_ids) if company_ids is not None else None
+    return {
+        cid: _lead_cutoff(lead, day_num, now)
+        for cid, lead in c.fetchall()
+        if wanted is None or cid in wanted
+    }
+
+
+def search_free_slots(
+    target_date: ddate,
+    duration_minutes: int,
+    from_time: Optional[dtime] = None,
+    to_time: Optional[dtime] = None,
+    company_ids: Optional[Iterable[int]] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Welke bedrijven hebben op target_date een vrije periode van
+    duration_minutes, helemaal tussen from_time en to_time? Retourneert
+    (company_id, eerste starttijd HH:MM), vroegste eerst.
+
+    Bedoeld voor zoeken over veel bedrijven tegelijk (zie slot_bitmap,
+    raster van 5 minuten; vereist numpy). De bitmap per datum wordt
+    gecachet tot een boeking of roosterwijziging die dag raakt; de
+    voorlooptijd per bedrijf gaat er bij elke zoekopdracht af. Voor de
+    exacte starttijden van één bedrijf blijft
+    get_available_slots_for_duration de bron.
+    """
+    import slot_bitmap
+
+    key = (target_date.isoformat(), tuple(sorted(set(company_ids))) if company_ids is not None else None)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        day_num = slot_engine.to_epoch_day(target_date)
+        stamp = _bitmap_stamp(c, day_num)
+        with _bitmap_lock:
+            cached = _bitmap_cache.get(key)
+            if cached and cached[0] == stamp:
+                _bitmap_cache.move_to_end(key)
+                bitmap = cached[1]
+            else:
+                bitmap = None
+        if bitmap is None:
+            bitmap = slot_bitmap.DayBitmap.from_agendas(_day_agendas(c, key[0], key[1]))
+            with _bitmap_lock:
+                _bitmap_cache[key] = (stamp, bitmap)
+                _bitmap_cache.move_to_end(key)
+                while len(_bitmap_cache) > BITMAP_CACHE_SIZE:
+                    _bitmap_cache.popitem(last=False)
+        bitmap = bitmap.not_before(_lead_cutoffs(c, day_num, key[1]))
+    finally:
+        conn.close()
+
+    from_min = from_time.hour * 60 + from_time.minute if from_time else 0
+    to_min = to_time.hour * 60 + to_time.minute if to_time else 24 * 60
+    return [
+        (cid, slot_engine.to_hhmm(m))
+        for cid, m in bitmap.first_free(duration_minutes, from_min, to_min)
+    ]
+
+
+# =============================
+# KLANTEN
+# =============================
+def _company_country_code(c: sqlite3.Cursor, company_id: int) -> str:
+    """Landcode voor nationale nummers bij dit bedrijf (uit zijn AI-nummer)."""
+    row = c.execute("SELECT ai_phone_number FROM companies WHERE id=?", (company_id,)).fetchone()
+    return customer_match.country_code_of(row["ai_phone_number"] if row else None)
+
+
+def _link_customer(
+    c: sqlite3.Cursor,
+    company_id: int,
+    name: Optional[str],
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Klant-id voor een nieuwe boeking, binnen de lopende transactie.
+
+    Zoekt eerst op telefoon, dan op e-mail, dan op name_key (alleen een
+    klant zonder tegenstrijdig nummer of adres). Ontbrekende gegevens
+    worden aangevuld; onbekend = nieuwe klant. None als er niets is om op
+    te koppelen. Fuzzy samenvoegen gebeurt alleen in backfill_customers.
+    """
+    phone = customer_match.normalize_phone(phone, _company_country_code(c, company_id)) if phone else None
+    email = customer_match.normalize_email(email)
+    name = (name or "").strip()
+    key = customer_match.name_key(name)
+
+    row = None
+    if phone:
+        row = c.execute(
+            "SELECT id, phone, email FROM customers WHERE company_id=? AND phone=?",
+            (company_id, phone),
+        ).fetchone()
+    if row is None and email:
+        row = c.execute(
+            "SELECT id, phone, email FROM customers WHERE company_id=? AND email=?",
+            (company_id, email),
+        ).fetchone()
+    if row is None and key:
+        for cand in c.execute(
+            """
+            SELECT cu.id, cu.phone, cu.email
+            FROM customer_names n
+            JOIN customers cu ON cu.id = n.customer_id
+            WHERE n.company_id=? AND n.name_key=?
+            ORDER BY cu.id
+            """,
+            (company_id, key),
+        ).fetchall():
+            if (not phone or cand["phone"] is None) and (not email or cand["email"] is None):
+                row = cand
+                break
+
+    if row is not None:
+        if (phone and row["phone"] is None) or (email and row["email"] is None):
+            # OR IGNORE: nummer/adres al van een andere klant -> niet overnemen
+            c.execute(
+                """
+                UPDATE OR IGNORE customers
+                SET phone=COALESCE(phone, ?), email=COALESCE(email, ?)
+                WHERE id=?
+                """,
+                (phone, email, row["id"]),
+            )
+        return int(row["id"])
+    if not (key or phone or email):
+        return None
+    c.execute(
+        "INSERT INTO customers (company_id, name, phone, email, created_at) VALUES (?,?,?,?,?)",
+        (company_id, name or phone or email, phone, email, datetime.utcnow().isoformat()),
+    )
+    customer_id = c.lastrowid
+    _add_name_keys(c, company_id, customer_id, [key])
+    return customer_id
+
+
+def _add_name_keys(c: sqlite3.Cursor, company_id: int, customer_id: int, keys: Iterable[str]) -> None:
+    c.executemany(
+        "INSERT OR IGNORE INTO customer_names (company_id, name_key, customer_id) VALUES (?,?,?)",
+        [(company_id, k, customer_id) for k in set(keys) if k],
+    )
+
+
+def find_customer_by_phone(company_id: int, phone: str) -> Optional[Customer]:
+    """Klant met dit nummer (in eender welk formaat), bv. de beller van de voicebot."""
+    if not phone:
+        return None
+    conn = get_connection()
+    try:
+        phone = customer_match.normalize_phone(phone, _company_country_code(conn.cursor(), company_id))
+        if not phone:
+            return None
+        row = conn.execute(
+            f"""
+            SELECT {Customer.COLUMNS}
+            FROM customers cu
+            WHERE cu.company_id=? AND cu.phone=?
+            """,
+            (company_id, phone),
+        ).fetchone()
+    finally:
+        conn.close()
+    return Customer(*row) if row else None
+
+
+def list_customers(company_id: int) -> List[Customer]:
+    """Alle klanten met hun aantal boekingen en laatste datum."""
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT {Customer.COLUMNS}, COUNT(b.id), MAX(b.date)
+        FROM customers cu
+        LEFT JOIN bookings b ON b.customer_id = cu.id
+        WHERE cu.company_id=?
+        GROUP BY cu.id
+        ORDER BY cu.name
+        """,
+        (company_id,),
+    ).fetchall()
+    conn.close()
+    return [Customer(*r) for r in rows]
+
+
+def get_customer_history(company_id: int, customer_id: int) -> List[Booking]:
+    """Boekingen van één klant, nieuwste eerst."""
+    conn = get_connection()
+    # zonder INDEXED BY kiest SQLite idx_bookings_company_day (ook gesorteerd)
+    # en loopt dan alle boekingen van het bedrijf af
+    rows = conn.execute(
+        f"""
+        SELECT {Booking.COLUMNS}
+        FROM bookings INDEXED BY idx_bookings_customer
+        WHERE customer_id=? AND company_id=?
+        ORDER BY day_num DESC, start_min DESC
+        """,
+        (customer_id, company_id),
+    ).fetchall()
+    conn.close()
+    return [Booking(*r) for r in rows]
+
+
+def update_customer(
+    company_id: int,
+    customer_id: int,
+    name: Optional[str] = None,
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+) -> bool:
+    """
+    Pas naam, telefoon of e-mail aan (None = ongewijzigd, "" = wissen).
+    False bij een ongeldig nummer/adres of als een andere klant het al heeft.
+    """
+    sets, params = [], []
+    if name is not None:
+        if not name.strip():
+            return False
+        sets.append("name=?")
+        params.append(name.strip())
+
+    conn = get_connection()
+    try:
+        country_code = _company_country_code(conn.cursor(), company_id) if phone else None
+        for col, value, norm in (
+            ("phone", phone, lambda v: customer_match.normalize_phone(v, country_code)),
+            ("email", email, customer_match.normalize_email),
+        ):
+            if value is None:
+                continue
+            if value.strip():
+                value = norm(value)
+                if value is None:
+                    return False
+            else:
+                value = None
+            sets.append(f"{col}=?")
+            params.append(value)
+        if not sets:
+            return True
+
+        cur = conn.execute(
+            f"UPDATE customers SET {', '.join(sets)} WHERE id=? AND company_id=?",
+            (*params, customer_id, company_id),
+        )
+        if cur.rowcount and name is not None:
+            # de oude schrijfwijze blijft ook naar deze klant wijzen
+            _add_name_keys(conn.cursor(), company_id, customer_id, [customer_match.name_key(name)])
+        conn.commit()
+        return cur.rowcount > 0
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+def _merge_customers(
+    c: sqlite3.Cursor, company_id: int, keep_id: int, other_ids: List[int]
+) -> int:
+    """Hang boekingen van other_ids aan keep_id en verwijder die klanten."""
+    other_ids = [i for i in other_ids if i != keep_id]
+    if not other_ids:
+        return 0
+    ids = json.dumps(other_ids)
+    c.execute(
+        """
+        SELECT MAX(phone) AS phone, MAX(email) AS email FROM customers
+        WHERE company_id=? AND id IN (SELECT value FROM json_each(?))
+        """,
+        (company_id, ids),
+    )
+    contact = c.fetchone()
+    moved = c.execute(
+        """
+        UPDATE bookings SET customer_id=?
+        WHERE company_id=? AND customer_id IN (SELECT value FROM json_each(?))
+        """,
+        (keep_id, company_id, ids),
+    ).rowcount
+    c.execute(
+        """
+        UPDATE recurring_bookings SET customer_id=?
+        WHERE company_id=? AND customer_id IN (SELECT value FROM json_each(?))
+        """,
+        (keep_id, company_id, ids),
+    )
+    c.execute(
+        """
+        INSERT OR IGNORE INTO customer_names (company_id, name_key, customer_id)
+        SELECT company_id, name_key, ? FROM customer_names
+        WHERE customer_id IN (SELECT value FROM json_each(?))
+        """,
+        (keep_id, ids),
+    )
+    c.execute(
+        "DELETE FROM customers WHERE company_id=? AND id IN (SELECT value FROM json_each(?))",
+        (company_id, ids),
+    )
+    # pas na het verwijderen: de unieke indexen laten het nummer dan toe
+    c.execute(
+        "UPDATE customers SET phone=COALESCE(phone, ?), email=COALESCE(email, ?) WHERE id=?",
+        (contact["phone"], contact["email"], keep_id),
+    )
+    return moved
+
+
+def merge_customers(company_id: int, keep_id: int, other_ids: Iterable[int]) -> int:
+    """
+    Voeg klanten samen in keep_id (gegevens van keep_id gaan voor).
+    Retourneert het aantal verplaatste boekingen, -1 bij een onbekende klant.
+    """
+    other_ids = list(other_ids)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        found = c.execute(
+            "SELECT COUNT(*) FROM customers WHERE company_id=? AND id IN (SELECT value FROM json_each(?))",
+            (company_id, json.dumps([keep_id] + other_ids)),
+        ).fetchone()[0]
+        if found != len({keep_id, *other_ids}):
+            conn.rollback()
+            return -1
+        moved = _merge_customers(c, company_id, keep_id, other_ids)
+        conn.commit()
+        return moved
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _backfill_company(conn: sqlite3.Connection, company_id: int) -> int:
+    # Lezen en clusteren buiten de schrijf-lock; schrijven met
+    # "customer_id IS NULL", zodat intussen gekoppelde boekingen blijven.
+    names = {
+        r["name"]: r["n"]
+        for r in conn.execute(
+            """
+            SELECT TRIM(customer) AS name, COUNT(*) AS n
+            FROM bookings
+            WHERE company_id=? AND customer_id IS NULL AND TRIM(COALESCE(customer, '')) <> ''
+            GROUP BY TRIM(customer)
+            """,
+            (company_id,),
+        )
+    }
+    if not names:
+        return 0
+    # bekende schrijfwijzen doen mee als sleutel (name_key(sleutel) == sleutel)
+    known: Dict[str, List[sqlite3.Row]] = {}
+    for r in conn.execute(
+        """
+        SELECT n.name_key, cu.id, cu.phone, cu.email
+        FROM customer_names n
+        JOIN customers cu ON cu.id = n.customer_id
+        WHERE n.company_id=?
+        ORDER BY cu.id
+        """,
+        (company_id,),
+    ):
+        known.setdefault(r["name_key"], []).append(r)
+
+    clusters = customer_match.cluster_names(list(names) + list(known))
+    created_at = datetime.utcnow().isoformat()
+    linked = 0
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        for cluster in clusters:
+            unlinked = [n for n in cluster if n in names]
+            if not unlinked:
+                continue
+            keys = {customer_match.name_key(n) for n in cluster}
+            rows = {r["id"]: r for k in keys for r in known.get(k, [])}
+            if rows:
+                ordered = [rows[i] for i in sorted(rows)]
+                keep = ordered[0]
+                if any(
+                    r[col] and keep[col] and r[col] != keep[col]
+                    for r in ordered[1:]
+                    for col in ("phone", "email")
+                ):
+                    continue  # verschillende klanten met dezelfde naam: niet raden
+                customer_id = keep["id"]
+                _merge_customers(c, company_id, customer_id, [r["id"] for r in ordered[1:]])
+            else:
+                # meest gebruikte schrijfwijze wordt de naam; bij gelijkstand
+                # liever "Voornaam Achternaam" dan "achternaam, voornaam"
+                name = max(unlinked, key=lambda n: (names[n], "," not in n, n != n.lower(), n))
+                c.execute(
+                    "INSERT INTO customers (company_id, name, created_at) VALUES (?,?,?)",
+                    (company_id, name, created_at),
+                )
+                customer_id = c.lastrowid
+            _add_name_keys(c, company_id, customer_id, keys)
+            linked += c.execute(
+                """
+                UPDATE bookings SET customer_id=?
+                WHERE company_id=? AND customer_id IS NULL
+                  AND TRIM(customer) IN (SELECT value FROM json_each(?))
+                """,
+                (customer_id, company_id, json.dumps(unlinked)),
+            ).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return linked
+
+
+def backfill_customers(company_id: Optional[int] = None) -> int:
+    """
+    Koppel boekingen zonder klant aan klanten (zie customers_job.py).
+
+    Per bedrijf worden de losse namen uit bookings.customer samen met de
+    bestaande klanten geclusterd (customer_match.cluster_names); elk
+    cluster wordt één klant. Clusters met twee bestaande klanten met een
+    ander nummer of adres blijven ongemoeid. Idempotent; retourneert het
+    aantal gekoppelde boekingen.
+    """
+    conn = get_connection()
+    try:
+        if company_id is not None:
+            company_ids = [company_id]
+        else:
+            company_ids = [
+                r[0]
+                for r in conn.execute(
+                    "SELECT DISTINCT company_id FROM bookings WHERE customer_id IS NULL"
+                )
+            ]
+        return sum(_backfill_company(conn, cid) for cid in company_ids)
+    finally:
+        conn.close()
+
+
+# =============================
+# BOOKINGS
+# =============================
+BOOKING_STATUSES = {"scheduled", "completed", "no_show", "cancelled"}
+
+# Tijdvakken die de wachtlijst vasthoudt (waitlist.py): 'held' tijdens een
+# aanbod, 'released' als niemand bevestigde. Dat zijn geen afspraken: ze
+# staan niet in overzichten, lijsten en exports.
+HOLD_STATUSES = ("held", "released")
+
+# Geannuleerde afspraken en vrijgegeven tijdvakken houden geen tijd meer bezet.
+_BLOCKING_STATUS_SQL = "status NOT IN ('cancelled', 'released')"
+# Rijen die als afspraak getoond en geëxporteerd worden
+_LISTED_STATUS_SQL = "status NOT IN ('held', 'released')"
+
+# Vaste afspraak die op dag :day valt en daar nog geen boeking is
+# (zie materialize_recurring_bookings); zelfde regel als
+# slot_engine.occurrence_days.
+_RECURRING_ON_DAY_SQL = """
+    active = 1
+    AND start_day <= :day AND materialized_until < :day
+    AND (until_day IS NULL OR until_day >= :day)
+    AND (:day - start_day) % interval_days = 0
+    AND (occurrences IS NULL OR (:day - start_day) / interval_days < occurrences)
+"""
+
+
+def _next_free_id(c: sqlite3.Cursor, table: str) -> int:
+    """
+    Eerste vrije id voor `table`; ids daarna zijn ook vrij.
+
+    Alleen aanroepen binnen een schrijftransactie (BEGIN IMMEDIATE), zodat
+    niemand anders tussendoor rijen toevoegt. Met expliciete ids kunnen
+    bookings en booking_items samen via executemany worden ingevoegd.
+    """
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table,))
+    row = c.fetchone()
+    seq = int(row["seq"]) if row else 0
+    c.execute(f"SELECT COALESCE(MAX(id), 0) AS max_id FROM {table}")
+    max_id = int(c.fetchone()["max_id"])
+    return max(seq, max_id) + 1
+
+
+def _booking_item_row(booking_id: int, item: dict) -> tuple:
+    return (
+        booking_id,
+        item.get("service_id"),
+        item.get("name"),
+        item.get("price"),
+        item.get("duration"),
+    )
+
+
+def _insert_booking_items(c: sqlite3.Cursor, rows: List[tuple]) -> List[int]:
+    """
+    Voeg booking_items in één executemany toe; rows zijn
+    (booking_id, service_id, name, price, duration). Vereist een lopende
+    schrijftransactie. Retourneert de nieuwe ids in volgorde.
+    """
+    if not rows:
+        return []
+    first_id = _next_free_id(c, "booking_items")
+    ids = list(range(first_id, first_id + len(rows)))
+    c.executemany(
+        """
+        INSERT INTO booking_items (id, booking_id, service_id, name, price, duration)
+        VALUES (?,?,?,?,?,?)
+        """,
+        [(iid,) + tuple(row) for iid, row in zip(ids, rows)],
+    )
+    return ids
+
+
+class BookingConflict(NamedTuple):
+    """
+    Bestaande afspraak die het gevraagde tijdvak (deels) bezet. Een
+    negatief booking_id is een vaste afspraak die op die dag nog geen
+    boeking is: -id van de regel in recurring_bookings.
+    """
+
+    booking_id: int
+    date: str
+    start_time: str
+    end_time: str
+
+
+def _conflict(date_str: str, clash: tuple) -> BookingConflict:
+    return BookingConflict(
+        int(clash[2]), date_str, slot_engine.to_hhmm(clash[0]), slot_engine.to_hhmm(clash[1])
+    )
+
+
+def add_booking_with_items(
+    company_id: int,
+    customer: str,
+    date_str: str,
+    start_time: str,
+    items: Iterable[dict],
+    resource_id: Optional[int] = None,
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    notes: Optional[str] = None,
+) -> Union[int, BookingConflict]:
+    """
+    Boek een afspraak met één of meer diensten.
+
+    De overlap-check en de insert draaien in één BEGIN IMMEDIATE transactie:
+    gelijktijdige aanvragen (UI, publieke pagina, voicebot) wachten op elkaar
+    via busy_timeout en kunnen hetzelfde tijdvak dus nooit dubbel boeken.
+
+    Heeft het bedrijf resources (medewerkers, stoelen), dan krijgt de
+    afspraak de eerste resource die het tijdvak vrij heeft, of precies
+    `resource_id` als die is opgegeven.
+
+    De diensten volgen elkaar op (slot_engine.sequence_items); hun
+    voorbereidings- en opruimtijd moet ook vrij zijn en wordt bij de
+    boeking bewaard. De voorlooptijd geldt hier niet: de zaak kan altijd
+    zelf een afspraak inschrijven.
+
+    De boeking wordt gekoppeld aan een klant (zie _link_customer): op
+    `phone` of `email` als die gegeven zijn, anders op de naam.
+
+    Retourneert:
+        int             -> id van de nieuwe boeking (-1 bij onbekende resource)
+        BookingConflict -> het tijdvak overlapt met een bestaande afspraak
+    """
+    items = list(items)
+    total_price = sum(float(i.get("price", 0)) for i in items)
+
+    st_h, st_m = map(int, start_time.split(":"))
+    if not (0 <= st_h < 24 and 0 <= st_m < 60):
+        raise ValueError(f"ongeldige starttijd: {start_time}")
+    day_num = slot_engine.to_epoch_day(date_str)
+    start_m = st_h * 60 + st_m
+    start_time = slot_engine.to_hhmm(start_m)
+
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        # Schrijf-lock direct nemen, zodat check + insert atomair zijn.
+        c.execute("BEGIN IMMEDIATE")
+        before, total_minutes, after = _items_block(c, company_id, items)
+        end_m = start_m + total_minutes
+        end_time = slot_engine.to_hhmm(end_m % 1440)
+        resources, windows, busy = _day_schedule(c, company_id, date_str)
+        if resources == [None]:
+            candidates = [None]  # één gezamenlijke agenda
+        elif resource_id is None:
+            candidates = resources
+        elif resource_id in resources:
+            candidates = [resource_id]
+        else:
+            conn.rollback()
+            return -1
+        resource_id, clash = slot_engine.pick_resource(
+            candidates, windows, busy, start_m - before, end_m + after
+        )
+        if clash is not None:
+            conn.rollback()
+            return _conflict(date_str, clash)
+
+        customer_id = _link_customer(c, company_id, customer, phone, email)
+        c.execute(
+            """
+            INSERT INTO bookings (
+                company_id, customer, date, start_time, end_time,
+                total_price, status, created_at, resource_id,
+                day_num, start_min, end_min, buffer_before, buffer_after, customer_id, notes
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                company_id,
+                customer,
+                date_str,
+                start_time,
+                end_time,
+                total_price,
+                "scheduled",
+                datetime.utcnow().isoformat(),
+                resource_id,
+                day_num,
+                start_m,
+                end_m,
+                before,
+                after,
+                customer_id,
+                (notes or "").strip() or None,
+            ),
+        )
+        bid = c.lastrowid
+        _insert_booking_items(c, [_booking_item_row(bid, it) for it in items])
+        _bump_slot_days(c, company_id, [day_num])
+
+        conn.commit()
+        return bid
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def add_booking_items(booking_id: int, items: Iterable[dict]) -> Union[List[int], BookingConflict]:
+    """
+    Voeg extra diensten toe aan een bestaande boeking.
+
+    De afspraak wordt langer: eindtijd, buffers en totaalprijs worden in
+    dezelfde transactie herberekend, en de verlengde afspraak mag niet
+    botsen met een andere (geannuleerde boekingen worden niet gecontroleerd).
+
+    Retourneert:
+        list            -> ids van de nieuwe items ([] bij onbekende boeking)
+        BookingConflict -> de verlengde afspraak overlapt met een andere
+    """
+    items = list(items)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        booking = c.execute(
+            """
+            SELECT company_id, date, day_num, start_min, total_price, status, resource_id
+            FROM bookings WHERE id=?
+            """,
+            (booking_id,),
+        ).fetchone()
+        if booking is None:
+            conn.rollback()
+            return []
+        company_id = booking["company_id"]
+        existing = [
+            dict(r)
+            for r in c.execute(
+                "SELECT service_id, duration FROM booking_items WHERE booking_id=? ORDER BY id",
+                (booking_id,),
+            )
+        ]
+        before, total_minutes, after = _items_block(c, company_id, existing + items)
+        start_m = booking["start_min"]
+        end_m = start_m + total_minutes
+        resource_id = booking["resource_id"]
+
+        if booking["status"] != "cancelled":
+            resources, windows, busy = _day_schedule(c, company_id, booking["date"])
+            # de boeking zelf telt niet als bezetting
+            busy = {r: [b for b in entries if b[2] != booking_id] for r, entries in busy.items()}
+            candidates = [resource_id] if resource_id in resources else resources
+            picked, clash = slot_engine.pick_resource(
+                candidates, windows, busy, start_m - before, end_m + after
+            )
+            if clash is not None:
+                conn.rollback()
+                return _conflict(booking["date"], clash)
+            if picked is not None:
+                resource_id = picked
+
+        ids = _insert_booking_items(c, [_booking_item_row(booking_id, it) for it in items])
+        c.execute(
+            """
+            UPDATE bookings
+            SET end_time=?, end_min=?, buffer_before=?, buffer_after=?,
+                total_price=?, resource_id=?
+            WHERE id=?
+            """,
+            (
+                slot_engine.to_hhmm(end_m % 1440),
+                end_m,
+                before,
+                after,
+                float(booking["total_price"] or 0) + sum(float(i.get("price", 0)) for i in items),
+                resource_id,
+                booking_id,
+            ),
+        )
+        _bump_slot_days(c, company_id, [booking["day_num"]])
+        conn.commit()
+        return ids
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def list_bookings(company_id: int, date_str: Optional[str] = None) -> List[Booking]:
+    """Boekingen (nieuwste eerst), optioneel van één dag (JJJJ-MM-DD)."""
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT {Booking.COLUMNS}
+        FROM bookings
+        WHERE company_id=? AND {_LISTED_STATUS_SQL} {"AND date=?" if date_str else ""}
+        ORDER BY date DESC, start_time DESC
+        """,
+        (company_id, date_str) if date_str else (company_id,),
+    ).fetchall()
+    conn.close()
+    return [Booking(*r) for r in rows]
+
+
+def set_booking_notes(company_id: int, booking_id: int, notes: Optional[str]) -> bool:
+    """Notitie bij een boeking (leeg = wissen); doorzoekbaar via search.py."""
+    conn = get_connection()
+    cur = conn.execute(
+        "UPDATE bookings SET notes=? WHERE id=? AND company_id=?",
+        ((notes or "").strip() or None, booking_id, company_id),
+    )
+    conn.commit()
+    conn.close()
+    return cur.rowcount > 0
+
+
+def update_booking_status(
+    company_id: int, booking_id: int, status: str
+) -> bool:
+    """
+    Wijzig de status. Wordt een afspraak geannuleerd, dan krijgt de
+    wachtlijst meteen een kans op het vrijgekomen tijdvak (zie waitlist.py).
+    """
+    status = status.lower().strip()
+    if status not in BOOKING_STATUSES:
+        return False
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute(
+            """
+            SELECT status, date, day_num, start_min, resource_id
+            FROM bookings
+            WHERE id=? AND company_id=?
+            """,
+            (booking_id, company_id),
+        )
+        row = c.fetchone()
+        if row is None:
+            conn.rollback()
+            return False
+        c.execute("UPDATE bookings SET status=? WHERE id=?", (status, booking_id))
+        _bump_slot_days(c, company_id, [row["day_num"]])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    if status == "cancelled" and row["status"] != "cancelled":
+        try:
+            import waitlist
+
+            waitlist.match_freed_slot(company_id, row["date"], row["start_min"], row["resource_id"])
+        except Exception as e:
+            print("waitlist error:", e)
+    return True
+
+
+# =============================
+# VASTE AFSPRAKEN (herhalend)
+# =============================
+# Hoe ver vooruit vaste afspraken echte boekingen worden (herinneringen,
+# overzichten). Daarna telt de slot-berekening ze rechtstreeks uit de regel.
+RECURRING_HORIZON_DAYS = 28
+# Bij het aanmaken wordt minstens zo ver vooruit op botsingen gecontroleerd.
+RECURRING_CHECK_DAYS = 365
+
+
+def add_recurring_booking(
+    company_id: int,
+    customer: str,
+    first_date: ddate,
+    start_time: str,
+    items: Iterable[dict],
+    interval_weeks: int = 4,
+    occurrences: Optional[int] = None,
+    until: Optional[ddate] = None,
+    resource_id: Optional[int] = None,
+) -> Union[int, BookingConflict]:
+    """
+    Vaste afspraak: elke `interval_weeks` weken op de weekdag van
+    first_date, `occurrences` keer of tot en met `until` (beide leeg =
+    onbeperkt).
+
+    Elke keer in het eerste jaar (en op alle dagen waar al boekingen
+    staan) moet vrij zijn. Zonder resource_id krijgt de regel de eerste
+    resource die op al die dagen vrij is. De komende
+    RECURRING_HORIZON_DAYS worden meteen boekingen.
+
+    Retourneert:
+        int             -> id van de regel (-1 bij ongeldige invoer)
+        BookingConflict -> de eerste keer die botst
+    """
+    items = list(items)
+    if interval_weeks < 1 or (occurrences is not None and occurrences < 1):
+        return -1
+    if until is not None and until < first_date:
+        return -1
+    total_price = sum(float(i.get("price", 0)) for i in items)
+    st_h, st_m = map(int, start_time.split(":"))
+    if not (0 <= st_h < 24 and 0 <= st_m < 60):
+        return -1
+    start_m = st_h * 60 + st_m
+    start_day = slot_engine.to_epoch_day(first_date)
+    until_day = slot_engine.to_epoch_day(until) if until else None
+    interval_days = 7 * interval_weeks
+
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        before, total_minutes, after = _items_block(c, company_id, items)
+        end_m = start_m + total_minutes
+        c.execute(
+            "SELECT COALESCE(MAX(day_num), 0) AS last_day FROM bookings WHERE company_id=?",
+            (company_id,),
+        )
+        check_until = max(
+            c.fetchone()["last_day"],
+            slot_engine.to_epoch_day(ddate.today()) + RECURRING_CHECK_DAYS,
+        )
+        days = [
+            slot_engine.from_epoch_day(d).isoformat()
+            for d in slot_engine.occurrence_days(
+                start_day, interval_days, occurrences, until_day, start_day, check_until
+            )
+        ]
+        schedules = [_day_schedule(c, company_id, d) for d in days]
+
+        resources = _effective_day(c, company_id, first_date.isoformat()).resources
+        if resources == [None]:
+            candidates = [None]
+        elif resource_id is None:
+            candidates = resources
+        elif resource_id in resources:
+            candidates = [resource_id]
+        else:
+            conn.rollback()
+            return -1
+
+        first_conflict = None
+        for candidate in candidates:
+            clash = None
+            for d, (_, windows, busy) in zip(days, schedules):
+                _, hit = slot_engine.pick_resource(
+                    [candidate], windows, busy, start_m - before, end_m + after
+                )
+                if hit is not None:
+                    clash = _conflict(d, hit)
+                    break
+            if clash is None:
+                resource_id = candidate
+                break
+            first_conflict = first_conflict or clash
+        else:
+            conn.rollback()
+            return first_conflict
+
+        c.execute(
+            """
+            INSERT INTO recurring_bookings (
+                company_id, customer, resource_id, start_date, start_time, end_time,
+                start_day, start_min, end_min, buffer_before, buffer_after,
+                interval_days, occurrences, until_date, until_day, items,
+                total_price, materialized_until, created_at, customer_id
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                company_id,
+                customer,
+                resource_id,
+                first_date.isoformat(),
+                slot_engine.to_hhmm(start_m),
+                slot_engine.to_hhmm(end_m % 1440),
+                start_day,
+                start_m,
+                end_m,
+                before,
+                after,
+                interval_days,
+                occurrences,
+                until.isoformat() if until else None,
+                until_day,
+                json.dumps(items),
+                total_price,
+                start_day - 1,
+                datetime.utcnow().isoformat(),
+                _link_customer(c, company_id, customer),
+            ),
+        )
+        rule_id = c.lastrowid
+        # onbegrensd aantal dagen: het hele rooster van dit bedrijf ongeldig
+        _bump_schedule_version(c, company_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    materialize_recurring_bookings(company_id=company_id)
+    return rule_id
+
+
+def list_recurring_bookings(company_id: int, active_only: bool = True) -> List[RecurringBooking]:
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT {RecurringBooking.COLUMNS}
+        FROM recurring_bookings
+        WHERE company_id=? {"AND active=1" if active_only else ""}
+        ORDER BY start_min, id
+        """,
+        (company_id,),
+    ).fetchall()
+    conn.close()
+    return [RecurringBooking(*r) for r in rows]
+
+
+def stop_recurring_booking(
+    company_id: int, rule_id: int, from_date: Optional[ddate] = None
+) -> bool:
+    """
+    Vaste afspraak stopzetten vanaf from_date (standaard vandaag): de regel
+    eindigt de dag ervoor en al aangemaakte boekingen vanaf die dag worden
+    geannuleerd.
+    """
+    from_day = slot_engine.to_epoch_day(from_date or ddate.today())
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute(
+            "SELECT start_day, until_day FROM recurring_bookings WHERE id=? AND company_id=?",
+            (rule_id, company_id),
+        )
+        rule = c.fetchone()
+        if rule is None:
+            conn.rollback()
+            return False
+        until_day = from_day - 1
+        if rule["until_day"] is not None:
+            until_day = min(until_day, rule["until_day"])
+        c.execute(
+            """
+            UPDATE recurring_bookings
+            SET until_day=?, until_date=?, active=?
+            WHERE id=?
+            """,
+            (
+                until_day,
+                slot_engine.from_epoch_day(until_day).isoformat(),
+                0 if until_day < rule["start_day"] else 1,
+                rule_id,
+            ),
+        )
+        c.execute(
+            """
+            SELECT day_num FROM bookings
+            WHERE recurring_id=? AND day_num >= ? AND status='scheduled'
+            """,
+            (rule_id, from_day),
+        )
+        days = [r["day_num"] for r in c.fetchall()]
+        c.execute(
+            """
+            UPDATE bookings SET status='cancelled'
+            WHERE recurring_id=? AND day_num >= ? AND status='scheduled'
+            """,
+            (rule_id, from_day),
+        )
+        _bump_slot_days(c, company_id, days)
+        _bump_schedule_version(c, company_id)
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def materialize_recurring_bookings(
+    horizon_days: int = RECURRING_HORIZON_DAYS,
+    today: Optional[ddate] = None,
+    company_id: Optional[int] = None,
+) -> int:
+    """
+    Maak van alle vaste afspraken de keren tot `horizon_days` na vandaag
+    echte boekingen (idempotent; bedoeld voor een dagelijkse job, zie
+    recurring_job.py). Retourneert het aantal nieuwe boekingen.
+    """
+    horizon = slot_engine.to_epoch_day(today or ddate.today()) + horizon_days
+    created_at = datetime.utcnow().isoformat()
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute(
+            f"""
+            SELECT id, company_id, customer, customer_id, resource_id, start_day, start_min, end_min,
+                   buffer_before, buffer_after,
+                   start_time, end_time, interval_days, occurrences, until_day,
+                   items, total_price, materialized_until
+            FROM recurring_bookings
+            WHERE active=1 AND materialized_until < ? {"AND company_id=?" if company_id else ""}
+            """,
+            (horizon, company_id) if company_id else (horizon,),
+        )
+        rules = c.fetchall()
+
+        booking_rows = []
+        item_rows = []
+        touched = {}
+        next_id = _next_free_id(c, "bookings")
+        for r in rules:
+            items = json.loads(r["items"])
+            for day in slot_engine.occurrence_days(
+                r["start_day"], r["interval_days"], r["occurrences"], r["until_day"],
+                r["materialized_until"] + 1, horizon,
+            ):
+                booking_rows.append(
+                    (
+                        next_id,
+                        r["company_id"],
+                        r["customer"],
+                        slot_engine.from_epoch_day(day).isoformat(),
+                        r["start_time"],
+                        r["end_time"],
+                        r["total_price"],
+                        "scheduled",
+                        created_at,
+                        r["resource_id"],
+                        day,
+                        r["start_min"],
+                        r["end_min"],
+                        r["buffer_before"],
+                        r["buffer_after"],
+                        r["id"],
+                        r["customer_id"],
+                    )
+                )
+                item_rows.extend(_booking_item_row(next_id, it) for it in items)
+                touched.setdefault(r["company_id"], []).append(day)
+                next_id += 1
+
+        c.executemany(
+            """
+            INSERT INTO bookings (
+                id, company_id, customer, date, start_time, end_time, total_price,
+                status, created_at, resource_id, day_num, start_min, end_min,
+                buffer_before, buffer_after, recurring_id, customer_id
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            booking_rows,
+        )
+        _insert_booking_items(c, item_rows)
+        c.executemany(
+            "UPDATE recurring_bookings SET materialized_until=? WHERE id=?",
+            [(horizon, r["id"]) for r in rules],
+        )
+        for cid, days in touched.items():
+            _bump_slot_days(c, cid, days)
+        conn.commit()
+        return len(booking_rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# =============================
+# REMINDER SETTINGS
+# =============================
+def upsert_reminder_settings(
+    company_id: int,
+    active: bool,
+    rem1_days_before: int,
+    rem1_time: str,
+    rem1_sms: bool,
+    rem1_whatsapp: bool,
+    rem1_email: bool,
+    rem1_message_sms: str,
+    rem1_message_whatsapp: str,
+    rem1_message_email: str,
+    rem2_minutes_before: int,
+    rem2_sms: bool,
+    rem2_whatsapp: bool,
+    rem2_email: bool,
+    rem2_message_sms: str,
+    rem2_message_whatsapp: str,
+    rem2_message_email: str,
+) -> bool:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            INSERT INTO reminder_settings (
+                company_id,
+                active,
+                rem1_days_before,
+                rem1_time,
+                rem1_sms,
+                rem1_whatsapp,
+                rem1_email,
+                rem1_message_sms,
+                rem1_message_whatsapp,
+                rem1_message_email,
+                rem2_minutes_before,
+                rem2_sms,
+                rem2_whatsapp,
+                rem2_email,
+                rem2_message_sms,
+                rem2_message_whatsapp,
+                rem2_message_email
+            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            ON CONFLICT(company_id) DO UPDATE SET
+                active                = excluded.active,
+                rem1_days_before      = excluded.rem1_days_before,
+                rem1_time             = excluded.rem1_time,
+                rem1_sms              = excluded.rem1_sms,
+                rem1_whatsapp         = excluded.rem1_whatsapp,
+                rem1_email            = excluded.rem1_email,
+                rem1_message_sms      = excluded.rem1_message_sms,
+                rem1_message_whatsapp = excluded.rem1_message_whatsapp,
+                rem1_message_email    = excluded.rem1_message_email,
+                rem2_minutes_before   = excluded.rem2_minutes_before,
+                rem2_sms              = excluded.rem2_sms,
+                rem2_whatsapp         = excluded.rem2_whatsapp,
+                rem2_email            = excluded.rem2_email,
+                rem2_message_sms      = excluded.rem2_message_sms,
+                rem2_message_whatsapp = excluded.rem2_message_whatsapp,
+                rem2_message_email    = excluded.rem2_message_email
+            """,
+            (
+                company_id,
+                1 if active else 0,
+                int(rem1_days_before),
+                rem1_time,
+                1 if rem1_sms else 0,
+                1 if rem1_whatsapp else 0,
+                1 if rem1_email else 0,
+                rem1_message_sms,
+                rem1_message_whatsapp,
+                rem1_message_email,
+                int(rem2_minutes_before),
+                1 if rem2_sms else 0,
+                1 if rem2_whatsapp else 0,
+                1 if rem2_email else 0,
+                rem2_message_sms,
+                rem2_message_whatsapp,
+                rem2_message_email,
+            ),
+        )
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
+# =============================
+# MESSAGE BUNDLES & USAGE
+# =============================
+
+def ensure_message_balance(company_id: int):
+    """Zorg dat er een message_balances record bestaat voor deze company."""
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            INSERT OR IGNORE INTO message_balances (company_id)
+            VALUES (?)
+            """,
+            (company_id,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_message_balances(company_id: int) -> dict:
+    """Geef de huidige balans terug voor WhatsApp, SMS en e-mail."""
+    ensure_message_balance(company_id)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            SELECT whatsapp_credits, sms_credits, email_limit, email_used
+            FROM message_balances
+            WHERE company_id = ?
+            """,
+            (company_id,),
+        )
+        row = c.fetchone()
+    finally:
+        conn.close()
+
+    if not row:
+        # Fallback defaults
+        return dict(
+            whatsapp_credits=0,
+            sms_credits=0,
+            email_limit=1000,
+            email_used=0,
+        )
+
+    return dict(row)
+
+
+def add_whatsapp_credits(company_id: int, amount: int):
+    """Verhoog WhatsApp-tegoed."""
+    ensure_message_balance(company_id)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            UPDATE message_balances
+            SET whatsapp_credits = whatsapp_credits + ?
+            WHERE company_id = ?
+            """,
+            (int(amount), company_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def add_sms_credits(company_id: int, amount: int):
+    """Verhoog SMS-tegoed."""
+    ensure_message_balance(company_id)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            UPDATE message_balances
+            SET sms_credits = sms_credits + ?
+            WHERE company_id = ?
+            """,
+            (int(amount), company_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def add_email_limit(company_id: int, extra_limit: int):
+    """Verhoog de e-mail limiet."""
+    ensure_message_balance(company_id)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            UPDATE message_balances
+            SET email_limit = email_limit + ?
+            WHERE company_id = ?
+            """,
+            (int(extra_limit), company_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# Conditionele UPDATE per type: aftrekken en controleren in één statement,
+# zodat gelijktijdige verzenders samen nooit meer dan het tegoed gebruiken.
+_CREDIT_UPDATES = {
+    "whatsapp": "SET whatsapp_credits = whatsapp_credits - :n WHERE company_id = :cid AND whatsapp_credits >= :n",
+    "sms": "SET sms_credits = sms_credits - :n WHERE company_id = :cid AND sms_credits >= :n",
+    "email": "SET email_used = email_used + :n WHERE company_id = :cid AND email_used + :n <= email_limit",
+}
+
+
+def _consume_message_credit(
+    c: sqlite3.Cursor, company_id: int, msg_type: str, count: int = 1
+) -> bool:
+    """Verbruik binnen de transactie van de aanroeper; False = onvoldoende tegoed / onbekend type."""
+    update = _CREDIT_UPDATES.get(msg_type.lower())
+    if update is None:
+        return False
+    c.execute("INSERT OR IGNORE INTO message_balances (company_id) VALUES (?)", (company_id,))
+    c.execute(f"UPDATE message_balances {update}", {"n": int(count), "cid": company_id})
+    return c.rowcount > 0
+
+
+def register_message_usage(company_id: int, msg_type: str, count: int = 1) -> bool:
+    """
+    Registreer verbruik:
+    - 'whatsapp' en 'sms' trekken credits af.
+    - 'email' verhoogt email_used (tot aan email_limit).
+
+    Retourneert:
+        True  -> succesvol geregistreerd
+        False -> onvoldoende tegoed / onbekend type
+    """
+    conn = get_connection()
+    try:
+        ok = _consume_message_credit(conn.cursor(), company_id, msg_type, count)
+        conn.commit()
+        return ok
+    finally:
+        conn.close()
+
+
+def _queue_message(
+    c: sqlite3.Cursor, company_id: int, channel: str, recipient: str, body: str
+) -> None:
+    """Bericht in de wachtrij zetten (verstuurd door waitlist_job.py)."""
+    c.execute(
+        """
+        INSERT INTO outbound_messages (company_id, channel, recipient, body, created_at)
+        VALUES (?,?,?,?,?)
+        """,
+        (company_id, channel, recipient, body, datetime.utcnow().isoformat()),
+    )
+
+
+def list_queued_messages(channels: Iterable[str] = ("sms", "whatsapp"), limit: int = 100) -> List[dict]:
+    """Oudste berichten die nog verstuurd moeten worden."""
+    channels = list(channels)
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT id, company_id, channel, recipient, body
+        FROM outbound_messages
+        WHERE status='queued' AND channel IN ({",".join("?" * len(channels))})
+        ORDER BY id
+        LIMIT ?
+        """,
+        (*channels, limit),
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+def mark_message_sent(message_id: int, ok: bool = True) -> None:
+    conn = get_connection()
+    try:
+        conn.execute(
+            "UPDATE outbound_messages SET status=?, sent_at=? WHERE id=?",
+            ("sent" if ok else "failed", datetime.utcnow().isoformat(), message_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_message_usage_summary(company_id: int) -> dict:
+    """
+    Simpele helper voor de UI:
+    Geeft dezelfde dict als get_message_balances:
+    {
+        "whatsapp_credits": int,
+        "sms_credits": int,
+        "email_limit": int,
+        "email_used": int,
+    }
+    """
+    return get_message_balances(company_id)
@@ -0,0 +1,236 @@
+"""
+Meetlaag voor alle SQLite-toegang.
+
+db_core.get_connection maakt verbindingen met InstrumentedConnection; elke
+cursor (ook die van conn.execute en pandas.read_sql_query) meet dan de duur
+van execute/executemany/executescript. Per verbinding wordt onthouden
+welke functie haar opende, zodat tijden per databasefunctie én per
+SQL-statement worden opgeteld:
+
+- proces-totaal: totals() (alle threads samen);
+- per Streamlit-rerun: start_rerun() aan het begin van het script, daarna
+  rerun_stats() voor het debugpaneel (thread-lokaal, want Streamlit draait
+  elke sessie in een eigen scriptthread).
+
+Statements boven DB_SLOW_QUERY_MS (standaard 100 ms) gaan naar de logger
+"dor.db.slow" (en, met DB_SLOW_QUERY_LOG=<pad>, naar dat bestand) en naar
+recent_slow_queries(). Parameters worden nooit gelogd, alleen hun types.
+De gemeten tijd is die van het uitvoeren zelf; rijen die later met
+fetchall() worden opgehaald vallen er (grotendeels) buiten.
+
+Uitzetten kan met DB_METRICS=0.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional
+
+ENABLED = os.getenv("DB_METRICS", "1") not in ("0", "false", "False", "")
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+MAX_SLOW_QUERIES = 200
+
+slow_log = logging.getLogger("dor.db.slow")
+if os.getenv("DB_SLOW_QUERY_LOG") and not slow_log.handlers:
+    _handler = logging.FileHandler(os.environ["DB_SLOW_QUERY_LOG"], encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_log.addHandler(_handler)
+    slow_log.setLevel(logging.WARNING)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Eén regel, literals vervangen door ?; dient als sleutel per statement."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def redact_params(params) -> str:
+    """Toon alleen de types van gebonden parameters, nooit de waarden."""
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    try:
+        return "(" + ", ".join(type(v).__name__ for v in params) + ")"
+    except TypeError:
+        return f"<{type(params).__name__}>"
+
+
+class Stat:
+    __slots__ = ("count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float, n: int = 1) -> None:
+        self.count += n
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class Collector:
+    """Tellers per functie en per genormaliseerd statement."""
+
+    def __init__(self):
+        self.by_function: Dict[str, Stat] = {}
+        self.by_sql: Dict[str, Stat] = {}
+        self.queries = 0
+        self.total_ms = 0.0
+        self.started = time.time()
+
+    def add(self, function: str, sql: str, ms: float) -> None:
+        self.queries += 1
+        self.total_ms += ms
+        stat = self.by_function.get(function)
+        if stat is None:
+            stat = self.by_function[function] = Stat()
+        stat.add(ms)
+        stat = self.by_sql.get(sql)
+        if stat is None:
+            stat = self.by_sql[sql] = Stat()
+        stat.add(ms)
+
+    def as_dict(self, top: Optional[int] = None) -> dict:
+        def ranked(stats: Dict[str, Stat]) -> List[dict]:
+            rows = sorted(stats.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+            return [{"name": k, **v.as_dict()} for k, v in rows[:top]]
+
+        return {
+            "queries": self.queries,
+            "total_ms": round(self.total_ms, 3),
+            "functions": ranked(self.by_function),
+            "statements": ranked(self.by_sql),
+        }
+
+
+_totals = Collector()
+_totals_lock = threading.Lock()
+_local = threading.local()
+_slow: Deque[dict] = deque(maxlen=MAX_SLOW_QUERIES)
+
+
+def _record(function: str, sql: str, params, ms: float) -> None:
+    key = normalize_sql(sql)
+    with _totals_lock:
+        _totals.add(function, key, ms)
+    rerun = getattr(_local, "collector", None)
+    if rerun is not None:
+        rerun.add(function, key, ms)
+
+    if ms >= SLOW_QUERY_MS:
+        entry = {
+            "at": time.time(),
+            "function": function,
+            "ms": round(ms, 3),
+            "sql": key,
+            "params": redact_params(params),
+        }
+        _slow.append(entry)
+        slow_log.warning(
+            "trage query (%.1f ms) in %s: %s params=%s",
+            ms, function, key, entry["params"],
+        )
+
+
+# =============================
+# sqlite3-factories
+# =============================
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record(self.connection.owner, sql, parameters, (time.perf_counter() - start) * 1000)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record(self.connection.owner, sql, None, (time.perf_counter() - start) * 1000)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record(self.connection.owner, "<script>", None, (time.perf_counter() - start) * 1000)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    owner = "?"
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # conn.execute() gebruikt intern niet self.cursor(); daarom apart
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def caller_name(depth: int = 2) -> str:
+    """module.functie van de aanroeper van de aanroeper (goedkoop via frames)."""
+    frame = sys._getframe(depth)
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_name}"
+
+
+# =============================
+# Uitlezen
+# =============================
+def start_rerun() -> None:
+    """Begin een nieuwe meting voor de huidige thread (bv. Streamlit-rerun)."""
+    _local.collector = Collector()
+
+
+def rerun_stats(top: Optional[int] = 10) -> Optional[dict]:
+    collector = getattr(_local, "collector", None)
+    return collector.as_dict(top) if collector is not None else None
+
+
+def totals(top: Optional[int] = 20) -> dict:
+    with _totals_lock:
+        return _totals.as_dict(top)
+
+
+def recent_slow_queries(limit: int = 20) -> List[dict]:
+    return list(_slow)[-limit:][::-1]
+
+
+def reset() -> None:
+    global _totals
+    with _totals_lock:
+        _totals = Collector()
+    _slow.clear()
+    _local.__dict__.pop("collector", None)
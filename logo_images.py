@@ -0,0 +1,128 @@
+"""
+Logo-verwerking: validatie, verkleinen en content-addressed opslag.
+
+Een upload wordt één keer verwerkt tot vaste varianten, elk onder een
+bestandsnaam op basis van de inhoud:
+
+    data/logos/<sha256[:16]>_header.webp    (kop van de beheeromgeving)
+    data/logos/<sha256[:16]>_catalog.webp   (catalogus, accountpagina)
+
+companies.logo_path verwijst naar de header-variant; de andere variant
+ligt ernaast (zie logo_variant_path). Omdat de inhoud de naam bepaalt,
+veranderen bestanden nooit en kunnen de bytes veilig in het geheugen
+worden gecachet (read_logo_bytes). Pillow komt mee met qrcode[pil].
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+LOGO_DIR = os.path.join("data", "logos")
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_SOURCE_PIXELS = 40_000_000
+
+# variant -> maximale (breedte, hoogte); verhouding blijft behouden
+LOGO_VARIANTS = {
+    "header": (480, 240),
+    "catalog": (192, 192),
+}
+
+_FORMAT, _EXT = ("WEBP", ".webp") if features.check("webp") else ("PNG", ".png")
+_CONTENT_NAME = re.compile(r"^[0-9a-f]{16}_[a-z]+\.(webp|png)$")
+
+
+def _variant_name(digest: str, variant: str) -> str:
+    return f"{digest}_{variant}{_EXT}"
+
+
+def process_logo(data: bytes) -> Dict[str, str]:
+    """
+    Valideer en verklein een geüpload logo en schrijf alle varianten weg.
+    Retourneert {variant: pad}. Gooit ValueError bij een ongeldige upload.
+    """
+    if not data:
+        raise ValueError("Leeg bestand.")
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ValueError("Logo is te groot (max. 10 MB).")
+
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            probe.verify()
+        img = Image.open(io.BytesIO(data))
+        if img.width * img.height > MAX_SOURCE_PIXELS:
+            raise ValueError("Afbeelding heeft te veel pixels.")
+        img.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValueError("Ongeldige afbeelding (gebruik PNG of JPG).") from e
+
+    # telefoonfoto's: EXIF-rotatie toepassen; transparantie behouden
+    img = ImageOps.exif_transpose(img)
+    img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    os.makedirs(LOGO_DIR, exist_ok=True)
+
+    paths: Dict[str, str] = {}
+    for variant, box in LOGO_VARIANTS.items():
+        path = os.path.join(LOGO_DIR, _variant_name(digest, variant))
+        if not os.path.exists(path):
+            out = img.copy()
+            out.thumbnail(box, Image.LANCZOS)
+            buf = io.BytesIO()
+            if _FORMAT == "WEBP":
+                out.save(buf, _FORMAT, quality=85, method=6)
+            else:
+                out.save(buf, _FORMAT, optimize=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(buf.getvalue())
+            os.replace(tmp, path)
+        paths[variant] = path
+    return paths
+
+
+def logo_variant_path(logo_path: Optional[str], variant: str) -> Optional[str]:
+    """
+    Pad van een variant naast het opgeslagen logo. Voor oude logo's (nog
+    niet via deze pipeline geüpload) wordt het originele pad teruggegeven.
+    """
+    if not logo_path:
+        return None
+    folder, name = os.path.split(logo_path)
+    stem = os.path.splitext(name)[0]
+    if stem.endswith("_header"):
+        candidate = os.path.join(folder, _variant_name(stem[: -len("_header")], variant))
+        if os.path.isfile(candidate):
+            return candidate
+    return logo_path
+
+
+def _is_content_addressed(path: str) -> bool:
+    return bool(_CONTENT_NAME.match(os.path.basename(path)))
+
+
+@lru_cache(maxsize=64)
+def _read_cached(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def read_logo_bytes(logo_path: Optional[str], variant: str = "header") -> Optional[bytes]:
+    """Bytes van een logo-variant, uit de geheugencache (None als het ontbreekt)."""
+    path = logo_variant_path(logo_path, variant)
+    if not path:
+        return None
+    try:
+        if _is_content_addressed(path):
+            return _read_cached(path)
+        # oude uploads (company_<id>.<ext>) kunnen overschreven worden
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
@@ -0,0 +1,158 @@
+"""
+Lichte rijobjecten voor de drukke leespaden.
+
+db_core.list_services / list_availability / list_bookings geven lijsten
+van deze objecten terug in plaats van DataFrames. Ze hebben __slots__
+(geen dict per rij) en worden rechtstreeks uit sqlite3.Row-tuples gebouwd.
+Alleen waar iets getoond wordt, zet to_frame() ze om naar pandas; pandas
+wordt pas dan geïmporteerd.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Optional, Sequence
+
+
+@dataclass(slots=True)
+class Service:
+    id: int
+    name: str
+    price: float
+    duration: int
+    category: Optional[str]
+    description: Optional[str]
+    is_active: int
+    # voorbereidings- en opruimtijd (minuten) en raster; None = automatisch
+    buffer_before: int = 0
+    buffer_after: int = 0
+    slot_step: Optional[int] = None
+
+    COLUMNS = (
+        "id, name, price, duration, category, description, is_active, "
+        "buffer_before, buffer_after, slot_step"
+    )
+
+
+@dataclass(slots=True)
+class Resource:
+    id: int
+    name: str
+    kind: str
+    is_active: int
+
+    COLUMNS = "id, name, kind, is_active"
+
+
+@dataclass(slots=True)
+class AvailabilityWindow:
+    id: int
+    day: str
+    start_time: str
+    end_time: str
+    resource_id: Optional[int] = None  # None = geldt voor de hele zaak
+    # gehele kolommen voor het rekenwerk (0 = maandag, minuten sinds 00:00)
+    weekday: int = 0
+    start_min: int = 0
+    end_min: int = 0
+
+    COLUMNS = "id, day, start_time, end_time, resource_id, weekday, start_min, end_min"
+    DISPLAY = ["id", "day", "start_time", "end_time", "resource_id"]
+
+
+@dataclass(slots=True)
+class AvailabilityException:
+    id: int
+    start_date: str
+    end_date: str
+    kind: str  # 'closed' of 'open'
+    start_time: Optional[str]  # None = hele dag
+    end_time: Optional[str]
+    resource_id: Optional[int]
+    note: Optional[str]
+
+    COLUMNS = "id, start_date, end_date, kind, start_time, end_time, resource_id, note"
+
+
+@dataclass(slots=True)
+class Booking:
+    id: int
+    customer: Optional[str]
+    date: str
+    start_time: str
+    end_time: str
+    total_price: Optional[float]
+    status: str
+    resource_id: Optional[int] = None
+    notes: Optional[str] = None
+
+    COLUMNS = "id, customer, date, start_time, end_time, total_price, status, resource_id, notes"
+
+
+@dataclass(slots=True)
+class Customer:
+    id: int
+    name: str
+    phone: Optional[str]  # genormaliseerd: +landcode
+    email: Optional[str]  # kleine letters
+    bookings: int = 0
+    last_date: Optional[str] = None
+
+    COLUMNS = "cu.id, cu.name, cu.phone, cu.email"
+
+
+@dataclass(slots=True)
+class RecurringBooking:
+    id: int
+    customer: Optional[str]
+    start_date: str
+    start_time: str
+    end_time: str
+    interval_weeks: int
+    occurrences: Optional[int]  # None = onbeperkt
+    until_date: Optional[str]
+    resource_id: Optional[int]
+    total_price: float
+    active: int
+
+    COLUMNS = (
+        "id, customer, start_date, start_time, end_time, interval_days / 7, "
+        "occurrences, until_date, resource_id, total_price, active"
+    )
+
+
+@dataclass(slots=True)
+class WaitlistEntry:
+    id: int
+    customer: str
+    contact: str
+    channel: str  # 'sms', 'whatsapp' of 'email'
+    from_date: str
+    to_date: str
+    earliest_min: Optional[int]  # None = geen voorkeur
+    latest_min: Optional[int]
+    duration: int
+    resource_id: Optional[int]
+    status: str  # 'waiting', 'offered', 'booked' of 'cancelled'
+
+    COLUMNS = (
+        "id, customer, contact, channel, from_date, to_date, earliest_min, "
+        "latest_min, duration, resource_id, status"
+    )
+
+
+@dataclass(slots=True)
+class SearchHit:
+    kind: str  # 'customer', 'service' of 'booking'
+    ref_id: int
+    title: str  # treffers tussen ** (markdown)
+    snippet: str
+    detail: Optional[str] = None  # boeking: datum en uur
+
+
+def to_frame(rows: Sequence, model: type, columns: Optional[Sequence[str]] = None):
+    """Zet rijobjecten om naar een DataFrame (ook leeg, met de juiste kolommen)."""
+    import pandas as pd
+
+    names = [f.name for f in fields(model)]
+    df = pd.DataFrame([[getattr(r, n) for n in names] for r in rows], columns=names)
+    return df[list(columns)] if columns is not None else df
@@ -2,13 +2,9 @@ from __future__ import annotations
 
 import streamlit as st
 
-from database import (
-    init_db,
-    get_public_services,
-    get_company_name_by_id,
-    get_company_by_slug,
-    get_company,
-)
+from catalog import find_service, get_catalog_by_slug
+from database import init_db
+from waitlist import accept_offer, decline_offer, get_offer
 
 st.set_page_config(
     page_title="D’or – Publieke catalogus",
@@ -16,37 +12,60 @@ st.set_page_config(
     layout="wide",
 )
 
-init_db()
+
+@st.cache_resource
+def _init_db_once() -> bool:
+    # Eén keer per proces i.p.v. bij elke bezoeker
+    init_db()
+    return True
 
 
-def _fmt_eur(x) -> str:
-    try:
-        return f"€{float(x):.2f}".replace(".", ",")
-    except Exception:
-        return "€0,00"
+_init_db_once()
 
 
 params = st.experimental_get_query_params()
 param_company = params.get("company", [None])[0]
+param_offer = params.get("offer", [None])[0]
+param_service = params.get("service", [None])[0]
+
 
-company_id = None
-company_name = None
-
-if param_company:
-    value = str(param_company)
-    row = get_company_by_slug(value)
-    if not row and value.isdigit():
-        try:
-            row = get_company(int(value))
-        except Exception:
-            row = None
-    if row:
-        company_id = int(row[0])
-        company_name = row[1]
+def render_offer(token: str) -> None:
+    """Aanbod van de wachtlijst bevestigen of afslaan (link uit SMS/WhatsApp/e-mail)."""
+    st.title("Vrijgekomen afspraak")
+    offer = get_offer(token)
+    if offer is None:
+        st.error("Deze link is ongeldig.")
+        return
+    st.markdown(
+        f"**{offer['company']}** · {offer['date']} om {offer['start_time']} "
+        f"({offer['duration']} min) voor **{offer['customer']}**"
+    )
+    if offer["status"] == "accepted":
+        st.success("Deze afspraak is bevestigd. Tot dan!")
+        return
+    if offer["status"] != "pending":
+        st.info("Dit aanbod is niet meer geldig; u blijft op de wachtlijst.")
+        return
+    col1, col2 = st.columns(2)
+    if col1.button("Bevestigen", type="primary"):
+        if accept_offer(token) > 0:
+            st.success("Uw afspraak is geboekt. Tot dan!")
+        else:
+            st.warning("Helaas, iemand anders was u voor. U blijft op de wachtlijst.")
+    if col2.button("Nee, bedankt"):
+        decline_offer(token)
+        st.info("Bedankt voor het laten weten; u blijft op de wachtlijst.")
+
+
+if param_offer:
+    render_offer(param_offer)
+    st.stop()
+
+snapshot = get_catalog_by_slug(param_company) if param_company else None
 
 st.title("Diensten & tarieven")
 
-if not company_id:
+if not snapshot:
     st.info(
         "Dit is de **publieke catalogus** die je met klanten kunt delen.\n\n"
         "- Gebruik in je link `?company=JOUW-BEDRIJFSNAAM&view=public`.\n"
@@ -60,24 +79,27 @@ if not company_id:
             st.experimental_set_query_params(company=str(int(c_id)))
             st.rerun()
 else:
-    st.subheader(f"Bedrijf: {company_name} (#{company_id})")
-    df = get_public_services(company_id)
-    if df.empty:
+    company = snapshot.data["company"]
+    st.subheader(f"Bedrijf: {company['name']} (#{company['id']})")
+    if not snapshot.data["categories"]:
         st.info("Er zijn nog geen gepubliceerde diensten.")
     else:
-        if "category" in df.columns:
-            for cat, grp in df.groupby("category"):
-                label = str(cat) if str(cat).strip() else "Overige diensten"
-                with st.expander(label, expanded=True):
-                    for _, r in grp.iterrows():
-                        st.markdown(
-                            f"**{r['name']}** — {_fmt_eur(r['price'])} • {int(r['duration'])} min"
-                        )
-                        if r.get("description"):
-                            st.caption(str(r["description"]))
-                        st.divider()
-        else:
-            st.table(df)
+        # deep link van een dienst-QR-code: die dienst bovenaan
+        chosen = find_service(snapshot.data, param_service)
+        if chosen:
+            s = chosen[1]
+            st.success(f"**{s['name']}** — {s['price_label']} • {s['duration']} min")
+            if s["description"]:
+                st.caption(s["description"])
+        for cat in snapshot.data["categories"]:
+            with st.expander(cat["name"], expanded=chosen is None or cat is chosen[0]):
+                for s in cat["services"]:
+                    st.markdown(
+                        f"**{s['name']}** — {s['price_label']} • {s['duration']} min"
+                    )
+                    if s["description"]:
+                        st.caption(s["description"])
+                    st.divider()
 
 try:
     st.page_link("app.py", label="⤺ Terug naar beheer", icon="↩️")
@@ -1,14 +1,23 @@
 import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
 import stripe
 import streamlit as st
-import sqlite3
 
 
 # ───────────────────────────────────────────────────────────────
 # 1️⃣  Hulpfunctie om secrets op te halen
 # ───────────────────────────────────────────────────────────────
+@lru_cache(maxsize=None)
 def get_secret(key: str) -> str:
-    """Haalt veilige sleutel op uit Streamlit secrets of omgevingsvariabelen."""
+    """
+    Haalt veilige sleutel op uit Streamlit secrets of omgevingsvariabelen.
+    Gevonden waarden worden onthouden; een ontbrekende sleutel geeft een
+    ValueError (en wordt bij een volgende aanroep opnieuw geprobeerd).
+    """
     try:
         return st.secrets[key]
     except Exception:
@@ -19,41 +28,148 @@ def get_secret(key: str) -> str:
 
 
 # ───────────────────────────────────────────────────────────────
-# 2️⃣  Stripe initialisatie
+# 2️⃣  Stripe client (lui geïnitialiseerd)
 # ───────────────────────────────────────────────────────────────
-stripe.api_key = get_secret("STRIPE_SECRET_KEY")
-key = stripe.api_key or ""
-print("Stripe key prefix loaded:", key[:7])  # toont alleen 'rk_test' of 'sk_test'
+CHECKOUT_SESSION_TTL_SECONDS = 30
+
+
+class PaymentClient:
+    """
+    Stripe-toegang zonder werk bij het importeren van deze module.
+
+    - De API-sleutel wordt pas bij de eerste Stripe-aanroep opgehaald.
+    - Alle aanroepen delen één HTTP-sessie (keep-alive i.p.v. een nieuwe
+      TLS-verbinding per request).
+    - Checkout-sessies worden kort gecachet, zodat get_company_id_from_session
+      en check_payment voor dezelfde session_id maar één API-call doen.
+    """
+
+    def __init__(self, session_ttl: float = CHECKOUT_SESSION_TTL_SECONDS):
+        self._session_ttl = session_ttl
+        self._lock = threading.Lock()
+        self._ready = False
+        self._sessions: Dict[str, Tuple[float, Any]] = {}
+
+    def _ensure_ready(self) -> None:
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            stripe.api_key = get_secret("STRIPE_SECRET_KEY")
+            try:
+                import requests
+
+                stripe.default_http_client = stripe.RequestsClient(
+                    session=requests.Session()
+                )
+            except (ImportError, AttributeError):
+                pass  # Stripe valt terug op zijn eigen standaard-client
+            self._ready = True
+
+    def create_checkout_session(self, **params) -> Any:
+        self._ensure_ready()
+        return stripe.checkout.Session.create(**params)
+
+    def retrieve_checkout_session(self, session_id: str) -> Any:
+        now = time.monotonic()
+        cached = self._sessions.get(session_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        self._ensure_ready()
+        session = stripe.checkout.Session.retrieve(session_id)
+        with self._lock:
+            # verlopen entries opruimen zodat de cache niet blijft groeien
+            for sid in [k for k, (exp, _) in self._sessions.items() if exp <= now]:
+                del self._sessions[sid]
+            self._sessions[session_id] = (now + self._session_ttl, session)
+        return session
+
+    def forget_checkout_session(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+_client: Optional[PaymentClient] = None
+_client_lock = threading.Lock()
+
+
+def get_payment_client() -> PaymentClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaymentClient()
+    return _client
 
 
 # ───────────────────────────────────────────────────────────────
-# 3️⃣  Database-helper voor update van 'paid'-status
+# 3️⃣  Database-helper: abonnement van een checkout lokaal opslaan
 # ───────────────────────────────────────────────────────────────
-from database import get_connection  # ← voeg deze import ook toe bovenaan je file
+from db_core import upsert_subscriptions
 
-def update_company_paid(company_id: int) -> None:
-    """Markeer een bedrijf als betaald (companies.paid = 1)."""
-    conn = None
+
+def store_checkout_subscription(company_id: int, subscription_id: str) -> None:
+    """
+    Sla het abonnement van een afgeronde checkout meteen lokaal op, zodat
+    de toegang er is vóór de webhook binnenkomt. De toegang loopt daarna
+    af met current_period_end; companies.paid wordt niet meer gezet.
+    """
     try:
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute("UPDATE companies SET paid = 1 WHERE id = ?", (company_id,))
-        conn.commit()
-        st.info(f"✅ Bedrijf {company_id} gemarkeerd als betaald.")
+        get_payment_client()._ensure_ready()
+        sub = stripe.Subscription.retrieve(subscription_id)
+        sub = sub.to_dict() if hasattr(sub, "to_dict") else dict(sub)
+        upsert_subscriptions([{**sub, "metadata": {"company_id": company_id}}])
     except Exception as e:
-        st.warning(f"⚠️ Fout bij updaten van betaalstatus: {e}")
-    finally:
-        try:
-            if conn:
-                conn.close()
-        except Exception:
-            pass
+        print(f"⚠️ Fout bij opslaan van abonnement voor bedrijf {company_id}: {e}")
 
 
+# ───────────────────────────────────────────────────────────────
+# 4️⃣  Abonnementen synchroniseren (Stripe -> subscriptions-tabel)
+# ───────────────────────────────────────────────────────────────
+SUBSCRIPTION_PAGE_SIZE = 100
+
+
+def _stripe_subscription_page(starting_after: Optional[str], limit: int) -> dict:
+    get_payment_client()._ensure_ready()
+    params = {"status": "all", "limit": limit}
+    if starting_after:
+        params["starting_after"] = starting_after
+    page = stripe.Subscription.list(**params)
+    return {
+        "data": [s.to_dict() if hasattr(s, "to_dict") else dict(s) for s in page.data],
+        "has_more": bool(page.has_more),
+    }
+
+
+def sync_subscriptions(
+    list_page: Optional[Callable[[Optional[str], int], dict]] = None,
+    page_size: int = SUBSCRIPTION_PAGE_SIZE,
+) -> int:
+    """
+    Haal alle abonnementen pagina voor pagina op en sla ze lokaal op.
+
+    `list_page(starting_after, limit)` geeft {"data": [...], "has_more": bool}
+    terug; standaard is dat Stripe zelf, in tests/lokaal een stub. Elke
+    pagina wordt in één transactie weggeschreven. Retourneert het aantal
+    opgeslagen abonnementen.
+    """
+    list_page = list_page or _stripe_subscription_page
+    total = 0
+    starting_after = None
+    while True:
+        page = list_page(starting_after, page_size)
+        data = page.get("data") or []
+        total += upsert_subscriptions(data)
+        if not page.get("has_more") or not data:
+            return total
+        starting_after = data[-1]["id"]
 
-# ---------------------------------------------------------------
-# Maak Stripe Checkout-sessie aan
-# ---------------------------------------------------------------
+
+# ───────────────────────────────────────────────────────────────
+# 5️⃣  Maak Stripe Checkout-sessie aan
+# ───────────────────────────────────────────────────────────────
 def create_checkout_session(company_id: int, company_email: str, company_name: str = "") -> str:
     """
     Maakt een Stripe Checkout-sessie aan en geeft de URL terug.
@@ -71,7 +187,7 @@ def create_checkout_session(company_id: int, company_email: str, company_name: s
         print(f"Redirect URL base: {app_url}")
 
         # ✅ Maak de checkout-sessie aan
-        session = stripe.checkout.Session.create(
+        session = get_payment_client().create_checkout_session(
             mode="subscription",
             payment_method_types=["card", "ideal"],
             line_items=[{"price": price_id, "quantity": 1}],
@@ -95,19 +211,20 @@ def create_checkout_session(company_id: int, company_email: str, company_name: s
 
 
 # ───────────────────────────────────────────────────────────────
-# 5️⃣  Controleer betaling (nu met database-update)
+# 6️⃣  Controleer betaling (slaat het abonnement op)
 # ───────────────────────────────────────────────────────────────
 def check_payment(session_id: str) -> bool:
     """
     Controleert of een sessie is betaald (voltooid).
-    Als betaald → update automatisch companies.paid = 1
+    Als betaald → het abonnement wordt lokaal opgeslagen (subscriptions)
     """
     try:
-        s = stripe.checkout.Session.retrieve(session_id)
+        s = get_payment_client().retrieve_checkout_session(session_id)
         if s.payment_status == "paid":
-            if hasattr(s, "metadata") and s.metadata.get("company_id"):
+            subscription_id = getattr(s, "subscription", None)
+            if subscription_id and hasattr(s, "metadata") and s.metadata.get("company_id"):
                 company_id = int(s.metadata.get("company_id"))
-                update_company_paid(company_id)
+                store_checkout_subscription(company_id, subscription_id)
             return True
         return False
     except Exception as e:
@@ -116,7 +233,7 @@ def check_payment(session_id: str) -> bool:
 
 
 # ───────────────────────────────────────────────────────────────
-# 6️⃣  Haal company_id uit Stripe sessie
+# 7️⃣  Haal company_id uit Stripe sessie
 # ───────────────────────────────────────────────────────────────
 def get_company_id_from_session(session_id: str):
     """
@@ -124,7 +241,7 @@ def get_company_id_from_session(session_id: str):
     Wordt gebruikt in app.py om automatisch in te loggen na betaling.
     """
     try:
-        s = stripe.checkout.Session.retrieve(session_id)
+        s = get_payment_client().retrieve_checkout_session(session_id)
         if hasattr(s, "metadata") and s.metadata:
             return int(s.metadata.get("company_id")) if s.metadata.get("company_id") else None
     except Exception as e:
@@ -0,0 +1,204 @@
+"""
+Profileren van Streamlit-reruns (opt-in).
+
+Aanzetten voor alle sessies met APP_PROFILE=cprofile|sample, of (alleen
+met APP_DEBUG_TOOLS=1) per sessie met ?profile=1 (cProfile, deterministisch)
+of ?profile=sample (sampling-profiler). app.py roept start_rerun() aan
+bovenaan het script en finish_rerun() aan het einde. Per rerun wordt
+bewaard:
+
+- de tijd per render_*-functie (cumulatief, inclusief alles eronder);
+- cProfile: een .pstats-bestand (te openen met pstats of snakeviz);
+- sampling: een speedscope-JSON (https://www.speedscope.app).
+
+app.py houdt de laatste PROFILE_HISTORY (standaard 10) profielen bij in
+de sessie en biedt ze daar als download aan; met PROFILE_DIR=<map> worden
+ze ook naar schijf geschreven. Reruns die afbreken via st.rerun()/st.stop()
+halen finish_rerun() niet en worden niet bewaard.
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+PROFILE_MODES = ("cprofile", "sample")
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "10"))
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+SAMPLE_INTERVAL_S = float(os.getenv("PROFILE_SAMPLE_MS", "5")) / 1000
+MAX_SAMPLE_SECONDS = 120  # vangnet als finish_rerun() nooit komt
+
+_counter_lock = threading.Lock()
+_local = threading.local()
+_counter = 0
+
+
+def mode_from(value: Optional[str]) -> Optional[str]:
+    """Vertaal een query-/omgevingswaarde naar een profielmodus (of None)."""
+    if not value or value in ("0", "false", "off"):
+        return None
+    if value in ("1", "true", "on", "cprofile"):
+        return "cprofile"
+    return "sample" if value == "sample" else None
+
+
+# =============================
+# Sampling-profiler
+# =============================
+class SamplingProfiler:
+    """Neemt elke SAMPLE_INTERVAL_S de stack van één thread op."""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: List[tuple] = []  # stacks van buiten naar binnen
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rerun-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + MAX_SAMPLE_SECONDS
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            self.samples.append(tuple(reversed(stack)))
+
+    def speedscope(self, name: str) -> dict:
+        frames: List[dict] = []
+        index: Dict[tuple, int] = {}
+        samples = []
+        for stack in self.samples:
+            ids = []
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                ids.append(index[key])
+            samples.append(ids)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": len(samples) * self.interval * 1000,
+                    "samples": samples,
+                    "weights": [self.interval * 1000] * len(samples),
+                }
+            ],
+            "exporter": "dor-booking profiling.py",
+        }
+
+    def render_times(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for stack in self.samples:
+            for name in {key[0] for key in stack if key[0].startswith("render_")}:
+                totals[name] = totals.get(name, 0.0) + self.interval * 1000
+        return totals
+
+
+def _pstats_render_times(stats: pstats.Stats) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for (_file, _line, name), (_cc, _nc, _tt, ct, _callers) in stats.stats.items():
+        if name.startswith("render_"):
+            totals[name] = totals.get(name, 0.0) + ct * 1000
+    return totals
+
+
+# =============================
+# Rerun-API
+# =============================
+def _discard_active() -> None:
+    active = getattr(_local, "active", None)
+    if active is None:
+        return
+    profiler = active["profiler"]
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+    _local.active = None
+
+
+def start_rerun(mode: Optional[str], label: str = "") -> None:
+    """Start profileren van deze rerun (mode None = niets doen)."""
+    _discard_active()
+    if mode not in PROFILE_MODES:
+        return
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = SamplingProfiler(threading.get_ident())
+        profiler.start()
+    _local.active = {
+        "profiler": profiler,
+        "mode": mode,
+        "label": label,
+        "started": time.time(),
+        "t0": time.perf_counter(),
+    }
+
+
+def finish_rerun() -> Optional[dict]:
+    """Stop het profiel van deze rerun; retourneert het profiel met samenvatting."""
+    global _counter
+    active = getattr(_local, "active", None)
+    if active is None:
+        return None
+    _local.active = None
+
+    profiler = active["profiler"]
+    wall_ms = (time.perf_counter() - active["t0"]) * 1000
+    with _counter_lock:
+        _counter += 1
+        profile_id = _counter
+
+    name = f"rerun-{profile_id}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(active['started']))}"
+    if active["mode"] == "cprofile":
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        render_ms = _pstats_render_times(stats)
+        filename, data = f"{name}.pstats", marshal.dumps(stats.stats)
+    else:
+        profiler.stop()
+        render_ms = profiler.render_times()
+        filename = f"{name}.speedscope.json"
+        data = json.dumps(profiler.speedscope(active["label"] or name)).encode("utf-8")
+
+    entry = {
+        "id": profile_id,
+        "mode": active["mode"],
+        "label": active["label"],
+        "started": active["started"],
+        "wall_ms": round(wall_ms, 1),
+        "render_ms": {k: round(v, 1) for k, v in sorted(render_ms.items(), key=lambda kv: -kv[1])},
+        "filename": filename,
+        "data": data,
+    }
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, filename), "wb") as f:
+            f.write(data)
+    return entry
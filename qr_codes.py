@@ -0,0 +1,164 @@
+"""
+QR-codes voor de publieke boekingslinks.
+
+Per bedrijf (https://{slug}.{BASE_DOMAIN}) en per dienst (deep link met
+?service=<id>) worden PNG- of SVG-codes gemaakt. Resultaten worden
+gecachet in het geheugen (LRU) én op schijf onder data/qr/, met de URL,
+het formaat en de grootte als sleutel. Met --all worden de codes voor alle
+bedrijven vooraf gerenderd (bv. na een deploy of voor flyers):
+
+    python qr_codes.py --all --size 600 --services
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import os
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import qrcode
+import qrcode.image.svg
+from PIL import Image
+
+from catalog import get_catalog
+from db_core import init_db, list_catalog_versions
+
+BASE_DOMAIN = os.getenv("BASE_DOMAIN", "dor-booking.com")
+QR_DIR = os.path.join("data", "qr")
+DEFAULT_SIZE = 600  # px breedte voor PNG; scherp genoeg voor een A5-flyer
+QR_FORMATS = ("png", "svg")
+
+
+def booking_link(slug: str) -> str:
+    return f"https://{slug}.{BASE_DOMAIN}"
+
+
+def service_link(slug: str, service_id: int) -> str:
+    return f"{booking_link(slug)}/?service={int(service_id)}"
+
+
+# =============================
+# Renderen
+# =============================
+def _make_qr(url: str, box_size: int = 10) -> qrcode.QRCode:
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=box_size,
+        border=4,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr
+
+
+def _render(url: str, fmt: str, size: int) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "svg":
+        qr = _make_qr(url)
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buf)
+    else:
+        # 1 pixel per module, dan met een geheel getal opschalen (scherpe
+        # modules) en centreren op een wit vlak van `size` pixels
+        qr = _make_qr(url, box_size=1)
+        img = qr.make_image().get_image().convert("L")
+        scale = max(1, size // img.width)
+        img = img.resize((img.width * scale, img.height * scale), Image.NEAREST)
+        canvas = Image.new("L", (max(size, img.width),) * 2, 255)
+        offset = (canvas.width - img.width) // 2
+        canvas.paste(img, (offset, offset))
+        canvas.convert("1").save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+
+def _cache_path(url: str, fmt: str, size: int) -> str:
+    key = hashlib.sha1(f"{fmt}|{size}|{url}".encode("utf-8")).hexdigest()
+    return os.path.join(QR_DIR, f"{key}.{fmt}")
+
+
+@lru_cache(maxsize=512)
+def get_qr(url: str, fmt: str = "png", size: int = DEFAULT_SIZE) -> bytes:
+    """QR-code voor `url` als PNG of SVG (bytes), via geheugen- en schijfcache."""
+    fmt = fmt.lower()
+    if fmt not in QR_FORMATS:
+        raise ValueError(f"Onbekend QR-formaat '{fmt}' (kies png of svg).")
+    if fmt == "svg":
+        size = 0  # vectorformaat: grootte speelt geen rol
+
+    path = _cache_path(url, fmt, size)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    data = _render(url, fmt, size)
+    os.makedirs(QR_DIR, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return data
+
+
+def get_company_qr(slug: str, fmt: str = "png", size: int = DEFAULT_SIZE) -> bytes:
+    return get_qr(booking_link(slug), fmt, size)
+
+
+def get_service_qr(
+    slug: str, service_id: int, fmt: str = "png", size: int = DEFAULT_SIZE
+) -> bytes:
+    return get_qr(service_link(slug, service_id), fmt, size)
+
+
+# =============================
+# Batch
+# =============================
+def prerender_all(
+    sizes: Iterable[int] = (DEFAULT_SIZE,),
+    formats: Iterable[str] = QR_FORMATS,
+    include_services: bool = False,
+    company_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """Render QR-codes voor alle (of de gegeven) bedrijven vooraf; retourneert het aantal."""
+    wanted = set(company_ids) if company_ids is not None else None
+    sizes, formats = list(sizes), list(formats)
+    urls = []
+    for cid, slug, _version in list_catalog_versions():
+        if wanted is not None and cid not in wanted:
+            continue
+        urls.append(booking_link(slug))
+        if include_services:
+            snapshot = get_catalog(cid)
+            if snapshot:
+                for cat in snapshot.data["categories"]:
+                    urls.extend(service_link(slug, s["id"]) for s in cat["services"])
+
+    n = 0
+    for url in urls:
+        for fmt in formats:
+            for size in sizes if fmt == "png" else (0,):
+                get_qr(url, fmt, size)
+                n += 1
+    return n
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Render QR-codes voor boekingslinks.")
+    parser.add_argument("--all", action="store_true", help="alle bedrijven vooraf renderen")
+    parser.add_argument("--size", type=int, action="append", help="PNG-breedte in px (herhaalbaar)")
+    parser.add_argument("--services", action="store_true", help="ook deep links per dienst")
+    args = parser.parse_args(argv)
+
+    if not args.all:
+        parser.print_help()
+        return
+
+    init_db()
+    n = prerender_all(sizes=args.size or (DEFAULT_SIZE,), include_services=args.services)
+    print(f"✅ {n} QR-codes gerenderd in {QR_DIR}.")
+
+
+if __name__ == "__main__":
+    main()
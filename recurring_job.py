@@ -0,0 +1,35 @@
+"""
+Vaste afspraken omzetten in boekingen voor de komende weken.
+
+    python recurring_job.py [--horizon 28] [--every 3600]
+
+Draai dit dagelijks (cron, systemd-timer) op de server met de database;
+met --every blijft het script lopen en herhaalt het elke N seconden.
+Vrije tijden blijven ook zonder deze job juist: keren die nog geen
+boeking zijn, telt de slot-berekening rechtstreeks uit de regel.
+"""
+import argparse
+import time
+from datetime import datetime
+
+from db_core import RECURRING_HORIZON_DAYS, init_db, materialize_recurring_bookings
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Maak boekingen aan voor vaste afspraken.")
+    parser.add_argument("--horizon", type=int, default=RECURRING_HORIZON_DAYS,
+                        help="aantal dagen vooruit (standaard: %(default)s)")
+    parser.add_argument("--every", type=int, help="blijf draaien, elke N seconden")
+    args = parser.parse_args(argv)
+
+    init_db()
+    while True:
+        created = materialize_recurring_bookings(args.horizon)
+        print(f"⏰ {datetime.now():%Y-%m-%d %H:%M}: {created} boekingen aangemaakt uit vaste afspraken")
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
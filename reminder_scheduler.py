@@ -1,4 +1,5 @@
 import os
+import tomllib
 from twilio.rest import Client
 from datetime import datetime
 
@@ -15,11 +16,19 @@ if TWILIO_SID and TWILIO_TOKEN and TWILIO_PHONE:
     print("✅ Twilio-gegevens gevonden via omgevingsvariabelen (GitHub Secrets).")
 else:
     print("⚠️ Geen omgevingsvariabelen gevonden — probeer Streamlit secrets.")
-    import streamlit as st
-    TWILIO_SID = st.secrets["TWILIO_SID"]
-    TWILIO_TOKEN = st.secrets["TWILIO_TOKEN"]
-    TWILIO_PHONE = st.secrets["TWILIO_PHONE"]
-    TEST_SMS_TO = st.secrets.get("TEST_SMS_TO", None)
+    # secrets.toml zelf lezen: streamlit importeren kost honderden ms
+    secrets = {}
+    for path in (
+        os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+        os.path.join(".streamlit", "secrets.toml"),
+    ):
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                secrets.update(tomllib.load(f))
+    TWILIO_SID = secrets["TWILIO_SID"]
+    TWILIO_TOKEN = secrets["TWILIO_TOKEN"]
+    TWILIO_PHONE = secrets["TWILIO_PHONE"]
+    TEST_SMS_TO = secrets.get("TEST_SMS_TO", None)
 
 client = Client(TWILIO_SID, TWILIO_TOKEN)
 print(f"⏰ {datetime.now()}: SMS scheduler gestart")
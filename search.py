@@ -0,0 +1,165 @@
+"""
+Zoeken in klanten, diensten en boekingsnotities (SQLite FTS5).
+
+init_db houdt twee FTS5-tabellen bij met triggers op customers, services
+en bookings (alleen boekingen met een notitie; de rest vind je via de
+klant):
+
+- search_words: unicode61 zonder accenten, met prefix-index op 2 en 3
+  tekens. "pie jan" vindt "Piet Jansen" terwijl je typt.
+- search_trigrams: trigram-tokenizer. Vindt stukken midden in een woord
+  of nummer ("ssens", "470 12") en, met een OF over de trigrammen van de
+  zoekterm, ook tikfouten ("Jansesn").
+
+Elke rij heeft het bedrijf als token c<id>x in de kolom tenant. De
+zoekvraag zet dat token met AND voor de rest, zodat FTS5 de treffers in
+de index zelf beperkt tot het bedrijf in plaats van rijen van alle
+bedrijven op te halen en achteraf te filteren.
+
+search() zoekt eerst op woordprefixen (bm25, de titel weegt het zwaarst).
+Pas als dat niets oplevert, zoekt het in de trigrammen: stukken van
+woorden, nummers en tikfouten.
+"""
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from typing import Iterable, List, NamedTuple, Optional
+
+from db_core import get_connection
+from models import SearchHit
+
+SEARCH_KINDS = ("customer", "service", "booking")
+SEARCH_PAGE_SIZE = 20
+# Zoveel trigram-kandidaten worden na bm25 nog nagekeken
+FUZZY_CANDIDATES = 200
+# Aandeel van de trigrammen van de zoekterm dat in een fuzzy treffer moet zitten
+FUZZY_MIN_SHARE = 0.5
+# Lengte van de tekst bij fuzzy treffers
+SNIPPET_CHARS = 80
+
+_PHONE_RE = re.compile(r"^[\d\s+().\-/]+$")
+
+
+class SearchResults(NamedTuple):
+    hits: List[SearchHit]
+    has_more: bool  # er is nog een volgende pagina
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _tenant(company_id: int) -> str:
+    return f'tenant:"c{int(company_id)}x"'
+
+
+def _word_query(company_id: int, query: str) -> Optional[str]:
+    words = re.findall(r"\w+", _fold(query))
+    if not words or _PHONE_RE.match(query):
+        return None
+    terms = " AND ".join(_quote(w) + "*" for w in words)
+    return f"{_tenant(company_id)} AND {{title body}} : ({terms})"
+
+
+def _trigrams(query: str) -> List[str]:
+    if _PHONE_RE.match(query):
+        # nummers staan als +32470...: zoek op de cijfers zonder voorloopnullen
+        digits = re.sub(r"\D", "", query).lstrip("0")
+        return [digits] if len(digits) >= 3 else []
+    grams = []
+    for word in re.findall(r"\w+", query.lower()):
+        grams.extend(word[i : i + 3] for i in range(len(word) - 2))
+    return list(dict.fromkeys(grams))
+
+
+def _trigram_query(company_id: int, grams: List[str]) -> str:
+    terms = " OR ".join(_quote(g) for g in grams)
+    return f"{_tenant(company_id)} AND {{title body}} : ({terms})"
+
+
+def _fetch(conn, table: str, match: str, kinds: tuple, limit: int) -> list:
+    # ORDER BY rank (bm25, zie db_core._SEARCH_RANK) sorteert FTS5 zelf;
+    # highlight() en snippet() lopen dan alleen over de LIMIT rijen.
+    # ORDER BY bm25(...) zou alles via de sorter van SQLite laten gaan.
+    kind_filter = "" if len(kinds) == len(SEARCH_KINDS) else (
+        "AND s.kind IN (SELECT value FROM json_each(:kinds))"
+    )
+    return conn.execute(
+        f"""
+        SELECT s.kind, s.ref_id, s.title, s.body,
+               highlight({table}, 3, '**', '**') AS title_hl,
+               snippet({table}, 4, '**', '**', '…', 10) AS snippet,
+               CASE WHEN s.kind = 'booking' THEN b.date || ' ' || b.start_time END AS detail
+        FROM {table} s
+        LEFT JOIN bookings b ON s.kind = 'booking' AND b.id = s.ref_id
+        WHERE {table} MATCH :match {kind_filter}
+        ORDER BY rank
+        LIMIT :limit
+        """,
+        {"match": match, "kinds": json.dumps(kinds), "limit": limit},
+    ).fetchall()
+
+
+def _hit(row, highlighted: bool = True) -> SearchHit:
+    if highlighted:
+        return SearchHit(row["kind"], row["ref_id"], row["title_hl"], row["snippet"], row["detail"])
+    # highlight() van de trigram-tokenizer verminkt de tekst bij overlappende
+    # trigrammen (OF-zoekvraag); fuzzy treffers daarom zonder markering
+    body = row["body"] or ""
+    snippet = body if len(body) <= SNIPPET_CHARS else body[:SNIPPET_CHARS].rstrip() + "…"
+    return SearchHit(row["kind"], row["ref_id"], row["title"], snippet, row["detail"])
+
+
+def search(
+    company_id: int,
+    query: str,
+    kinds: Optional[Iterable[str]] = None,
+    limit: int = SEARCH_PAGE_SIZE,
+    offset: int = 0,
+) -> SearchResults:
+    """
+    Zoek binnen één bedrijf; `kinds` beperkt tot klanten, diensten en/of
+    boekingen. Retourneert één pagina treffers, beste eerst.
+    """
+    query = (query or "").strip()
+    kinds = tuple(k for k in (kinds or SEARCH_KINDS) if k in SEARCH_KINDS)
+    if not query or not kinds or limit < 1 or offset < 0:
+        return SearchResults([], False)
+
+    want = offset + limit + 1
+    hits: List[SearchHit] = []
+    seen = set()
+    conn = get_connection()
+    try:
+        match = _word_query(company_id, query)
+        if match:
+            for row in _fetch(conn, "search_words", match, kinds, want):
+                hits.append(_hit(row))
+                seen.add((row["kind"], row["ref_id"]))
+
+        # trigrammen alleen als de woorden niets opleveren: een OF over
+        # veelvoorkomende trigrammen raakt een groot deel van de index
+        grams = [] if hits else _trigrams(query)
+        if grams:
+            rows = _fetch(
+                conn, "search_trigrams", _trigram_query(company_id, grams), kinds,
+                max(FUZZY_CANDIDATES, want),
+            )
+            for row in rows:
+                if len(hits) >= want:
+                    break
+                if (row["kind"], row["ref_id"]) in seen:
+                    continue
+                text = f"{row['title']} {row['body']}".lower()
+                if sum(g in text for g in grams) >= FUZZY_MIN_SHARE * len(grams):
+                    hits.append(_hit(row, highlighted=len(grams) == 1))
+    finally:
+        conn.close()
+    return SearchResults(hits[offset : offset + limit], len(hits) > offset + limit)
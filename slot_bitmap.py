@@ -0,0 +1,120 @@
+"""
+Beschikbaarheid als bitmap, om over veel bedrijven tegelijk te zoeken.
+
+Voor één datum wordt elke agenda (een bedrijf, of één resource van een
+bedrijf) een rij van 288 vakjes van 5 minuten: True = open en niet
+geboekt. Een vrije periode van `duration` minuten is dan een reeks van
+k = ceil(duration / 5) opeenvolgende True-vakjes; met een cumulatieve som
+over de hele matrix (agenda's × vakjes) wordt dat één vectorbewerking,
+ongeacht het aantal bedrijven.
+
+Afronding is voorzichtig: openingsvensters worden naar binnen afgerond,
+boekingen naar buiten. Starttijden liggen op een raster van 5 minuten
+vanaf middernacht (get_available_slots_for_duration rekent vanaf het begin
+van elk venster); voor een overzicht "wie heeft er plaats" volstaat dat.
+
+numpy wordt alleen hier geïmporteerd; db_core laadt dit module pas bij
+een zoekopdracht (db_core.search_free_slots).
+"""
+from __future__ import annotations
+
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+RESOLUTION = 5  # minuten per vakje
+CELLS = 24 * 60 // RESOLUTION
+
+# (bedrijf, vensters, bezetting) – zelfde vormen als in slot_engine
+Agenda = Tuple[int, Sequence[Tuple[int, int]], Sequence[Tuple[int, int, Optional[int]]]]
+
+
+def _paint(n_rows: int, rows: List[int], starts: List[int], ends: List[int]) -> np.ndarray:
+    """Markeer [start, eind)-vakjes per rij via een verschil-array + cumsum."""
+    diff = np.zeros((n_rows, CELLS + 1), dtype=np.int16)
+    if rows:
+        r = np.asarray(rows)
+        s = np.clip(np.asarray(starts), 0, CELLS)
+        e = np.clip(np.asarray(ends), 0, CELLS)
+        keep = s < e
+        np.add.at(diff, (r[keep], s[keep]), 1)
+        np.add.at(diff, (r[keep], e[keep]), -1)
+    return np.cumsum(diff[:, :-1], axis=1) > 0
+
+
+class DayBitmap:
+    """Vrije vakjes van één datum voor een reeks agenda's."""
+
+    def __init__(self, owners: np.ndarray, free: np.ndarray):
+        self.owners = owners  # bedrijf per rij, rijen per bedrijf aaneengesloten
+        self.free = free  # bool (rijen, CELLS)
+
+    @classmethod
+    def from_agendas(cls, agendas: Sequence[Agenda]) -> "DayBitmap":
+        open_rows, open_s, open_e = [], [], []
+        busy_rows, busy_s, busy_e = [], [], []
+        for i, (_, windows, busy) in enumerate(agendas):
+            for s, e in windows:
+                open_rows.append(i)
+                open_s.append(-(-s // RESOLUTION))
+                open_e.append(e // RESOLUTION)
+            for b in busy:
+                busy_rows.append(i)
+                busy_s.append(b[0] // RESOLUTION)
+                busy_e.append(-(-b[1] // RESOLUTION))
+        n = len(agendas)
+        free = _paint(n, open_rows, open_s, open_e) & ~_paint(n, busy_rows, busy_s, busy_e)
+        owners = np.asarray([a[0] for a in agendas], dtype=np.int64)
+        return cls(owners, free)
+
+    def not_before(self, cutoffs: Dict[Hashable, int]) -> "DayBitmap":
+        """Kopie waarin per bedrijf alles vóór cutoffs[bedrijf] (minuten) bezet is."""
+        if not cutoffs:
+            return self
+        limits = np.asarray([cutoffs.get(o, 0) for o in self.owners.tolist()], dtype=np.int64)
+        allowed = np.arange(CELLS) >= -(-limits // RESOLUTION)[:, None]
+        return DayBitmap(self.owners, self.free & allowed)
+
+    def fits(self, duration: int, from_min: int = 0, to_min: int = 24 * 60) -> np.ndarray:
+        """
+        bool (rijen, CELLS): kolom j is True als een afspraak van `duration`
+        minuten in vakje j kan starten en helemaal binnen [from_min, to_min]
+        valt.
+        """
+        k = max(1, -(-duration // RESOLUTION))
+        lo, hi = max(0, -(-from_min // RESOLUTION)), min(CELLS, to_min // RESOLUTION)
+        result = np.zeros(self.free.shape, dtype=bool)
+        if hi - lo >= k:
+            # alleen de kolommen binnen [from, to] optellen
+            sums = np.zeros((self.free.shape[0], hi - lo + 1), dtype=np.int16)
+            np.cumsum(self.free[:, lo:hi], axis=1, dtype=np.int16, out=sums[:, 1:])
+            result[:, lo : hi - k + 1] = (sums[:, k:] - sums[:, :-k]) == k
+        return result
+
+    def first_free(
+        self, duration: int, from_min: int = 0, to_min: int = 24 * 60
+    ) -> List[Tuple[Hashable, int]]:
+        """(bedrijf, eerste starttijd in minuten) voor elk bedrijf met plaats, vroegste eerst."""
+        fits = self.fits(duration, from_min, to_min)
+        if not len(self.owners):
+            return []
+        first = np.where(fits.any(axis=1), fits.argmax(axis=1), CELLS)
+        # rijen van hetzelfde bedrijf liggen naast elkaar: minimum per groep
+        bounds = np.flatnonzero(np.r_[True, self.owners[1:] != self.owners[:-1]])
+        per_company = np.minimum.reduceat(first, bounds)
+        companies = self.owners[bounds]
+        hit = per_company < CELLS
+        companies, per_company = companies[hit], per_company[hit]
+        order = np.lexsort((companies, per_company))
+        return list(zip(companies[order].tolist(), (per_company[order] * RESOLUTION).tolist()))
+
+    def starts_by_company(
+        self, duration: int, from_min: int = 0, to_min: int = 24 * 60
+    ) -> Dict[Hashable, List[int]]:
+        """Alle mogelijke starttijden (minuten) per bedrijf."""
+        fits = self.fits(duration, from_min, to_min)
+        result: Dict[Hashable, set] = {}
+        rows, cols = np.nonzero(fits)
+        for company, cell in zip(self.owners[rows].tolist(), cols.tolist()):
+            result.setdefault(company, set()).add(cell * RESOLUTION)
+        return {c: sorted(s) for c, s in result.items()}
@@ -0,0 +1,260 @@
+"""
+Vrije tijd berekenen over meerdere resources (medewerkers, stoelen, ruimtes).
+
+Alles werkt in minuten sinds middernacht en zonder database: db_core haalt
+per dag in een vast aantal queries de resources, openingsvensters en
+boekingen op en geeft ze hier door. Per resource worden de bezette
+intervallen gesorteerd en samengevoegd; één sweep over vensters en
+bezetting levert de vrije segmenten. Een starttijd is beschikbaar als
+minstens één resource een vrij segment heeft waar de hele duur in past
+(de unie over alle resources), dus de capaciteit groeit mee met het
+aantal medewerkers zonder extra queries.
+
+Starttijden liggen, zoals voorheen, op een raster van `step` minuten
+vanaf het begin van elk venster.
+
+Voorbereidings- en opruimtijd (buffers) zitten in de intervallen zelf:
+bestaande boekingen komen als [start - buffer_voor, einde + buffer_na]
+binnen, en een nieuwe afspraak moet met haar eigen buffers in een vrij
+segment passen. Diensten van één afspraak volgen elkaar op
+(sequence_items); zo wordt het hele blok één keer per segment getoetst.
+
+In de database staan naast de tekstkolommen ook gehele getallen:
+minuten sinds middernacht (start_min/end_min), dagnummer sinds 1970-01-01
+(day_num) en weekdag 0-6 vanaf maandag (weekday). to_epoch_day en
+from_epoch_day zetten datums om.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Interval = Tuple[int, int]
+# (start, eind, booking_id) – booking_id om een conflict te kunnen melden
+Busy = Tuple[int, int, Optional[int]]
+
+
+def to_minutes(hhmm: str) -> int:
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+def to_hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+_EPOCH = date(1970, 1, 1)
+
+
+def to_epoch_day(day) -> int:
+    """Dagnummer sinds 1970-01-01, uit een date of 'JJJJ-MM-DD'."""
+    if isinstance(day, str):
+        day = date(int(day[:4]), int(day[5:7]), int(day[8:10]))
+    return (day - _EPOCH).days
+
+
+def from_epoch_day(day_num: int) -> date:
+    return _EPOCH + timedelta(days=day_num)
+
+
+def occurrence_days(
+    start_day: int,
+    interval_days: int,
+    count: Optional[int],
+    until_day: Optional[int],
+    from_day: int,
+    to_day: int,
+) -> Iterator[int]:
+    """Dagnummers van de herhaling in [from_day, to_day], zonder ze vooraf op te sommen."""
+    k = max(0, -(-(from_day - start_day) // interval_days))
+    last = to_day if until_day is None else min(to_day, until_day)
+    while count is None or k < count:
+        day = start_day + k * interval_days
+        if day > last:
+            return
+        yield day
+        k += 1
+
+
+def sequence_items(items: Sequence[Tuple[int, int, int]]) -> Tuple[int, int, int]:
+    """
+    (duur, buffer_voor, buffer_na) per dienst, in volgorde -> (buffer_voor,
+    duur, buffer_na) van de hele afspraak. Diensten volgen elkaar op; tussen
+    twee diensten zit de opruimtijd van de ene plus de voorbereiding van de
+    volgende, en die telt mee in de duur (de klant is dan nog bezig).
+    """
+    if not items:
+        return 0, 0, 0
+    duration = sum(d for d, _, _ in items)
+    duration += sum(prev[2] + nxt[1] for prev, nxt in zip(items, items[1:]))
+    return items[0][1], duration, items[-1][2]
+
+
+def default_step(block: int) -> int:
+    """
+    Raster voor een afspraak die `block` minuten bezet (buffers inbegrepen):
+    afspraken sluiten dan naadloos op elkaar aan, tussen 5 en 30 minuten.
+    """
+    return min(30, max(5, -(-block // 5) * 5))
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sorteer en voeg overlappende intervallen samen (aanliggende blijven apart)."""
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if end < start:
+            continue
+        if merged and start < merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
+
+
+def overlaps(busy: Sequence[Busy], start: int, end: int) -> Optional[Busy]:
+    """Vroegste bezetting die [start, end) raakt (None = vrij)."""
+    return min((b for b in busy if b[0] < end and b[1] > start), default=None)
+
+
+def subtract(windows: Sequence[Interval], cuts: Sequence[Interval]) -> List[Interval]:
+    """Vensters min de gegeven intervallen (bv. een sluiting van 12:00-14:00)."""
+    merged = merge_intervals(cuts)
+    result = []
+    for ws, we in sorted(windows):
+        cursor = ws
+        for cs, ce in merged:
+            if ce <= cursor:
+                continue
+            if cs >= we:
+                break
+            if cs > cursor:
+                result.append((cursor, cs))
+            cursor = max(cursor, ce)
+        if cursor < we:
+            result.append((cursor, we))
+    return result
+
+
+def apply_exceptions(
+    windows: Sequence[Interval],
+    opens: Sequence[Interval],
+    closures: Sequence[Optional[Interval]],
+) -> List[Interval]:
+    """
+    Weekrooster van één dag aanpassen met uitzonderingen:
+    een sluiting zonder tijden (None) schrapt het rooster, extra
+    openingen worden toegevoegd en sluitingen met tijden gaan er daarna af.
+    Zo geeft 'hele dag dicht' + 'open 10:00-12:00' alleen 10:00-12:00.
+    """
+    if not opens and not closures:
+        return list(windows)
+    result = [] if any(c is None for c in closures) else list(windows)
+    result = merge_intervals(list(result) + list(opens))
+    return subtract(result, [c for c in closures if c is not None])
+
+
+def free_segments(windows: Sequence[Interval], busy: Sequence[Busy]) -> List[Tuple[int, int, int]]:
+    """
+    Vrije stukken binnen de vensters als (begin, eind, vensterbegin).
+    Het vensterbegin bepaalt het raster van de starttijden.
+    """
+    merged = merge_intervals((b[0], b[1]) for b in busy)
+    segments = []
+    for ws, we in sorted(windows):
+        cursor = ws
+        for bs, be in merged:
+            if be <= cursor:
+                continue
+            if bs >= we:
+                break
+            if bs > cursor:
+                segments.append((cursor, bs, ws))
+            cursor = max(cursor, be)
+            if cursor >= we:
+                break
+        if cursor < we:
+            segments.append((cursor, we, ws))
+    return segments
+
+
+def free_starts(
+    windows: Sequence[Interval],
+    busy: Sequence[Busy],
+    duration: int,
+    step: int,
+    before: int = 0,
+    after: int = 0,
+) -> List[int]:
+    """
+    Starttijden (minuten) waarop `duration` minuten vrij zijn voor één
+    resource, met `before`/`after` minuten buffer ook vrij.
+    """
+    starts = []
+    for a, b, anchor in free_segments(windows, busy):
+        first, last = a + before, b - duration - after
+        offset = (first - anchor) % step
+        starts.extend(range(first if offset == 0 else first + step - offset, last + 1, step))
+    return starts
+
+
+def assign_unassigned(
+    resources: Sequence[Hashable],
+    busy: Dict[Hashable, List[Busy]],
+    unassigned: Iterable[Busy],
+) -> None:
+    """
+    Boekingen zonder resource (oude of geïmporteerde) op volgorde van
+    starttijd bij de eerste resource zetten die op dat moment vrij is; past
+    het nergens, dan bij de eerste resource. Werkt `busy` in-place bij.
+    """
+    if not resources:
+        return
+    for b in sorted(unassigned, key=lambda x: (x[0], x[1])):
+        target = next(
+            (r for r in resources if overlaps(busy[r], b[0], b[1]) is None),
+            resources[0],
+        )
+        busy[target].append(b)
+
+
+def available_starts(
+    windows: Dict[Hashable, List[Interval]],
+    busy: Dict[Hashable, List[Busy]],
+    duration: int,
+    step: int,
+    before: int = 0,
+    after: int = 0,
+) -> List[int]:
+    """Unie van de vrije starttijden over alle resources, gesorteerd."""
+    starts = set()
+    for resource, resource_windows in windows.items():
+        starts.update(
+            free_starts(resource_windows, busy.get(resource, []), duration, step, before, after)
+        )
+    return sorted(starts)
+
+
+def pick_resource(
+    resources: Sequence[Hashable],
+    windows: Dict[Hashable, List[Interval]],
+    busy: Dict[Hashable, List[Busy]],
+    start: int,
+    end: int,
+) -> Tuple[Optional[Hashable], Optional[Busy]]:
+    """
+    Eerste resource die [start, end) binnen zijn vensters vrij heeft.
+    Werkt op dat moment niemand (buiten de openingsuren), dan telt alleen
+    bezetting, zoals bij boeken zonder resources. Retourneert
+    (resource, None) of, als alles bezet is, (None, eerste conflict).
+    """
+    working = [
+        r for r in resources
+        if any(ws <= start and end <= we for ws, we in windows.get(r, []))
+    ]
+    candidates = working or list(resources)
+    conflicts = []
+    for r in candidates:
+        clash = overlaps(busy.get(r, []), start, end)
+        if clash is None:
+            return r, None
+        conflicts.append(clash)
+    return None, min(conflicts)
@@ -0,0 +1,166 @@
+"""
+Statische export van alle publieke catalogi (voor CDN / static hosting).
+
+    python static_export.py --out build/catalog
+
+Per bedrijf wordt geschreven:
+
+    <out>/<slug>/index.html     volledige HTML-pagina
+    <out>/<slug>/catalog.json   dezelfde data als /catalog/<slug>.json (logo:
+                                relatieve bestandsnaam van het logo hiernaast)
+    <out>/<slug>/logo.<ext>     logo (indien ingesteld)
+    <out>/manifest.json         geëxporteerde versie per bedrijf
+
+De export is incrementeel: een bedrijf wordt alleen opnieuw gerenderd als
+companies.catalog_version afwijkt van de versie in manifest.json (of met
+--force). Zo kan https://{slug}.{BASE_DOMAIN} door elke static file server
+worden bediend, zonder Streamlit-sessie per bezoeker.
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import os
+import shutil
+from typing import Dict, Optional
+
+from catalog import build_catalog_snapshot, render_catalog_html
+from db_core import init_db, list_catalog_versions
+from logo_images import logo_variant_path
+
+DEFAULT_OUT_DIR = "build/catalog"
+MANIFEST_NAME = "manifest.json"
+
+PAGE_TEMPLATE = """<!doctype html>
+<html lang="nl">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} – Diensten &amp; tarieven</title>
+<style>
+  body {{ font-family: sans-serif; color: #1A1A1A; background: #FFFFFF;
+         max-width: 720px; margin: 2rem auto; padding: 0 1rem; }}
+  h1 {{ margin-bottom: 0; }}
+  h3 {{ border-bottom: 2px solid #D4AF37; padding-bottom: .25rem; }}
+  ul {{ list-style: none; padding: 0; }}
+  li {{ padding: .5rem 0; border-bottom: 1px solid #F7F7F9; }}
+  .dor-logo {{ display: block; max-height: 96px; margin: 0 auto 1rem; }}
+  footer {{ color: #888; font-size: .8rem; margin-top: 2rem; }}
+</style>
+</head>
+<body>
+{body}
+<footer>Powered by D’or Booking System</footer>
+</body>
+</html>
+"""
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _load_manifest(out_dir: str) -> Dict[str, dict]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _copy_logo(logo_path: Optional[str], target_dir: str) -> Optional[str]:
+    """Kopieer het logo naast index.html; retourneert de relatieve bestandsnaam."""
+    if not logo_path or not os.path.isfile(logo_path):
+        return None
+    ext = os.path.splitext(logo_path)[1].lower() or ".png"
+    name = f"logo{ext}"
+    shutil.copyfile(logo_path, os.path.join(target_dir, name))
+    return name
+
+
+def export_company(company_id: int, out_dir: str) -> Optional[dict]:
+    """Render één bedrijf naar <out>/<slug>/; retourneert de manifest-entry."""
+    snapshot = build_catalog_snapshot(company_id)
+    if snapshot is None:
+        return None
+
+    target = os.path.join(out_dir, snapshot.slug)
+    os.makedirs(target, exist_ok=True)
+
+    logo_src = _copy_logo(logo_variant_path(snapshot.logo_path, "catalog"), target)
+    data = {**snapshot.data, "company": {**snapshot.data["company"], "logo": logo_src}}
+    page = PAGE_TEMPLATE.format(
+        title=html.escape(data["company"]["name"]),
+        body=render_catalog_html(data, logo_src),
+    )
+    doc = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    _write_atomic(os.path.join(target, "index.html"), page.encode("utf-8"))
+    _write_atomic(os.path.join(target, "catalog.json"), doc.encode("utf-8"))
+
+    return {"slug": snapshot.slug, "version": snapshot.version, "etag": snapshot.etag}
+
+
+def export_all(out_dir: str = DEFAULT_OUT_DIR, force: bool = False) -> Dict[str, int]:
+    """
+    Exporteer alle catalogi. Retourneert tellers:
+    {"exported": n, "skipped": n, "removed": n}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    new_manifest: Dict[str, dict] = {}
+    stats = {"exported": 0, "skipped": 0, "removed": 0}
+
+    for company_id, slug, version in list_catalog_versions():
+        key = str(company_id)
+        prev = manifest.get(key)
+        if (
+            not force
+            and prev
+            and prev.get("version") == version
+            and prev.get("slug") == slug
+            and os.path.isfile(os.path.join(out_dir, slug, "index.html"))
+        ):
+            new_manifest[key] = prev
+            stats["skipped"] += 1
+            continue
+
+        entry = export_company(company_id, out_dir)
+        if entry:
+            new_manifest[key] = entry
+            stats["exported"] += 1
+
+    # bedrijven die niet meer bestaan opruimen
+    live_slugs = {e["slug"] for e in new_manifest.values()}
+    for key, entry in manifest.items():
+        if key not in new_manifest and entry.get("slug") not in live_slugs:
+            shutil.rmtree(os.path.join(out_dir, entry["slug"]), ignore_errors=True)
+            stats["removed"] += 1
+
+    _write_atomic(
+        os.path.join(out_dir, MANIFEST_NAME),
+        json.dumps(new_manifest, indent=2, sort_keys=True).encode("utf-8"),
+    )
+    return stats
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Exporteer publieke catalogi als statische bestanden.")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="doelmap (standaard: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="alles opnieuw renderen")
+    args = parser.parse_args(argv)
+
+    init_db()
+    stats = export_all(args.out, force=args.force)
+    print(
+        f"✅ Catalogi geëxporteerd naar {args.out}: "
+        f"{stats['exported']} bijgewerkt, {stats['skipped']} ongewijzigd, "
+        f"{stats['removed']} verwijderd."
+    )
+
+
+if __name__ == "__main__":
+    main()
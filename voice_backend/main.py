@@ -1,8 +1,12 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import Response, PlainTextResponse
 from voice_backend.providers.twilio import handle_twilio_webhook
+from voice_backend.public_catalog import router as public_catalog_router
+from voice_backend.stripe_webhook import router as stripe_webhook_router
 
 app = FastAPI()
+app.include_router(public_catalog_router)
+app.include_router(stripe_webhook_router)
 
 @app.post("/twilio/voice")
 async def twilio_voice(request: Request):
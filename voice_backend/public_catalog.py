@@ -0,0 +1,64 @@
+import os
+
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+
+from catalog import etag_matches, get_catalog_by_slug
+from logo_images import logo_variant_path, read_logo_bytes
+
+router = APIRouter()
+
+# Clients/CDN's mogen kort cachen en daarna via If-None-Match hervalideren.
+CACHE_CONTROL = "public, max-age=60, must-revalidate"
+# De logo-URL bevat de catalogusversie (?v=), dus die mag lang gecachet worden.
+LOGO_CACHE_CONTROL = "public, max-age=86400"
+LOGO_MEDIA_TYPES = {".webp": "image/webp", ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+
+
+def _catalog_response(request: Request, slug: str, as_html: bool) -> Response:
+    snapshot = get_catalog_by_slug(slug)
+    if snapshot is None:
+        return JSONResponse({"error": "onbekend bedrijf"}, status_code=404)
+
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": CACHE_CONTROL,
+        "X-Catalog-Version": str(snapshot.version),
+    }
+    if etag_matches(snapshot, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+
+    if as_html:
+        return HTMLResponse(snapshot.html, headers=headers)
+    return Response(
+        content=snapshot.json,
+        media_type="application/json; charset=utf-8",
+        headers=headers,
+    )
+
+
+@router.get("/catalog/{slug}.json")
+async def catalog_json(slug: str, request: Request):
+    """Publieke catalogus als JSON, direct uit de in-memory snapshot."""
+    return _catalog_response(request, slug, as_html=False)
+
+
+@router.get("/catalog/{slug}/logo")
+async def catalog_logo(slug: str):
+    """Logo uit de catalogus (de catalog-variant); de URL staat in de JSON als company.logo."""
+    snapshot = get_catalog_by_slug(slug)
+    path = logo_variant_path(snapshot.logo_path, "catalog") if snapshot else None
+    data = read_logo_bytes(snapshot.logo_path, "catalog") if path else None
+    if data is None:
+        return JSONResponse({"error": "geen logo"}, status_code=404)
+    return Response(
+        content=data,
+        media_type=LOGO_MEDIA_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream"),
+        headers={"Cache-Control": LOGO_CACHE_CONTROL},
+    )
+
+
+@router.get("/catalog/{slug}")
+async def catalog_html(slug: str, request: Request):
+    """Publieke catalogus als HTML-fragment."""
+    return _catalog_response(request, slug, as_html=True)
@@ -0,0 +1,142 @@
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Request
+from fastapi.responses import JSONResponse
+
+from db_core import (
+    get_company_id_by_stripe_customer,
+    mark_stripe_event_processed,
+    record_stripe_event,
+    set_company_stripe_customer,
+    upsert_subscriptions,
+)
+
+router = APIRouter()
+
+SIGNATURE_TOLERANCE_SECONDS = 300
+
+
+class SignatureError(ValueError):
+    pass
+
+
+# =============================
+# Handtekening (Stripe-Signature header)
+# =============================
+def _compute_signature(payload: bytes, secret: str, timestamp: int) -> str:
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    return hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """
+    Maak een Stripe-Signature header voor `payload`.
+    Handig om lokaal nep-events te versturen naar /stripe/webhook.
+    """
+    ts = int(time.time()) if timestamp is None else int(timestamp)
+    return f"t={ts},v1={_compute_signature(payload, secret, ts)}"
+
+
+def verify_signature(
+    payload: bytes,
+    sig_header: Optional[str],
+    secret: str,
+    tolerance: int = SIGNATURE_TOLERANCE_SECONDS,
+) -> dict:
+    """Controleer de handtekening zoals Stripe die zet en geef het event terug."""
+    if not sig_header:
+        raise SignatureError("Stripe-Signature header ontbreekt.")
+
+    timestamp = None
+    signatures = []
+    for part in sig_header.split(","):
+        key, _, value = part.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+    if not timestamp or not timestamp.isdigit() or not signatures:
+        raise SignatureError("Ongeldige Stripe-Signature header.")
+
+    expected = _compute_signature(payload, secret, int(timestamp))
+    if not any(hmac.compare_digest(expected, sig) for sig in signatures):
+        raise SignatureError("Handtekening klopt niet.")
+    if tolerance and abs(time.time() - int(timestamp)) > tolerance:
+        raise SignatureError("Tijdstempel buiten tolerantie.")
+
+    try:
+        return json.loads(payload)
+    except ValueError as e:
+        raise SignatureError("Payload is geen geldige JSON.") from e
+
+
+# =============================
+# Verwerking
+# =============================
+def _company_for(obj: dict) -> Optional[int]:
+    metadata = obj.get("metadata") or {}
+    if metadata.get("company_id"):
+        try:
+            return int(metadata["company_id"])
+        except (TypeError, ValueError):
+            pass
+    return get_company_id_by_stripe_customer(obj.get("customer"))
+
+
+def process_event(event: dict) -> None:
+    """
+    Werk de lokale abonnementsgegevens bij op basis van een Stripe-event.
+
+    Toegang volgt uit subscriptions (status + current_period_end), dus hier
+    wordt companies.paid niet gezet: een betaalde factuur verlengt de
+    periode via het customer.subscription.updated-event dat erop volgt.
+    """
+    event_type = event.get("type", "")
+    obj = (event.get("data") or {}).get("object") or {}
+    company_id = _company_for(obj)
+
+    if company_id is not None:
+        if event_type == "checkout.session.completed":
+            if obj.get("customer"):
+                set_company_stripe_customer(company_id, obj["customer"])
+
+        elif event_type in (
+            "customer.subscription.created",
+            "customer.subscription.updated",
+            "customer.subscription.deleted",
+        ):
+            upsert_subscriptions([{**obj, "metadata": {"company_id": company_id}}])
+
+    mark_stripe_event_processed(event["id"])
+
+
+@router.post("/stripe/webhook")
+async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
+    """
+    Ontvangt Stripe-webhooks. De handtekening wordt direct gecontroleerd en
+    het event-id vastgelegd; de eigenlijke verwerking gebeurt na het 200-
+    antwoord, zodat Stripe niet op de database hoeft te wachten.
+    """
+    secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+    if not secret:
+        return JSONResponse({"error": "STRIPE_WEBHOOK_SECRET ontbreekt"}, status_code=500)
+
+    payload = await request.body()
+    try:
+        event = verify_signature(payload, request.headers.get("stripe-signature"), secret)
+    except SignatureError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if not event.get("id") or not event.get("type"):
+        return JSONResponse({"error": "event zonder id/type"}, status_code=400)
+
+    if not record_stripe_event(event["id"], event["type"]):
+        return JSONResponse({"received": True, "duplicate": True})
+
+    background_tasks.add_task(process_event, event)
+    return JSONResponse({"received": True})
@@ -1,5 +1,5 @@
 from typing import Dict, Any
-from database import get_company_by_ai_number
+from db_core import find_customer_by_phone, get_company_by_ai_number
 
 
 def handle_turn(
@@ -19,6 +19,14 @@ def handle_turn(
         }
 
     if not user_text:
+        # bekende beller (nummer staat bij een klant): persoonlijk begroeten
+        customer = find_customer_by_phone(company["id"], from_number)
+        if customer:
+            return {
+                "say": f"Welkom terug bij {company['name']}, {customer.name}. Waarmee kan ik u helpen?",
+                "expect_input": True,
+                "hangup": False,
+            }
         return {
             "say": f"Welkom bij {company['name']}. Waarmee kan ik u helpen?",
             "expect_input": True,
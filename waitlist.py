@@ -0,0 +1,565 @@
+"""
+Wachtlijst: klanten die op een volgeboekte periode wachten, krijgen een
+aanbod zodra er een tijdvak vrijkomt.
+
+Een annulering (db_core.update_booking_status) roept match_freed_slot
+aan. Die zoekt het vrije stuk rond het geannuleerde tijdvak, haalt via de
+index op (company_id, status, from_day, to_day) alleen de inschrijvingen
+op waarvan het venster die dag bevat, en stuurt de eerste
+OFFERS_PER_SLOT (wie het eerst inschreef) een aanbod. Omdat een venster
+hoogstens WAITLIST_MAX_DAYS lang is, is het indexbereik begrensd: de
+kosten groeien met het aantal kandidaten voor die dag, niet met de
+lengte van de wachtlijst.
+
+Het tijdvak wordt tijdens het aanbod vastgehouden met een boeking met
+status 'held' (telt als bezet, zodat niemand anders het intussen boekt);
+bevestigt niemand, dan wordt die 'released'. Beide staan niet in de
+overzichten en exports (db_core.HOLD_STATUSES).
+Wie als eerste bevestigt (accept_offer) krijgt de afspraak; de andere
+aanbiedingen vervallen. Bevestigt niemand binnen OFFER_HOLD_MINUTES of
+zegt iedereen nee, dan gaat het tijdvak naar de volgende kandidaten.
+
+Berichten gaan via de wachtrij outbound_messages en kosten tegoed uit
+message_balances; waitlist_job.py verstuurt ze en laat aanbiedingen
+verlopen. De link in het bericht komt uit APP_URL (secrets.toml of ENV);
+zonder absolute APP_URL worden geen aanbiedingen verstuurd.
+"""
+from __future__ import annotations
+
+import json
+import secrets
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+
+import customer_match
+import slot_engine
+from db_core import (
+    _booking_item_row,
+    _bump_slot_days,
+    _company_country_code,
+    _consume_message_credit,
+    _day_schedule,
+    _insert_booking_items,
+    _items_block,
+    _lead_cutoff,
+    _link_customer,
+    _queue_message,
+    get_connection,
+)
+from models import WaitlistEntry
+
+WAITLIST_CHANNELS = ("sms", "whatsapp", "email")
+# Maximale lengte van het datumvenster van één inschrijving
+WAITLIST_MAX_DAYS = 62
+OFFER_HOLD_MINUTES = 30
+# Zoveel klanten krijgen tegelijk een aanbod voor hetzelfde tijdvak
+OFFERS_PER_SLOT = 3
+
+
+# =============================
+# INSCHRIJVINGEN
+# =============================
+def add_to_waitlist(
+    company_id: int,
+    customer: str,
+    contact: str,
+    channel: str,
+    items: Iterable[dict],
+    from_date: date,
+    to_date: date,
+    earliest: Optional[str] = None,
+    latest: Optional[str] = None,
+    resource_id: Optional[int] = None,
+) -> int:
+    """
+    Zet een klant op de wachtlijst voor de diensten `items`, ergens tussen
+    from_date en to_date (hoogstens WAITLIST_MAX_DAYS), optioneel alleen
+    tussen `earliest` en `latest` (HH:MM, begin en einde van de afspraak).
+
+    Bij sms en WhatsApp wordt `contact` als +<landcode><nummer> opgeslagen
+    (landcode van het bedrijf), want zo gaat het ongewijzigd naar Twilio.
+
+    Retourneert het id van de inschrijving, of -1 bij ongeldige invoer.
+    """
+    items = list(items)
+    duration = sum(int(i.get("duration", 0)) for i in items)
+    channel = channel.lower().strip()
+    if not customer.strip() or not contact.strip() or channel not in WAITLIST_CHANNELS:
+        return -1
+    if duration <= 0 or to_date < from_date or (to_date - from_date).days >= WAITLIST_MAX_DAYS:
+        return -1
+    earliest_min = slot_engine.to_minutes(earliest) if earliest else None
+    latest_min = slot_engine.to_minutes(latest) if latest else None
+    if earliest_min is not None and latest_min is not None and latest_min - earliest_min < duration:
+        return -1
+
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        contact = contact.strip()
+        if channel != "email":
+            contact = customer_match.normalize_phone(contact, _company_country_code(c, company_id))
+            if not contact:
+                return -1
+        before, duration, after = _items_block(c, company_id, items)
+        c.execute(
+            """
+            INSERT INTO waitlist (
+                company_id, customer, contact, channel, items, duration,
+                buffer_before, buffer_after, from_date, to_date, from_day, to_day,
+                earliest_min, latest_min, resource_id, created_at
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                company_id,
+                customer.strip(),
+                contact,
+                channel,
+                json.dumps(items),
+                duration,
+                before,
+                after,
+                from_date.isoformat(),
+                to_date.isoformat(),
+                slot_engine.to_epoch_day(from_date),
+                slot_engine.to_epoch_day(to_date),
+                earliest_min,
+                latest_min,
+                resource_id,
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        conn.commit()
+        return c.lastrowid
+    finally:
+        conn.close()
+
+
+def list_waitlist(company_id: int, from_date: Optional[date] = None) -> List[WaitlistEntry]:
+    """Wachtende en aangeschreven klanten, oudste inschrijving eerst."""
+    from_day = slot_engine.to_epoch_day(from_date or date.today())
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT {WaitlistEntry.COLUMNS}
+        FROM waitlist
+        WHERE company_id=? AND status IN ('waiting', 'offered') AND to_day >= ?
+        ORDER BY id
+        """,
+        (company_id, from_day),
+    ).fetchall()
+    conn.close()
+    return [WaitlistEntry(*r) for r in rows]
+
+
+def remove_from_waitlist(company_id: int, entry_id: int) -> bool:
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute(
+            """
+            UPDATE waitlist SET status='cancelled'
+            WHERE id=? AND company_id=? AND status IN ('waiting', 'offered')
+            """,
+            (entry_id, company_id),
+        )
+        conn.commit()
+        return c.rowcount > 0
+    finally:
+        conn.close()
+
+
+# =============================
+# MATCHEN
+# =============================
+def _offer_base() -> Optional[str]:
+    """Absolute APP_URL (secrets.toml of ENV, zoals payment), anders None."""
+    # payment pas hier: die importeert stripe en streamlit
+    from payment import get_secret
+
+    try:
+        base = str(get_secret("APP_URL")).strip().rstrip("/")
+    except ValueError:
+        return None
+    return base if base.startswith(("https://", "http://")) else None
+
+
+def _offer_link(base: str, token: str) -> str:
+    return f"{base}/Publieke_catalogus?offer={token}"
+
+
+def _free_room(resources, windows, busy, start_min: int, resource_id: Optional[int]):
+    """
+    (resource, vrije minuten vanaf start_min, vrije minuten ervoor) met de
+    meeste ruimte; de resource van de geannuleerde afspraak gaat voor bij
+    gelijke ruimte.
+    """
+    order = list(resources)
+    if resource_id in order:
+        order.remove(resource_id)
+        order.insert(0, resource_id)
+    best = (None, 0, 0)
+    for r in order:
+        for a, b, _ in slot_engine.free_segments(windows.get(r, []), busy.get(r, [])):
+            if a <= start_min < b and b - start_min > best[1]:
+                best = (r, b - start_min, start_min - a)
+    return best
+
+
+def _match(company_id: int, date_str: str, start_min: int, resource_id: Optional[int]) -> int:
+    # zonder absolute link kan de klant niet bevestigen: dan geen aanbod
+    base = _offer_base()
+    if base is None:
+        print("waitlist: APP_URL ontbreekt of is geen absolute URL, geen aanbod verstuurd")
+        return 0
+    day_num = slot_engine.to_epoch_day(date_str)
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("SELECT name, min_lead_minutes FROM companies WHERE id=?", (company_id,))
+        company = c.fetchone()
+        # voorbij of binnen de voorlooptijd: niet meer aanbieden
+        if company is None or start_min < _lead_cutoff(company["min_lead_minutes"], day_num):
+            return 0
+        c.execute("BEGIN IMMEDIATE")
+        resources, windows, busy = _day_schedule(c, company_id, date_str)
+        rid, room, room_before = _free_room(resources, windows, busy, start_min, resource_id)
+        if room <= 0:
+            conn.rollback()
+            return 0
+
+        # Kandidaten die dit tijdvak niet al afsloegen of lieten verlopen;
+        # ruim genoeg ophalen voor wie geen berichttegoed meer heeft.
+        c.execute(
+            """
+            SELECT id, customer, contact, channel, duration, buffer_before, buffer_after
+            FROM waitlist w
+            WHERE company_id=:cid AND status='waiting'
+              AND from_day BETWEEN :day - :span AND :day AND to_day >= :day
+              AND duration + buffer_after <= :room AND buffer_before <= :room_before
+              AND (earliest_min IS NULL OR earliest_min <= :start)
+              AND (latest_min IS NULL OR :start + duration <= latest_min)
+              AND (resource_id IS NULL OR resource_id = :rid)
+              AND NOT EXISTS (
+                  SELECT 1 FROM waitlist_offers o
+                  WHERE o.waitlist_id = w.id AND o.day_num = :day AND o.start_min = :start
+                    AND o.status IN ('declined', 'expired')
+              )
+            ORDER BY id
+            LIMIT :limit
+            """,
+            {
+                "cid": company_id,
+                "day": day_num,
+                "span": WAITLIST_MAX_DAYS,
+                "room": room,
+                "room_before": room_before,
+                "start": start_min,
+                "rid": rid,
+                "limit": OFFERS_PER_SLOT * 4,
+            },
+        )
+        chosen = []
+        for row in c.fetchall():
+            if len(chosen) == OFFERS_PER_SLOT:
+                break
+            if _consume_message_credit(c, company_id, row["channel"]):
+                chosen.append(row)
+        if not chosen:
+            conn.rollback()
+            return 0
+
+        # Tijdvak vasthouden voor de langste gevraagde afspraak (met buffers)
+        end_min = start_min + max(r["duration"] for r in chosen)
+        hold_before = max(r["buffer_before"] for r in chosen)
+        hold_after = max(start_min + r["duration"] + r["buffer_after"] for r in chosen) - end_min
+        created_at = datetime.utcnow()
+        c.execute(
+            """
+            INSERT INTO bookings (
+                company_id, customer, date, start_time, end_time,
+                total_price, status, created_at, resource_id,
+                day_num, start_min, end_min, buffer_before, buffer_after
+            )
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                company_id,
+                None,
+                date_str,
+                slot_engine.to_hhmm(start_min),
+                slot_engine.to_hhmm(end_min % 1440),
+                0,
+                "held",
+                created_at.isoformat(),
+                rid,
+                day_num,
+                start_min,
+                end_min,
+                hold_before,
+                hold_after,
+            ),
+        )
+        hold_id = c.lastrowid
+
+        company_name = company["name"]
+        expires_at = (created_at + timedelta(minutes=OFFER_HOLD_MINUTES)).isoformat()
+        for row in chosen:
+            token = secrets.token_urlsafe(16)
+            c.execute(
+                """
+                INSERT INTO waitlist_offers (
+                    waitlist_id, company_id, hold_booking_id, day_num, start_min,
+                    token, expires_at, created_at
+                )
+                VALUES (?,?,?,?,?,?,?,?)
+                """,
+                (row["id"], company_id, hold_id, day_num, start_min, token, expires_at,
+                 created_at.isoformat()),
+            )
+            body = (
+                f"Goed nieuws {row['customer']}! Bij {company_name} is er plaats op "
+                f"{date_str} om {slot_engine.to_hhmm(start_min)}. Wie eerst bevestigt, "
+                f"heeft de afspraak ({OFFER_HOLD_MINUTES} min geldig): {_offer_link(base, token)}"
+            )
+            _queue_message(c, company_id, row["channel"], row["contact"], body)
+        c.executemany(
+            "UPDATE waitlist SET status='offered' WHERE id=?", [(r["id"],) for r in chosen]
+        )
+        _bump_slot_days(c, company_id, [day_num])
+        conn.commit()
+        return len(chosen)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def match_freed_slot(
+    company_id: int, date_str: str, start_min: int, resource_id: Optional[int] = None
+) -> int:
+    """
+    Bied het tijdvak dat vanaf start_min vrij is aan wachtende klanten aan.
+    Retourneert het aantal verstuurde aanbiedingen.
+    """
+    expire_offers()
+    return _match(company_id, date_str, start_min, resource_id)
+
+
+# =============================
+# AANBIEDINGEN
+# =============================
+def _release_hold(c, hold_id: int) -> Optional[tuple]:
+    """
+    Geef het vastgehouden tijdvak vrij als er geen openstaand aanbod meer
+    is; retourneert dan (company_id, datum, start_min, resource_id).
+    """
+    c.execute(
+        "SELECT 1 FROM waitlist_offers WHERE hold_booking_id=? AND status='pending' LIMIT 1",
+        (hold_id,),
+    )
+    if c.fetchone():
+        return None
+    c.execute(
+        "SELECT company_id, date, day_num, start_min, resource_id FROM bookings WHERE id=? AND status='held'",
+        (hold_id,),
+    )
+    hold = c.fetchone()
+    if hold is None:
+        return None
+    c.execute("UPDATE bookings SET status='released' WHERE id=?", (hold_id,))
+    _bump_slot_days(c, hold["company_id"], [hold["day_num"]])
+    return hold["company_id"], hold["date"], hold["start_min"], hold["resource_id"]
+
+
+def get_offer(token: str) -> Optional[dict]:
+    """Aanbod voor de bevestigingspagina (None = onbekende link)."""
+    conn = get_connection()
+    row = conn.execute(
+        """
+        SELECT o.status, o.expires_at, o.day_num, o.start_min,
+               w.customer, w.duration, c.name AS company
+        FROM waitlist_offers o
+        JOIN waitlist w ON w.id = o.waitlist_id
+        JOIN companies c ON c.id = o.company_id
+        WHERE o.token=?
+        """,
+        (token,),
+    ).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    offer = dict(row)
+    offer["date"] = slot_engine.from_epoch_day(offer.pop("day_num")).isoformat()
+    offer["start_time"] = slot_engine.to_hhmm(offer.pop("start_min"))
+    if offer["status"] == "pending" and offer["expires_at"] <= datetime.utcnow().isoformat():
+        offer["status"] = "expired"
+    return offer
+
+
+def accept_offer(token: str) -> int:
+    """
+    Bevestig een aanbod: de eerste bevestiging wint. Het vastgehouden
+    tijdvak wordt de afspraak van deze klant, de andere aanbiedingen
+    vervallen en die klanten blijven wachten.
+
+    Retourneert het id van de boeking, of -1 (onbekend, verlopen of al vergeven).
+    """
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute(
+            """
+            SELECT o.id, o.waitlist_id, o.company_id, o.hold_booking_id, o.status,
+                   o.expires_at, o.day_num, o.start_min, w.customer, w.items, w.duration,
+                   w.buffer_before, w.buffer_after, w.contact, w.channel
+            FROM waitlist_offers o
+            JOIN waitlist w ON w.id = o.waitlist_id
+            WHERE o.token=?
+            """,
+            (token,),
+        )
+        offer = c.fetchone()
+        if (
+            offer is None
+            or offer["status"] != "pending"
+            or offer["expires_at"] <= datetime.utcnow().isoformat()
+        ):
+            conn.rollback()
+            return -1
+        hold_id = offer["hold_booking_id"]
+        items = json.loads(offer["items"])
+        end_min = offer["start_min"] + offer["duration"]
+        email = offer["channel"] == "email"
+        customer_id = _link_customer(
+            c,
+            offer["company_id"],
+            offer["customer"],
+            phone=None if email else offer["contact"],
+            email=offer["contact"] if email else None,
+        )
+        c.execute(
+            """
+            UPDATE bookings
+            SET customer=?, customer_id=?, status='scheduled', end_time=?, end_min=?,
+                buffer_before=?, buffer_after=?, total_price=?
+            WHERE id=? AND status='held'
+            """,
+            (
+                offer["customer"],
+                customer_id,
+                slot_engine.to_hhmm(end_min % 1440),
+                end_min,
+                offer["buffer_before"],
+                offer["buffer_after"],
+                sum(float(i.get("price", 0)) for i in items),
+                hold_id,
+            ),
+        )
+        if c.rowcount == 0:
+            # tijdvak intussen vrijgegeven of door de zaak geannuleerd
+            conn.rollback()
+            return -1
+        _insert_booking_items(c, [_booking_item_row(hold_id, it) for it in items])
+
+        c.execute("UPDATE waitlist_offers SET status='accepted' WHERE id=?", (offer["id"],))
+        c.execute("UPDATE waitlist SET status='booked' WHERE id=?", (offer["waitlist_id"],))
+        c.execute(
+            """
+            UPDATE waitlist SET status='waiting'
+            WHERE status='offered' AND id IN (
+                SELECT waitlist_id FROM waitlist_offers
+                WHERE hold_booking_id=? AND status='pending'
+            )
+            """,
+            (hold_id,),
+        )
+        c.execute(
+            "UPDATE waitlist_offers SET status='superseded' WHERE hold_booking_id=? AND status='pending'",
+            (hold_id,),
+        )
+        _bump_slot_days(c, offer["company_id"], [offer["day_num"]])
+        conn.commit()
+        return hold_id
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def decline_offer(token: str) -> bool:
+    """Klant wil het tijdvak niet; blijft wel op de wachtlijst."""
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute(
+            "SELECT id, waitlist_id, hold_booking_id FROM waitlist_offers WHERE token=? AND status='pending'",
+            (token,),
+        )
+        offer = c.fetchone()
+        if offer is None:
+            conn.rollback()
+            return False
+        c.execute("UPDATE waitlist_offers SET status='declined' WHERE id=?", (offer["id"],))
+        c.execute(
+            "UPDATE waitlist SET status='waiting' WHERE id=? AND status='offered'",
+            (offer["waitlist_id"],),
+        )
+        freed = _release_hold(c, offer["hold_booking_id"])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    if freed:
+        _match(*freed)
+    return True
+
+
+def expire_offers(now: Optional[datetime] = None) -> int:
+    """
+    Laat onbeantwoorde aanbiedingen verlopen en bied vrijgekomen tijdvakken
+    aan de volgende kandidaten aan. Retourneert het aantal verlopen aanbiedingen.
+    """
+    now = now or datetime.utcnow()
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute(
+            """
+            SELECT id, waitlist_id, hold_booking_id FROM waitlist_offers
+            WHERE status='pending' AND expires_at <= ?
+            """,
+            (now.isoformat(),),
+        )
+        expired = c.fetchall()
+        if not expired:
+            conn.rollback()
+            return 0
+        c.executemany(
+            "UPDATE waitlist_offers SET status='expired' WHERE id=?", [(o["id"],) for o in expired]
+        )
+        c.executemany(
+            "UPDATE waitlist SET status='waiting' WHERE id=? AND status='offered'",
+            [(o["waitlist_id"],) for o in expired],
+        )
+        freed = [_release_hold(c, h) for h in {o["hold_booking_id"] for o in expired}]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    for slot in freed:
+        if slot:
+            _match(*slot)
+    return len(expired)
@@ -0,0 +1,73 @@
+"""
+Wachtlijst-aanbiedingen verlopen en wachtende berichten versturen.
+
+    python waitlist_job.py [--every 60]
+
+Laat onbeantwoorde aanbiedingen verlopen (het tijdvak gaat dan naar de
+volgende kandidaten) en verstuurt SMS- en WhatsApp-berichten uit
+outbound_messages via Twilio. Twilio-gegevens komen uit dezelfde
+omgevingsvariabelen als reminder_scheduler.py (TWILIO_SID, TWILIO_TOKEN,
+TWILIO_PHONE); APP_URL (secrets.toml of omgeving, absoluut) bepaalt de
+link in het aanbod. E-mails blijven in de wachtrij staan tot er een
+verzendkanaal voor e-mail is.
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+from db_core import init_db, list_queued_messages, mark_message_sent
+from waitlist import expire_offers
+
+
+def _twilio_sender():
+    sid = os.environ.get("TWILIO_SID")
+    token = os.environ.get("TWILIO_TOKEN")
+    phone = os.environ.get("TWILIO_PHONE")
+    if not (sid and token and phone):
+        print("⚠️ Geen Twilio-gegevens; berichten blijven in de wachtrij.")
+        return None
+    from twilio.rest import Client
+
+    client = Client(sid, token)
+
+    def send(channel: str, recipient: str, body: str) -> None:
+        if channel == "whatsapp":
+            client.messages.create(body=body, from_=f"whatsapp:{phone}", to=f"whatsapp:{recipient}")
+        else:
+            client.messages.create(body=body, from_=phone, to=recipient)
+
+    return send
+
+
+def send_queued(send) -> int:
+    sent = 0
+    for msg in list_queued_messages(("sms", "whatsapp")):
+        try:
+            send(msg["channel"], msg["recipient"], msg["body"])
+            mark_message_sent(msg["id"])
+            sent += 1
+        except Exception as e:
+            print(f"❌ Fout bij verzenden naar {msg['recipient']}: {e}")
+            mark_message_sent(msg["id"], ok=False)
+    return sent
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Verwerk wachtlijst-aanbiedingen.")
+    parser.add_argument("--every", type=int, help="blijf draaien, elke N seconden")
+    args = parser.parse_args(argv)
+
+    init_db()
+    send = _twilio_sender()
+    while True:
+        expired = expire_offers()
+        sent = send_queued(send) if send else 0
+        print(f"⏰ {datetime.now():%Y-%m-%d %H:%M}: {expired} aanbiedingen verlopen, {sent} berichten verstuurd")
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()